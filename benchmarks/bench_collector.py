@@ -0,0 +1,128 @@
+"""Load-generate against a local collector and report submissions per second.
+
+Starts `nexum_checkpoint.py collect` in a subprocess with a temporary history
+store, then posts gzip-compressed scans from several keep-alive client
+threads.
+
+Usage: python benchmarks/bench_collector.py [--scans 20000] [--clients 16] [--per-request 1] [--dir PARENT]
+
+File creation cost depends heavily on the filesystem; pass e.g. `--dir /dev/shm`
+to measure the collector itself rather than the disk.
+"""
+import argparse
+import gzip
+import http.client
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+from modules import collector, serializer
+from benchmarks.fixtures import make_audit
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_healthy(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", collector.HEALTH_PATH)
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("collector did not start")
+
+
+def client(port: int, bodies, results, lock):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+    ok = busy = failed = 0
+    for body in bodies:
+        while True:
+            conn.request("POST", collector.SUBMIT_PATH, body, headers)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status == 503:
+                busy += 1
+                # Retry sooner than Retry-After asks, to keep the queue under pressure.
+                time.sleep(0.05)
+                continue
+            if resp.status == 200:
+                ok += 1
+            else:
+                failed += 1
+            break
+    conn.close()
+    with lock:
+        results["ok"] += ok
+        results["busy"] += busy
+        results["failed"] += failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scans", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--per-request", type=int, default=1, help="Scans batched into each request")
+    parser.add_argument("--dir", help="Parent directory for the temporary history store")
+    args = parser.parse_args()
+
+    # A pool of distinct payloads, pre-compressed so the clients measure the collector.
+    pool = [make_audit(n_users=10, n_interfaces=3, seed=i) for i in range(256)]
+    for i, data in enumerate(pool):
+        data["network"]["hostname"] = f"host{i:04d}"
+        data.pop("risk_score", None)
+    requests = []
+    for i in range(0, args.scans, args.per_request):
+        chunk = [pool[(i + j) % len(pool)] for j in range(min(args.per_request, args.scans - i))]
+        requests.append(gzip.compress(serializer.dumps(chunk if args.per_request > 1 else chunk[0]), 6))
+    raw = sum(len(serializer.dumps(pool[i % len(pool)])) for i in range(args.scans))
+    wire = sum(len(b) for b in requests)
+    print(f"payload    {raw / args.scans / 1024:.1f} KiB/scan raw, {wire / args.scans / 1024:.1f} KiB/scan on the wire")
+
+    tmp = tempfile.mkdtemp(prefix="nexum-collector-", dir=args.dir)
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, str(ROOT / "nexum_checkpoint.py"), "collect", "--port", str(port)],
+        env={**os.environ, "NEXUM_HISTORY_DIR": tmp}, stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_healthy(port)
+        results = {"ok": 0, "busy": 0, "failed": 0}
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=client, args=(port, requests[i::args.clients], results, lock))
+            for i in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        stored = len(list(Path(tmp).glob("scan_*.json")))
+        print(f"requests   {results['ok']} ok, {results['failed']} failed, {results['busy']} answered 503")
+        print(f"stored     {stored} scans in {elapsed:.2f}s   {stored / elapsed:10.0f} scans/s")
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark fleet ingestion, cached reloads and queries.
+
+Usage: python benchmarks/bench_fleet.py [--files 100000] [--workers N] [--dir PATH]
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from modules import fleet, serializer
+from benchmarks.fixtures import make_audit
+
+
+def generate(directory: Path, count: int):
+    for i in range(count):
+        serializer.dump(make_audit(seed=i), directory / f"audit_{i:07d}.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--dir", help="Reuse an existing directory of exports instead of generating one")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.dir:
+        directory = Path(args.dir)
+    else:
+        tmp = tempfile.mkdtemp(prefix="nexum-fleet-")
+        directory = Path(tmp)
+        start = time.perf_counter()
+        generate(directory, args.files)
+        print(f"generate   {args.files} files   {time.perf_counter() - start:8.2f}s")
+
+    try:
+        (directory / fleet.CACHE_NAME).unlink(missing_ok=True)
+        start = time.perf_counter()
+        table = fleet.load(directory, workers=args.workers)
+        cold = time.perf_counter() - start
+        print(f"ingest     {len(table)} rows   {cold:8.2f}s   {len(table) / cold:10.0f} files/s")
+
+        start = time.perf_counter()
+        fleet.load(directory, workers=args.workers)
+        print(f"reload     cached         {time.perf_counter() - start:8.2f}s")
+
+        start = time.perf_counter()
+        rows = table.select(firewall="inactive", disk_encryption="not encrypted")
+        print(f"select     {len(rows)} rows   {(time.perf_counter() - start) * 1000:8.2f}ms")
+
+        start = time.perf_counter()
+        counts = table.value_counts("antivirus_product")
+        print(f"counts     {len(counts)} values   {(time.perf_counter() - start) * 1000:8.2f}ms")
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
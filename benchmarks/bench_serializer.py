@@ -0,0 +1,58 @@
+"""Benchmark the serializer backends on realistic audit payloads.
+
+Usage: python benchmarks/bench_serializer.py [--repeat N]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from modules import serializer
+from benchmarks.fixtures import make_audit
+
+SIZES = {
+    "small": dict(n_users=10, n_interfaces=3),
+    "typical": dict(n_users=60, n_interfaces=8),
+    "large": dict(n_users=5000, n_interfaces=500),
+}
+
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(repeat: int = 20):
+    rows = []
+    for size, kwargs in SIZES.items():
+        payload = make_audit(**kwargs)
+        for backend in serializer.available_backends():
+            blob = serializer.dumps(payload, backend=backend)
+            pretty = serializer.dumps(payload, pretty=True, backend=backend)
+            rows.append((size, backend, "dumps", timed(lambda: serializer.dumps(payload, backend=backend), repeat), len(blob)))
+            rows.append((size, backend, "dumps pretty", timed(lambda: serializer.dumps(payload, pretty=True, backend=backend), repeat), len(pretty)))
+            rows.append((size, backend, "loads", timed(lambda: serializer.loads(blob, backend=backend), repeat), len(blob)))
+        for backend in ("msgpack", "zlib-json") if serializer.HAVE_MSGPACK else ("zlib-json",):
+            binary = serializer.dumps_binary(payload, backend=backend)
+            rows.append((size, backend, "dumps_binary", timed(lambda: serializer.dumps_binary(payload, backend=backend), repeat), len(binary)))
+            rows.append((size, backend, "loads_binary", timed(lambda: serializer.loads_binary(binary), repeat), len(binary)))
+        rows.append((size, "json", "content_hash", timed(lambda: serializer.content_hash(payload), repeat), 64))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(f"{'size':<8} {'backend':<10} {'operation':<14} {'best ms':>9} {'bytes':>10}")
+    for size, backend, op, seconds, nbytes in run(args.repeat):
+        print(f"{size:<8} {backend:<10} {op:<14} {seconds * 1000:>9.3f} {nbytes:>10}")
+
+
+if __name__ == "__main__":
+    main()
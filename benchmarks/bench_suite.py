@@ -0,0 +1,256 @@
+"""Benchmark the parsers, a full audit, scoring, the exporters and history listing.
+
+Usage: python benchmarks/bench_suite.py [--scale 1.0] [--only PREFIX] [--repeat N]
+                                        [--out results.json] [--baseline FILE]
+                                        [--threshold 0.25] [--save-baseline] [--any-machine]
+
+Inputs are synthetic and sized like the worst hosts seen in the field: a
+10,000-interface `ip addr`, a 100,000-account passwd database, an `lsblk`
+tree with 20,000 partitions and a history of 5,000 scans. `--scale`
+multiplies all of them.
+
+Results are written as JSON (`--out`) and compared against the stored
+baseline, `benchmarks/baseline.json`. A case whose best time is more than
+`--threshold` slower than the baseline is a regression, and the exit code
+is 1. Baselines are only comparable on the machine and at the scale they
+were recorded with: on another machine or scale nothing is compared and the
+exit code is 2 (`--any-machine` compares across machines anyway).
+`--save-baseline` replaces the stored one.
+"""
+import argparse
+import atexit
+import gc
+import itertools
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+# Keep generated history and audit logs out of the real store; must be set before importing.
+WORK_DIR = Path(tempfile.mkdtemp(prefix="nexum-bench-"))
+atexit.register(shutil.rmtree, WORK_DIR, True)
+os.environ["NEXUM_HISTORY_DIR"] = str(WORK_DIR / "history")
+os.environ["NEXUM_LOG_DIR"] = str(WORK_DIR / "logs")
+
+from modules import (disk_encryption, exporter, history, network_info, replay, runner,  # noqa: E402
+                     scanner, serializer, user_audit)
+from modules.models import HostResult  # noqa: E402
+from modules.risk_score import RiskScorer  # noqa: E402
+from benchmarks.fixtures import (make_audit, make_ip_addr, make_linux_bundle, make_lsblk,  # noqa: E402
+                                 make_passwd)
+
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
+RESULTS_VERSION = 1
+
+SIZES = {
+    "interfaces": 10000,
+    "passwd_lines": 100000,
+    "disks": 5000,          # 4 partitions each
+    "history_files": 5000,
+    "export_users": 20000,
+}
+
+
+MIN_ROUND = 0.2   # seconds; short cases repeat the call until a round lasts this long
+
+
+def _round(func: Callable, number: int) -> float:
+    gc.collect()
+    gc.disable()   # as in timeit
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def timed(func: Callable, repeat: int) -> Dict:
+    """Best and median seconds per call over `repeat` rounds.
+
+    The first rounds, untimed, pick how many calls make up a round
+    (1, 2, 5, 10, 20, ...) so that each lasts at least `MIN_ROUND`.
+    """
+    number = 1
+    for factor in itertools.cycle((2, 2.5, 2)):
+        if _round(func, number) >= MIN_ROUND:
+            break
+        number = int(number * factor)
+    rounds = [_round(func, number) / number for _ in range(repeat)]
+    return {"best": min(rounds), "median": statistics.median(rounds), "repeat": repeat, "number": number}
+
+
+def full_audit(bundle: replay.Bundle, export_dir: Path) -> Dict:
+    """The full-audit path of the GUIs: scan, payload and both exports.
+
+    The exports are removed again and the history save is left out (see
+    `history.list_metadata` for history costs), so every round sees the
+    same directories instead of ones that grow with each call.
+    """
+    scan = scanner.Scan(scanner.FULL_AUDIT)
+    with runner.use_source(replay.Replayer(bundle)):
+        results = scan.run()
+    audit_data = scanner.build_payload(scan, results)
+    exporter.export(audit_data, "json", directory=export_dir).unlink()
+    exporter.export({"os": audit_data.get("os"), "risk_score": audit_data["risk_score"], "findings": audit_data},
+                    "markdown", directory=export_dir).unlink()
+    return audit_data
+
+
+def build_cases(scale: float) -> List[tuple]:
+    """(name, setup) pairs; setup builds the inputs and returns the function to time."""
+    def size(key):
+        return max(1, int(SIZES[key] * scale))
+
+    export_dir = WORK_DIR / "exports"
+    export_dir.mkdir()
+
+    def ip_addr():
+        text = make_ip_addr(size("interfaces"))
+        return lambda: network_info.parse_ip_addr(text)
+
+    def passwd():
+        text = make_passwd(size("passwd_lines"))
+        return lambda: user_audit.select_users(user_audit.parse_passwd(text))
+
+    def lsblk():
+        text = make_lsblk(size("disks"))
+        return lambda: disk_encryption.parse_lsblk(text)
+
+    def history_files():
+        if not history.list_scans():
+            for start in range(0, size("history_files"), 500):
+                history.save_scans([make_audit(n_users=10, n_interfaces=3, seed=seed)
+                                    for seed in range(start, min(start + 500, size("history_files")))])
+
+    def list_scans():
+        history_files()
+        return history.list_scans
+
+    def list_metadata():
+        history_files()
+        return history.list_metadata
+
+    def end_to_end():
+        bundle = replay.Bundle.from_dict(make_linux_bundle(size("interfaces"), size("passwd_lines"), size("disks")))
+        return lambda: full_audit(bundle, export_dir)
+
+    def score_dict():
+        data = make_audit(n_users=60, n_interfaces=8)
+        return lambda: RiskScorer().calculate_score(data)
+
+    def score_typed():
+        result = HostResult.from_dict(make_audit(n_users=60, n_interfaces=8))
+        return lambda: RiskScorer().score_result(result)
+
+    def export(fmt):
+        def setup():
+            data = make_audit(n_users=size("export_users"), n_interfaces=size("interfaces") // 20)
+            return lambda: exporter.export(data, fmt, directory=export_dir).unlink()
+        return setup
+
+    return [
+        ("parse.ip_addr", ip_addr),
+        ("parse.passwd", passwd),
+        ("parse.lsblk", lsblk),
+        # History listings run before anything else saves scans, so they always see the same store.
+        ("history.list_scans", list_scans),
+        ("history.list_metadata", list_metadata),
+        ("audit.full_audit", end_to_end),
+        ("score.calculate_score", score_dict),
+        ("score.score_result", score_typed),
+        ("export.json", export("json")),
+        ("export.ndjson", export("ndjson")),
+        ("export.csv", export("csv")),
+        ("export.markdown", export("markdown")),
+    ]
+
+
+def run(scale: float = 1.0, repeat: int = 5, only: Optional[List[str]] = None) -> Dict:
+    cases = {}
+    for name, setup in build_cases(scale):
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        cases[name] = timed(setup(), repeat)
+        print(f"{name:<24} {cases[name]['best'] * 1000:>10.3f} ms", file=sys.stderr)
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.node(),
+        "scale": scale,
+        "serializer": serializer.available_backends()[0],
+        "cases": cases,
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """Per-case ratio of current to baseline best time; `status` is regression, faster or ok."""
+    rows = []
+    for name, case in results["cases"].items():
+        base = baseline["cases"].get(name)
+        if not base:
+            continue
+        ratio = case["best"] / base["best"] if base["best"] else float("inf")
+        status = "regression" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "ok"
+        rows.append({"case": name, "baseline": base["best"], "current": case["best"], "ratio": ratio, "status": status})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", action="append", metavar="PREFIX", help="run only cases starting with PREFIX")
+    parser.add_argument("--out", type=Path, help="write the results as JSON")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--any-machine", action="store_true", help="compare with a baseline from another machine")
+    args = parser.parse_args()
+
+    results = run(args.scale, args.repeat, args.only)
+    if args.out:
+        args.out.write_bytes(serializer.dumps(results, pretty=True))
+    if args.save_baseline:
+        args.baseline.write_bytes(serializer.dumps(results, pretty=True))
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    baseline = serializer.loads(args.baseline.read_bytes())
+    if baseline.get("scale") != results["scale"]:
+        print(f"Baseline was recorded at scale {baseline.get('scale')}, not {results['scale']}; not comparing.")
+        return 2
+    if baseline.get("machine") != results["machine"]:
+        if not args.any_machine:
+            print(f"Baseline was recorded on {baseline.get('machine')}, not {results['machine']}; not comparing. "
+                  "Use --save-baseline here, or --any-machine to compare anyway.")
+            return 2
+        print(f"Note: baseline was recorded on {baseline.get('machine')}; timings may not be comparable.")
+
+    rows = compare(results, baseline, args.threshold)
+    print(f"{'case':<24} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}  status")
+    for row in rows:
+        print(f"{row['case']:<24} {row['baseline'] * 1000:>12.3f} {row['current'] * 1000:>12.3f} "
+              f"{row['ratio']:>7.2f}  {row['status']}")
+    regressions = [row["case"] for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Synthetic, realistic-looking inputs for the benchmarks."""
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+
+def make_audit(n_users: int = 50, n_interfaces: int = 8, seed: int = 0,
+               when: datetime = None) -> Dict:
+    """Return a full-audit payload shaped like the GUIs' `audit_data`."""
+    rng = random.Random(seed)
+    when = when or datetime(2026, 1, 1) + timedelta(minutes=seed)
+    users = [
+        {
+            "username": "root" if i == 0 else f"user{i}",
+            "uid": 0 if i == 0 else 1000 + i,
+            "home": "/root" if i == 0 else f"/home/user{i}",
+            "shell": rng.choice(["/bin/bash", "/bin/zsh", "/usr/sbin/nologin"]),
+            "enabled": True,
+        }
+        for i in range(n_users)
+    ]
+    interfaces = [
+        {
+            "name": "lo" if i == 0 else f"eth{i - 1}",
+            "addresses": [
+                {"type": "IPv4", "addr": f"10.{i // 250}.{i % 250}.{rng.randint(1, 254)}"},
+                {"type": "IPv6", "addr": f"fe80::{rng.randint(0, 0xffff):x}:{i:x}"},
+            ],
+            "status": rng.choice(["up", "down"]),
+            "mac": ":".join(f"{rng.randint(0, 255):02x}" for _ in range(6)),
+        }
+        for i in range(n_interfaces)
+    ]
+    fw = rng.choice(["active", "inactive"])
+    av = rng.choice([{"name": "clamav", "status": "installed"}, {"status": "not detected"}])
+    disk = rng.choice([{"status": "encrypted", "type": "LUKS"}, {"status": "not encrypted", "type": "No LUKS detected"}])
+    deductions = []
+    if fw == "inactive":
+        deductions.append({"reason": "Firewall is disabled", "points": 20})
+    return {
+        "timestamp": when.isoformat(),
+        "os": {"name": "Linux", "version": "6.8.0-45-generic"},
+        "firewall": {"status": fw},
+        "antivirus": av,
+        "disk_encryption": disk,
+        "user_accounts": {"status": "success", "users": users},
+        "network": {"interfaces": interfaces, "hostname": f"host{seed}", "fqdn": f"host{seed}.example.lan"},
+        "risk_score": 100 - sum(d["points"] for d in deductions),
+        "deductions": deductions,
+    }
+
+
+# -- raw probe outputs, for the parsers and replay bundles ---------------------
+
+def make_ip_addr(n_interfaces: int = 10000, seed: int = 0) -> str:
+    """`ip addr` output for `n_interfaces` interfaces (loopback, NICs, veth pairs)."""
+    rng = random.Random(seed)
+    blocks = ["1: lo: <LOOPBACK,UP,LOWER_UP> mtu 65536 qdisc noqueue state UNKNOWN group default qlen 1000\n"
+              "    link/loopback 00:00:00:00:00:00 brd 00:00:00:00:00:00\n"
+              "    inet 127.0.0.1/8 scope host lo\n"
+              "       valid_lft forever preferred_lft forever\n"
+              "    inet6 ::1/128 scope host noprefixroute \n"
+              "       valid_lft forever preferred_lft forever\n"]
+    for i in range(1, n_interfaces):
+        name = f"eth{i}" if i % 3 else f"veth{i:x}@if{i + 1}"
+        up = rng.random() < 0.8
+        flags = "BROADCAST,MULTICAST,UP,LOWER_UP" if up else "BROADCAST,MULTICAST"
+        mac = ":".join(f"{rng.randint(0, 255):02x}" for _ in range(6))
+        lines = [f"{i + 1}: {name}: <{flags}> mtu 1500 qdisc fq_codel state {'UP' if up else 'DOWN'} group default qlen 1000\n",
+                 f"    link/ether {mac} brd ff:ff:ff:ff:ff:ff\n"]
+        if up:
+            lines += [f"    inet 10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}/16 brd 10.{i // 65536 % 256}.255.255 scope global dynamic {name}\n",
+                      "       valid_lft 86265sec preferred_lft 86265sec\n",
+                      f"    inet6 fe80::{rng.randint(0, 0xffff):x}:{i:x}/64 scope link \n",
+                      "       valid_lft forever preferred_lft forever\n"]
+        blocks.append("".join(lines))
+    return "".join(blocks)
+
+
+def make_passwd_entries(n_lines: int = 100000, seed: int = 0) -> List[List]:
+    """[name, uid, home, shell] rows: some system accounts, mostly regular users."""
+    rng = random.Random(seed)
+    entries = [["root", 0, "/root", "/bin/bash"]]
+    for i in range(1, n_lines):
+        if i < 40:
+            entries.append([f"svc{i}", i, "/nonexistent", "/usr/sbin/nologin"])
+        else:
+            entries.append([f"user{i}", 1000 + i, f"/home/user{i}",
+                            rng.choice(["/bin/bash", "/bin/zsh", "/usr/sbin/nologin"])])
+    return entries
+
+
+def make_passwd(n_lines: int = 100000, seed: int = 0) -> str:
+    """/etc/passwd text with `n_lines` accounts."""
+    return "".join(f"{name}:x:{uid}:{uid}:{name}:{home}:{shell}\n"
+                   for name, uid, home, shell in make_passwd_entries(n_lines, seed))
+
+
+def make_lsblk(n_disks: int = 5000, partitions: int = 4, luks: bool = False, seed: int = 0) -> str:
+    """`lsblk -f` tree output; LUKS (if any) only on the last disk, so parsers read it all."""
+    rng = random.Random(seed)
+    lines = ["NAME        FSTYPE      FSVER    LABEL UUID                                 FSAVAIL FSUSE% MOUNTPOINTS\n"]
+    for d in range(n_disks):
+        lines.append(f"sd{d:<9}\n")
+        for p in range(partitions):
+            branch = "└─" if p == partitions - 1 else "├─"
+            fstype = "crypto_LUKS" if luks and d == n_disks - 1 and p == partitions - 1 else rng.choice(["ext4", "xfs", "vfat", "swap"])
+            uuid = "%08x-%04x-%04x-%04x-%012x" % tuple(rng.getrandbits(b) for b in (32, 16, 16, 16, 48))
+            lines.append(f"{branch}sd{d}{p + 1:<6} {fstype:<11} 1.0            {uuid} {rng.randint(1, 900)}G {rng.randint(1, 99):>5}% /mnt/d{d}p{p}\n")
+    return "".join(lines)
+
+
+def make_linux_bundle(n_interfaces: int = 10000, n_users: int = 100000, n_disks: int = 5000, seed: int = 0) -> Dict:
+    """A replay bundle (`replay.Bundle.to_dict` shape) of a large Linux host."""
+    def cmd(args, stdout="", returncode=0):
+        return {"kind": "cmd", "args": args, "returncode": returncode, "stdout": stdout, "stderr": "", "duration": 0.0}
+
+    entries = [
+        {"kind": "probe", "name": "platform.system", "value": "Linux"},
+        cmd(["ufw", "status"], "Status: active\n"),
+        cmd(["which", "clamav"], returncode=1),
+        cmd(["which", "sophos-av"], returncode=1),
+        cmd(["which", "comodo"], "/usr/bin/comodo\n"),
+        cmd(["lsblk", "-f"], make_lsblk(n_disks, seed=seed)),
+        {"kind": "probe", "name": "pwd.getpwall", "value": make_passwd_entries(n_users, seed)},
+        {"kind": "probe", "name": "socket.gethostname", "value": f"bench{seed}"},
+        {"kind": "probe", "name": "socket.getfqdn", "value": f"bench{seed}.example.lan"},
+        cmd(["ip", "addr"], make_ip_addr(n_interfaces, seed)),
+    ]
+    meta = {"system": "Linux", "host": f"bench{seed}",
+            "checks": ["firewall", "antivirus", "disk_encryption", "user_accounts", "network"]}
+    return {"version": 1, "meta": meta, "entries": entries, "results": {}}
@@ -4,6 +4,9 @@ import sys
 from pathlib import Path
 from datetime import datetime
 import json
+import queue
+import threading
+from itertools import islice
 
 sys.path.append(str(Path(__file__).parent.parent))
 from modules import (
@@ -20,7 +23,14 @@ from modules import (
     exporter,
     history as history_mod,
     permissions,
-    config as config_mod
+    config as config_mod,
+    retention,
+    uploader,
+    diff as diff_mod,
+    search as search_mod,
+    formatter,
+    scanner,
+    tracing
 )
 
 # Color scheme (GitHub Copilot dark theme inspired)
@@ -40,6 +50,12 @@ COLORS = {
     "separator": "#404040"
 }
 
+# History browser columns (all read from the metadata index) and page size
+HISTORY_COLUMNS = ("time", "type", "score", "band")
+HISTORY_PAGE_SIZE = 200
+# Children inserted per expansion of a node in the scan detail tree
+TREE_PAGE_SIZE = 500
+
 class SecurityCheckApp:
     def __init__(self, root):
         self.root = root
@@ -62,8 +78,19 @@ class SecurityCheckApp:
         except:
             self.logo_text = "NEXUM-CHECKPOINT"
         
+        # Scan currently running on a worker thread (see start_scan)
+        self.active_scan = None
+        # Payload of the last scan shown; fixes are verified against it
+        self.last_scan_data = None
+
         # Setup the main layout
         self.setup_layout()
+
+        # Background history/export retention (no-op unless enabled in config)
+        self.retention_worker = retention.start_background()
+        # Push scans to a collector (no-op unless an upload URL is configured)
+        self.uploader = uploader.start_background(
+            on_error=lambda message: self.update_status(f"Uploads disabled: {message}", "error"))
         
     def setup_styles(self):
         """Configure custom styles for the application"""
@@ -156,6 +183,8 @@ class SecurityCheckApp:
         ttk.Label(btn_frame, text="QUICK ACTIONS", style="Subheader.TLabel").pack(fill="x", pady=(0, 10))
         ttk.Button(btn_frame, text="🔍 Quick Scan", command=self.run_quick_scan, style="Custom.TButton").pack(fill="x", pady=2)
         ttk.Button(btn_frame, text="🔬 Full System Audit", command=self.run_full_audit, style="Custom.TButton").pack(fill="x", pady=2)
+        self.cancel_button = ttk.Button(btn_frame, text="⏹ Cancel Scan", command=self.cancel_scan, style="Custom.TButton", state="disabled")
+        self.cancel_button.pack(fill="x", pady=2)
         
         ttk.Separator(btn_frame, orient="horizontal").pack(fill="x", pady=20)
         
@@ -218,6 +247,20 @@ class SecurityCheckApp:
         self.result_text.pack(fill="both", expand=True)
         self.result_text.config(state=tk.DISABLED)
 
+        # Timings tab: where the last scan spent its time
+        timings_tab = ttk.Frame(self.notebook, style="Content.TFrame")
+        self.notebook.add(timings_tab, text="Timings")
+        self.timings_label = ttk.Label(timings_tab, text="No scan yet", style="Subheader.TLabel")
+        self.timings_label.pack(anchor="w", pady=(10, 5))
+        timing_columns = tracing.BREAKDOWN_COLUMNS[1:]
+        self.timings_tree = ttk.Treeview(timings_tab, columns=timing_columns, show="tree headings")
+        self.timings_tree.heading("#0", text=tracing.BREAKDOWN_COLUMNS[0])
+        self.timings_tree.column("#0", width=320)
+        for col in timing_columns:
+            self.timings_tree.heading(col, text=col)
+            self.timings_tree.column(col, width=90, anchor="e")
+        self.timings_tree.pack(fill="both", expand=True, padx=5, pady=5)
+
         # Fix Issues tab
         fix_tab = ttk.Frame(self.notebook, style="Content.TFrame")
         self.notebook.add(fix_tab, text="Fix Issues")
@@ -229,19 +272,63 @@ class SecurityCheckApp:
             chk.pack(anchor="w", padx=10, pady=2)
             self.fix_vars[fid] = var
 
-        ttk.Button(fix_tab, text="Apply Fixes", style="Custom.TButton", command=self.apply_fixes).pack(pady=10)
+        fix_buttons = ttk.Frame(fix_tab, style="Content.TFrame")
+        fix_buttons.pack(pady=10)
+        self.preview_fixes_button = ttk.Button(fix_buttons, text="Preview Plan", style="Custom.TButton",
+                                               command=lambda: self.apply_fixes(dry_run=True))
+        self.preview_fixes_button.pack(side=tk.LEFT, padx=5)
+        self.apply_fixes_button = ttk.Button(fix_buttons, text="Apply Fixes", style="Custom.TButton", command=self.apply_fixes)
+        self.apply_fixes_button.pack(side=tk.LEFT, padx=5)
         self.fix_log = scrolledtext.ScrolledText(fix_tab, height=8, bg=COLORS["bg"], fg=COLORS["fg"]) 
         self.fix_log.pack(fill="both", expand=True, padx=5, pady=5)
 
-        # History tab
+        # History tab: paged, sortable list built from the metadata index
         history_tab = ttk.Frame(self.notebook, style="Content.TFrame")
         self.notebook.add(history_tab, text="History")
         ttk.Label(history_tab, text="Past Scans", style="Subheader.TLabel").pack(anchor="w", pady=(10, 5))
-        self.scan_list = ttk.Combobox(history_tab, values=[p.name for p in history_mod.list_scans()])
-        self.scan_list.pack(fill="x", padx=5, pady=2)
-        ttk.Button(history_tab, text="Load Scan", style="Custom.TButton", command=self.load_selected_scan).pack(pady=5)
-        self.history_text = scrolledtext.ScrolledText(history_tab, height=12, bg=COLORS["bg"], fg=COLORS["fg"]) 
-        self.history_text.pack(fill="both", expand=True, padx=5, pady=5)
+        filter_frame = ttk.Frame(history_tab, style="Content.TFrame")
+        filter_frame.pack(fill="x", padx=5, pady=2)
+        ttk.Label(filter_frame, text="Filter:", style="Status.TLabel").pack(side=tk.LEFT)
+        self.history_filter = tk.StringVar()
+        filter_entry = ttk.Entry(filter_frame, textvariable=self.history_filter)
+        filter_entry.pack(side=tk.LEFT, fill="x", expand=True, padx=5)
+        filter_entry.bind("<KeyRelease>", lambda e: self.refresh_history(reload=False))
+        ttk.Button(filter_frame, text="Compare With Previous", style="Custom.TButton", command=self.diff_selected_scan).pack(side=tk.LEFT)
+
+        list_frame = ttk.Frame(history_tab, style="Content.TFrame")
+        list_frame.pack(fill="x", padx=5, pady=2)
+        self.scan_tree = ttk.Treeview(list_frame, columns=HISTORY_COLUMNS, show="headings", height=10, selectmode="browse")
+        for col in HISTORY_COLUMNS:
+            self.scan_tree.heading(col, text=col.title(), command=lambda c=col: self.sort_history(c))
+            self.scan_tree.column(col, width=220 if col == "time" else 100, anchor="w")
+        self.scan_tree_scroll = ttk.Scrollbar(list_frame, orient="vertical", command=self.scan_tree.yview)
+        self.scan_tree.configure(yscrollcommand=self._on_history_scroll)
+        self.scan_tree.pack(side=tk.LEFT, fill="x", expand=True)
+        self.scan_tree_scroll.pack(side=tk.LEFT, fill="y")
+        self.scan_tree.bind("<<TreeviewSelect>>", lambda e: self.load_selected_scan())
+
+        # Selected scan as a tree; nodes are filled in when first expanded
+        detail_frame = ttk.Frame(history_tab, style="Content.TFrame")
+        detail_frame.pack(fill="both", expand=True, padx=5, pady=2)
+        self.detail_tree = ttk.Treeview(detail_frame, columns=("value",), show="tree headings", height=12)
+        self.detail_tree.heading("#0", text="Field")
+        self.detail_tree.heading("value", text="Value")
+        self.detail_tree.column("#0", width=300)
+        detail_scroll = ttk.Scrollbar(detail_frame, orient="vertical", command=self.detail_tree.yview)
+        self.detail_tree.configure(yscrollcommand=detail_scroll.set)
+        self.detail_tree.pack(side=tk.LEFT, fill="both", expand=True)
+        detail_scroll.pack(side=tk.LEFT, fill="y")
+        self.detail_tree.bind("<<TreeviewOpen>>", self._on_detail_open)
+        self.detail_tree.bind("<<TreeviewSelect>>", self._on_detail_select)
+        self.detail_nodes = {}
+        self.detail_more = {}
+
+        self.history_text = scrolledtext.ScrolledText(history_tab, height=6, bg=COLORS["bg"], fg=COLORS["fg"]) 
+        self.history_text.pack(fill="x", padx=5, pady=5)
+        self.history_all = []
+        self.history_rows = []
+        self.history_sort = ("file", True)
+        self.refresh_history()
 
         # Settings tab
         settings_tab = ttk.Frame(self.notebook, style="Content.TFrame")
@@ -250,6 +337,9 @@ class SecurityCheckApp:
         self.config = config_mod.load_config()
         self.offline_var = tk.BooleanVar(value=self.config.get("offline_mode", False))
         ttk.Checkbutton(settings_tab, text="Offline Mode (local-only scans)", variable=self.offline_var, command=self.toggle_offline).pack(anchor="w", padx=10, pady=5)
+        self.retention_button = ttk.Button(settings_tab, text="Preview History Cleanup", style="Custom.TButton",
+                                           command=self.preview_retention)
+        self.retention_button.pack(anchor="w", padx=10, pady=5)
         
         # Status bar
         status_frame = ttk.Frame(self.root, style="Content.TFrame")
@@ -291,24 +381,6 @@ class SecurityCheckApp:
         self.result_text.config(state=tk.DISABLED)
         self.result_text.see("1.0")
 
-    def format_dict(self, data, indent=0):
-        """Format dictionary data for display"""
-        text = ""
-        for key, value in data.items():
-            if isinstance(value, dict):
-                text += "  " * indent + f"{key}:\n"
-                text += self.format_dict(value, indent + 1)
-            elif isinstance(value, list):
-                text += "  " * indent + f"{key}:\n"
-                for item in value:
-                    if isinstance(item, dict):
-                        text += self.format_dict(item, indent + 1)
-                    else:
-                        text += "  " * (indent + 1) + f"- {item}\n"
-            else:
-                text += "  " * indent + f"{key}: {value}\n"
-        return text
-
     def run_os_check(self):
         self.update_status("Checking OS information...")
         os_name, os_version = os_detect.get_os_info()
@@ -317,37 +389,219 @@ class SecurityCheckApp:
                             f"Version: {os_version}")
         self.update_status("Ready")
 
-    def apply_fixes(self):
-        """Apply selected fixes (requires user approval/elevation)."""
+    def apply_fixes(self, dry_run=False):
+        """Plan the selected fixes; unless dry_run, apply the ones still needed in the background."""
         selected = [fid for fid, var in self.fix_vars.items() if var.get()]
         if not selected:
             self.fix_log.insert(tk.END, "No fixes selected.\n")
             return
 
-        self.fix_log.insert(tk.END, f"Applying fixes: {', '.join(selected)}\n")
-        for fid in selected:
+        self.fix_log.insert(tk.END, f"{'Planning' if dry_run else 'Applying'} fixes: {', '.join(selected)}\n")
+        self.apply_fixes_button.configure(state=tk.DISABLED)
+        self.preview_fixes_button.configure(state=tk.DISABLED)
+        # Progress arrives on worker threads; the Tk thread drains it.
+        updates = queue.Queue()
+
+        def progress(step):
+            line = f"{step.fix.id}: {step.status}"
+            if step.status in ("done", "failed") and step.result is not None:
+                line += f" {step.result}"
+            updates.put(line + "\n")
+
+        def drain():
+            while not updates.empty():
+                self.fix_log.insert(tk.END, updates.get_nowait())
+            self.fix_log.see(tk.END)
+
+        def poll():
+            drain()
+            if str(self.apply_fixes_button.cget("state")) == tk.DISABLED:
+                self.root.after(100, poll)
+
+        def finished(outcome):
+            drain()
+            self.apply_fixes_button.configure(state=tk.NORMAL)
+            self.preview_fixes_button.configure(state=tk.NORMAL)
+            if isinstance(outcome, Exception):
+                self.fix_log.insert(tk.END, f"Remediation failed: {outcome}\n")
+                return
+            fix_plan, verification = outcome
+            if dry_run:
+                self.fix_log.insert(tk.END, "".join(fix_plan.describe()))
+            else:
+                done = sum(1 for step in fix_plan.steps if step.status == "done")
+                self.fix_log.insert(tk.END, f"{done} of {len(fix_plan.steps)} fixes applied\n")
+                self.fix_log.insert(tk.END, "".join(remediation.format_verification(verification)))
+                self.last_scan_data = verification["payload"]
+                score = verification["after"]["risk_score"]
+                self.score_var.set(score)
+                self.score_label.configure(text=f"{score} / 100")
+            self.fix_log.see(tk.END)
+
+        def job():
+            fix_plan = remediation.remediate(selected, dry_run=dry_run, progress=progress)
+            if dry_run:
+                return fix_plan, None
+            # Re-run only the checks the fixes touch, against the last scan
+            return fix_plan, remediation.verify(fix_plan, self.latest_scan())
+
+        self.run_in_background(job, finished)
+        self.root.after(100, poll)
+
+    def latest_scan(self):
+        """The scan shown last, else the newest one in history (None if there is none)."""
+        if self.last_scan_data is not None:
+            return self.last_scan_data
+        path = history_mod.latest_scan()
+        return history_mod.load_scan(path) if path else None
+
+    def run_in_background(self, func, callback):
+        """Run func() on a worker thread and pass its result to callback on the Tk thread."""
+        result = {}
+
+        def worker():
+            try:
+                result["value"] = func()
+            except Exception as e:
+                result["value"] = e
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+
+        def poll():
+            if thread.is_alive():
+                self.root.after(50, poll)
+            else:
+                callback(result.get("value"))
+
+        self.root.after(50, poll)
+
+    def refresh_history(self, reload=True):
+        """Re-read the metadata index (if reload) and re-apply filter and sort."""
+        if reload:
+            self.history_all = history_mod.list_metadata()
+        text = self.history_filter.get().strip()
+        rows = self.history_all
+        if search_mod.is_query(text):
+            # Field queries (e.g. user:guest) go through the search index
             try:
-                res = remediation.apply_fix(fid)
-                self.fix_log.insert(tk.END, f"{fid}: {res}\n")
-            except PermissionError as e:
-                self.fix_log.insert(tk.END, f"{fid}: Permission denied - {e}\n")
-        self.fix_log.see(tk.END)
+                hits = {d["file"] for d in search_mod.search(text)}
+            except search_mod.QueryError as e:
+                self.update_status(f"Invalid query: {e}", "error")
+                hits = set()
+            rows = [r for r in rows if r["file"] in hits]
+        elif text:
+            needle = text.lower()
+            rows = [r for r in rows if needle in " ".join(str(r.get(c, "")) for c in HISTORY_COLUMNS).lower()]
+        col, descending = self.history_sort
+
+        def sort_key(rec):
+            value = rec.get(col)
+            if col == "score":
+                return (value is None, value or 0)
+            return (value is None, str(value or ""))
+
+        self.history_rows = sorted(rows, key=sort_key, reverse=descending)
+        self.scan_tree.delete(*self.scan_tree.get_children())
+        self.history_loaded = 0
+        self._load_history_page()
+
+    def _load_history_page(self):
+        """Insert the next page of rows into the Treeview."""
+        page = self.history_rows[self.history_loaded:self.history_loaded + HISTORY_PAGE_SIZE]
+        for rec in page:
+            self.scan_tree.insert("", tk.END, iid=rec["file"], values=[rec.get(c, "") for c in HISTORY_COLUMNS])
+        self.history_loaded += len(page)
+
+    def _on_history_scroll(self, first, last):
+        self.scan_tree_scroll.set(first, last)
+        # Lazily load more rows as the user nears the end of what is loaded
+        if float(last) > 0.9 and self.history_loaded < len(self.history_rows):
+            self._load_history_page()
+
+    def sort_history(self, col):
+        current, descending = self.history_sort
+        self.history_sort = (col, not descending if col == current else False)
+        self.refresh_history(reload=False)
 
     def load_selected_scan(self):
-        sel = self.scan_list.get()
+        sel = self.scan_tree.selection()
         if not sel:
             self.history_text.insert(tk.END, "No scan selected.\n")
             return
-        # find path
-        for p in history_mod.list_scans():
-            if p.name == sel:
-                data = history_mod.load_scan(p)
-                self.history_text.config(state=tk.NORMAL)
-                self.history_text.delete(1.0, tk.END)
-                self.history_text.insert(tk.END, self.format_dict(data))
-                self.history_text.config(state=tk.DISABLED)
-                return
-        self.history_text.insert(tk.END, "Selected scan not found.\n")
+        path = history_mod.HISTORY_DIR / sel[0]
+        if not path.exists():
+            self.history_text.insert(tk.END, "Selected scan not found.\n")
+            return
+        self.update_status(f"Loading {sel[0]}...")
+        self.run_in_background(lambda: history_mod.load_scan(path), self._show_history_scan)
+
+    def _show_history_scan(self, data):
+        self.history_text.config(state=tk.NORMAL)
+        self.history_text.delete(1.0, tk.END)
+        self.detail_tree.delete(*self.detail_tree.get_children())
+        self.detail_nodes.clear()
+        self.detail_more.clear()
+        if isinstance(data, Exception):
+            self.history_text.insert(tk.END, f"Could not load scan: {data}\n")
+        else:
+            self._insert_detail_children("", data, 0)
+        self.history_text.config(state=tk.DISABLED)
+        self.update_status("Ready")
+
+    def _insert_detail_children(self, parent, value, start):
+        """Insert one page of a node's children, each expandable one with a placeholder."""
+        for label, child in islice(formatter.iter_children(value, start), TREE_PAGE_SIZE):
+            iid = self.detail_tree.insert(parent, tk.END, text=label, values=(formatter.describe(child),))
+            if formatter.is_expandable(child):
+                self.detail_nodes[iid] = child
+                self.detail_tree.insert(iid, tk.END, text="…")
+        remaining = len(value) - start - TREE_PAGE_SIZE
+        if remaining > 0:
+            iid = self.detail_tree.insert(parent, tk.END, text=f"… {remaining} more (select to load)")
+            self.detail_more[iid] = (parent, value, start + TREE_PAGE_SIZE)
+
+    def _on_detail_open(self, event):
+        iid = self.detail_tree.focus()
+        value = self.detail_nodes.pop(iid, None)
+        if value is not None:
+            self.detail_tree.delete(*self.detail_tree.get_children(iid))
+            self._insert_detail_children(iid, value, 0)
+
+    def _on_detail_select(self, event):
+        for iid in self.detail_tree.selection():
+            more = self.detail_more.pop(iid, None)
+            if more is not None:
+                self.detail_tree.delete(iid)
+                self._insert_detail_children(*more)
+
+    def diff_selected_scan(self):
+        """Show what changed between the selected scan and the one before it from the same host."""
+        sel = self.scan_tree.selection()
+        names = [r["file"] for r in self.history_all]
+        if not sel or sel[0] not in names:
+            self.history_text.insert(tk.END, "No scan selected.\n")
+            return
+        previous_name = history_mod.previous_scan(sel[0], self.history_all)
+        if previous_name is None:
+            self.history_text.insert(tk.END, "No earlier scan of this host to compare with.\n")
+            return
+        current = history_mod.HISTORY_DIR / sel[0]
+        previous = history_mod.HISTORY_DIR / previous_name
+
+        def show(changes):
+            self.history_text.config(state=tk.NORMAL)
+            self.history_text.delete(1.0, tk.END)
+            if isinstance(changes, Exception):
+                self.history_text.insert(tk.END, f"Could not compare scans: {changes}\n")
+            else:
+                self.history_text.insert(tk.END, f"Changes since {previous.name}:\n\n")
+                self.history_text.insert(tk.END, diff_mod.to_markdown(changes))
+            self.history_text.config(state=tk.DISABLED)
+
+        self.run_in_background(
+            lambda: diff_mod.diff_scans(history_mod.load_scan(previous), history_mod.load_scan(current)), show
+        )
 
     def toggle_offline(self):
         self.config["offline_mode"] = bool(self.offline_var.get())
@@ -355,68 +609,109 @@ class SecurityCheckApp:
         state = "ON" if self.config["offline_mode"] else "OFF"
         self.update_status(f"Offline Mode: {state}")
 
+    def preview_retention(self):
+        """Work out in the background how much space the retention policy would reclaim."""
+        self.retention_button.config(state="disabled")
+        self.update_status("Planning history cleanup...")
+
+        def show(savings):
+            self.retention_button.config(state="normal")
+            if isinstance(savings, Exception):
+                self.update_status(f"Retention preview failed: {savings}", "error")
+                return
+            files = sum(s["files_deleted"] for s in savings.values())
+            mb = sum(s["bytes_reclaimed"] for s in savings.values()) / (1024 * 1024)
+            self.update_status(f"Retention would remove {files} files ({mb:.1f} MB)")
+
+        # The first plan reads every scan payload; keep it off the Tk thread.
+        self.run_in_background(lambda: retention.projected_savings(retention.plan_retention()), show)
+
     def run_firewall_check(self):
         self.update_status("Checking firewall status...")
         fw_status = firewall_check.get_status()
-        self.update_results("Firewall Status:\n\n" + self.format_dict(fw_status))
+        self.update_results("Firewall Status:\n\n" + formatter.format_text(fw_status))
         self.update_status("Ready")
 
     def run_av_check(self):
         self.update_status("Checking antivirus status...")
         av_status = av_check.get_av_status()
-        self.update_results("Antivirus Status:\n\n" + self.format_dict(av_status))
+        self.update_results("Antivirus Status:\n\n" + formatter.format_text(av_status))
         self.update_status("Ready")
 
     def run_disk_check(self):
         self.update_status("Checking disk encryption...")
         disk_status = disk_encryption.get_encryption_status()
-        self.update_results("Disk Encryption Status:\n\n" + self.format_dict(disk_status))
+        self.update_results("Disk Encryption Status:\n\n" + formatter.format_text(disk_status))
         self.update_status("Ready")
 
     def run_user_audit(self):
         self.update_status("Auditing user accounts...")
         user_status = user_audit.get_user_accounts()
-        self.update_results("User Account Audit:\n\n" + self.format_dict(user_status))
+        self.update_results("User Account Audit:\n\n" + formatter.format_text(user_status))
         self.update_status("Ready")
 
     def run_network_check(self):
         self.update_status("Gathering network information...")
         net_info = network_info.get_network_info()
-        self.update_results("Network Information:\n\n" + self.format_dict(net_info))
+        self.update_results("Network Information:\n\n" + formatter.format_text(net_info))
         self.update_status("Ready")
 
+    def save_to_history(self, data):
+        """Save a scan to history and queue it for upload to the collector."""
+        history_mod.save_scan(data)
+        if self.uploader:
+            self.uploader.submit(data)
+        self.refresh_history()
+
+    def start_scan(self, checks, message, callback):
+        """Run `checks` as a cancellable scan on a worker thread, then call callback(scan, results)."""
+        if self.active_scan is not None:
+            self.update_status("A scan is already running", "warning")
+            return
+        scan = self.active_scan = scanner.Scan(checks)
+        self.cancel_button.state(["!disabled"])
+        self.update_status(f"{message} (up to {scan.deadline:g}s)...")
+
+        def finished(results):
+            self.active_scan = None
+            self.cancel_button.state(["disabled"])
+            if scan.cancelled:
+                self.update_status("Scan cancelled", "warning")
+            elif isinstance(results, Exception):
+                self.update_status(f"Scan failed: {results}", "error")
+            else:
+                callback(scan, results)
+
+        self.run_in_background(scan.run, finished)
+
+    def cancel_scan(self):
+        """Stop the running scan; its commands are killed and nothing is saved."""
+        if self.active_scan is not None:
+            self.active_scan.cancel()
+            self.update_status("Cancelling scan...", "warning")
+
+    def show_timings(self, summary):
+        """Fill the Timings tab from a payload's `scan` section."""
+        self.timings_tree.delete(*self.timings_tree.get_children())
+        commands = summary.get("commands") or {}
+        self.timings_label.configure(text=f"Elapsed {summary.get('elapsed', 0):.2f}s of {summary.get('deadline', 0):g}s; "
+                                          f"{commands.get('count', 0)} commands ({commands.get('cached', 0)} cached)")
+        parents = []
+        for depth, span in tracing.breakdown(summary.get("trace") or []):
+            row = tracing.breakdown_row(0, span)
+            del parents[depth:]
+            item = self.timings_tree.insert(parents[-1] if parents else "", "end", text=row[0], values=row[1:], open=True)
+            parents.append(item)
+
     def run_quick_scan(self):
         """Run essential security checks"""
-        self.update_status("Initializing quick scan...", "normal")
-
-        # OS Check
-        self.update_status("Checking operating system...", "normal")
-        os_name, os_version = os_detect.get_os_info()
-
-        # Firewall Check
-        self.update_status("Checking firewall status...", "normal")
-        fw_status = firewall_check.get_status()
+        self.start_scan(scanner.QUICK_SCAN, "Running quick scan", self._finish_quick_scan)
 
-        # Antivirus Check
-        self.update_status("Checking antivirus status...", "normal")
-        av_status = av_check.get_av_status()
-
-        # Compile results
-        quick_findings = {
-            "os": {"name": os_name, "version": os_version},
-            "firewall": fw_status,
-            "antivirus": av_status
-        }
-
-        # Compute risk score
-        scorer = risk_score.RiskScorer()
-        # Map quick_findings to expected keys for scorer
-        mapped = {
-            "firewall": fw_status,
-            "antivirus": av_status,
-            # other keys default
-        }
-        score, deductions = scorer.calculate_score(mapped)
+    def _finish_quick_scan(self, scan, results):
+        data = scanner.build_payload(scan, results, quick=True)
+        os_name, os_version = data["os"]["name"], data["os"]["version"]
+        fw_status, av_status = results["firewall"], results["antivirus"]
+        score, deductions = data["risk_score"], data["deductions"]
         band, _ = risk_score.interpret_band(score)
 
         # Display results
@@ -430,6 +725,10 @@ class SecurityCheckApp:
                 result_text += f" - {d['reason']}: -{d['points']}\n"
 
         result_text += f"\nRisk Score: {score}/100 ({band})\n"
+        if scan.timed_out:
+            result_text += f"Timed out: {', '.join(scan.timed_out)}\n"
+        if scan.insufficient_privilege:
+            result_text += f"Skipped (insufficient privilege): {', '.join(scan.insufficient_privilege)}\n"
 
         # Update score UI
         try:
@@ -439,16 +738,11 @@ class SecurityCheckApp:
             pass
 
         self.update_results(result_text)
+        self.show_timings(data["scan"])
+        self.last_scan_data = data
 
         # Save to history (quick)
-        history_mod.save_scan({
-            "timestamp": datetime.now().isoformat(),
-            "type": "quick",
-            "os": {"name": os_name, "version": os_version},
-            "findings": quick_findings,
-            "risk_score": score,
-            "deductions": deductions
-        })
+        self.save_to_history(data)
 
         # Status
         if score >= 80:
@@ -460,46 +754,18 @@ class SecurityCheckApp:
 
     def run_full_audit(self):
         """Run comprehensive system audit"""
-        self.update_status("Running full system audit...")
+        self.start_scan(scanner.FULL_AUDIT, "Running full system audit", self._finish_full_audit)
 
-        # Gather all information
-        os_name, os_version = os_detect.get_os_info()
-        fw_status = firewall_check.get_status()
-        av_status = av_check.get_av_status()
-        disk_status = disk_encryption.get_encryption_status()
-        user_status = user_audit.get_user_accounts()
-        net_info = network_info.get_network_info()
-
-        # Compile audit data
-        audit_data = {
-            "timestamp": datetime.now().isoformat(),
-            "os": {"name": os_name, "version": os_version},
-            "firewall": fw_status,
-            "antivirus": av_status,
-            "disk_encryption": disk_status,
-            "user_accounts": user_status,
-            "network": net_info
-        }
-
-        # Score the audit
-        scorer = risk_score.RiskScorer()
-        mapped = {
-            "firewall": fw_status,
-            "antivirus": av_status,
-            "disk_encryption": disk_status,
-            "user_accounts": user_status,
-            # updates key may be added elsewhere
-        }
-        score, deductions = scorer.calculate_score(mapped)
-        audit_data["risk_score"] = score
-        audit_data["deductions"] = deductions
+    def _finish_full_audit(self, scan, results):
+        audit_data = scanner.build_payload(scan, results)
+        score = audit_data["risk_score"]
 
         # Exports via exporter module
         json_file = exporter.export_json(audit_data)
         md_file = exporter.export_markdown({"os": audit_data.get("os"), "risk_score": score, "findings": audit_data})
 
         # Save to history folder
-        history_mod.save_scan(audit_data)
+        self.save_to_history(audit_data)
         
         # Update score UI
         try:
@@ -510,11 +776,19 @@ class SecurityCheckApp:
 
         # Display results
         self.update_results("Full System Audit Results:\n\n" + 
-                            self.format_dict(audit_data) +
+                            formatter.format_text(audit_data) +
                             f"\nAudit logs have been saved to:\n" +
                             f"- {json_file.name}\n" +
                             f"- {md_file.name}")
-        self.update_status("Ready")
+        self.show_timings(audit_data["scan"])
+        self.last_scan_data = audit_data
+        if scan.timed_out:
+            self.update_status(f"Audit finished; timed out: {', '.join(scan.timed_out)}", "warning")
+        elif scan.insufficient_privilege:
+            self.update_status(f"Audit finished; skipped (insufficient privilege): "
+                               f"{', '.join(scan.insufficient_privilege)}", "warning")
+        else:
+            self.update_status("Ready")
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -5,12 +5,13 @@ of the original Tkinter version.
 """
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QTabWidget, QVBoxLayout,
-    QHBoxLayout, QPushButton, QProgressBar, QLabel, QTextEdit,
+    QHBoxLayout, QPushButton, QProgressBar, QLabel, QTextEdit, QPlainTextEdit,
     QCheckBox, QComboBox, QFrame, QScrollArea, QSizePolicy,
-    QStyle, QStyleFactory
+    QStyle, QStyleFactory, QLineEdit, QTableView, QHeaderView,
+    QAbstractItemView, QTreeWidget, QTreeWidgetItem
 )
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPalette, QColor, QFont
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QPalette, QColor, QFont, QTextCursor
 
 # Dark theme colors
 DARK_PALETTE = {
@@ -51,6 +52,10 @@ import sys
 from pathlib import Path
 from datetime import datetime
 import json
+import threading
+import time
+from collections import deque
+from itertools import islice
 
 sys.path.append(str(Path(__file__).parent.parent))
 from modules import (
@@ -65,9 +70,27 @@ from modules import (
     exporter,
     history as history_mod,
     permissions,
-    config as config_mod
+    config as config_mod,
+    retention,
+    uploader,
+    diff as diff_mod,
+    search as search_mod,
+    formatter,
+    scanner,
+    tracing
 )
 
+# Children added per expansion of a node in the scan detail tree
+TREE_PAGE_SIZE = 500
+
+# Results pane: oldest lines are dropped beyond this many; queued output is
+# flushed at most once per frame, inserting at most this many characters
+# (text layout costs roughly 0.5ms per KB) or spending at most this long.
+RESULTS_MAX_BLOCKS = 50000
+RESULTS_FRAME_MS = 16
+RESULTS_FRAME_CHARS = 16 * 1024
+RESULTS_FRAME_BUDGET = 0.008
+
 # Color schemes for light/dark modes
 DARK_COLORS = {
     "bg": "#1e1e1e",
@@ -135,12 +158,19 @@ class ResultsTab(QWidget):
         score_layout.addStretch()
         layout.addWidget(score_frame)
 
-        # Results text area
-        self.results_text = QTextEdit()
+        # Results text area: plain text, append-only, bounded
+        self.results_text = QPlainTextEdit()
         self.results_text.setReadOnly(True)
+        self.results_text.setUndoRedoEnabled(False)
+        self.results_text.setMaximumBlockCount(RESULTS_MAX_BLOCKS)
         self.results_text.setFont(QFont("Consolas", 10))
         layout.addWidget(self.results_text)
 
+        self._pending = deque()
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setInterval(RESULTS_FRAME_MS)
+        self._frame_timer.timeout.connect(self._render_frame)
+
     def update_score(self, score):
         """Update the score meter and status."""
         self.score_bar.setValue(score)
@@ -155,17 +185,92 @@ class ResultsTab(QWidget):
             self.score_bar.setStyleSheet("QProgressBar::chunk { background-color: #f14c4c; }")
 
     def update_results(self, text):
-        """Update the results text area with new scan results."""
+        """Replace the results with `text` (a string or an iterator of chunks)."""
+        self.begin_results()
+        self.append_results(text)
+
+    def begin_results(self):
+        """Clear the pane and drop queued output, then write the scan header."""
+        self._pending.clear()
         self.results_text.clear()
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.results_text.append(f"Scan Time: {timestamp}\n")
-        self.results_text.append("═" * 50 + "\n\n")
-        self.results_text.append(text)
+        self.append_results(f"Scan Time: {timestamp}\n" + "═" * 50 + "\n\n")
+
+    def append_results(self, text):
+        """Queue text, or an iterator of text chunks, for the next frame."""
+        self._pending.append(text)
+        if not self._frame_timer.isActive():
+            self._frame_timer.start()
+
+    def _render_frame(self):
+        # Take queued output until the frame budget is spent, then insert it
+        # at the end of the document in one edit; the rest waits a frame.
+        deadline = time.perf_counter() + RESULTS_FRAME_BUDGET
+        room = RESULTS_FRAME_CHARS
+        parts = []
+        while self._pending and room > 0 and time.perf_counter() < deadline:
+            head = self._pending[0]
+            if not isinstance(head, str):
+                chunk = next(head, None)
+                if chunk is None:
+                    self._pending.popleft()
+                else:
+                    self._pending.appendleft(chunk)
+                continue
+            if len(head) > room:
+                parts.append(head[:room])
+                self._pending[0] = head[room:]
+                room = 0
+            else:
+                parts.append(self._pending.popleft())
+                room -= len(head)
+        if parts:
+            cursor = QTextCursor(self.results_text.document())
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText("".join(parts))
+        if not self._pending:
+            self._frame_timer.stop()
+
+
+class TimingsTab(QWidget):
+    """Where the last scan spent its time: one row per check, command and probe."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        self.summary = QLabel("No scan yet")
+        layout.addWidget(self.summary)
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(list(tracing.BREAKDOWN_COLUMNS))
+        self.tree.setColumnWidth(0, 320)
+        layout.addWidget(self.tree)
+
+    def show_scan(self, summary):
+        """Fill the tree from a payload's `scan` section."""
+        self.tree.clear()
+        trace = summary.get("trace") or []
+        commands = summary.get("commands") or {}
+        self.summary.setText(f"Elapsed {summary.get('elapsed', 0):.2f}s of {summary.get('deadline', 0):g}s; "
+                             f"{commands.get('count', 0)} commands ({commands.get('cached', 0)} cached)")
+        parents = []
+        for depth, span in tracing.breakdown(trace):
+            row = tracing.breakdown_row(0, span)
+            del parents[depth:]
+            item = QTreeWidgetItem(parents[-1] if parents else self.tree, [str(v) for v in row])
+            for col in range(1, len(row)):
+                item.setTextAlignment(col, Qt.AlignRight | Qt.AlignVCenter)
+            parents.append(item)
+        self.tree.expandAll()
+
 
 class RemediationTab(QWidget):
     """Tab for viewing and applying security fixes."""
+    # Rescored payload after fixes were verified
+    verified = pyqtSignal(object)
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        # Payload of the last scan shown; fixes are verified against it
+        self.last_scan_data = None
         self.setup_ui()
 
     def setup_ui(self):
@@ -193,11 +298,21 @@ class RemediationTab(QWidget):
         scroll.setWidget(fixes_widget)
         layout.addWidget(scroll)
 
-        # Apply button
+        # Preview and apply buttons
+        buttons = QHBoxLayout()
+        self.preview_btn = QPushButton("Preview Plan")
+        self.preview_btn.setFont(QFont("Segoe UI", 10))
+        self.preview_btn.clicked.connect(lambda: self.apply_fixes(dry_run=True))
+        buttons.addWidget(self.preview_btn)
         self.apply_btn = QPushButton("Apply Selected Fixes")
         self.apply_btn.setFont(QFont("Segoe UI", 10))
         self.apply_btn.clicked.connect(self.apply_fixes)
-        layout.addWidget(self.apply_btn)
+        buttons.addWidget(self.apply_btn)
+        layout.addLayout(buttons)
+
+        self.worker = RemediationWorker()
+        self.worker.step_changed.connect(self.on_step_changed)
+        self.worker.finished.connect(self.on_plan_finished)
 
         # Log area
         self.log_text = QTextEdit()
@@ -205,29 +320,196 @@ class RemediationTab(QWidget):
         self.log_text.setFont(QFont("Consolas", 10))
         layout.addWidget(self.log_text)
 
-    def apply_fixes(self):
-        """Apply selected remediation actions."""
+    def apply_fixes(self, dry_run=False):
+        """Plan the selected fixes; unless dry_run, apply the ones still needed in the background."""
         selected = [fid for fid, cb in self.fix_checkboxes.items() if cb.isChecked()]
         if not selected:
             self.log_text.append("No fixes selected.\n")
             return
 
-        self.log_text.append(f"Applying fixes: {', '.join(selected)}\n")
-        for fid in selected:
-            try:
-                res = remediation.apply_fix(fid)
-                self.log_text.append(f"{fid}: {res}\n")
-            except PermissionError as e:
-                self.log_text.append(f"{fid}: Permission denied - {e}\n")
-        
+        self.log_text.append(f"{'Planning' if dry_run else 'Applying'} fixes: {', '.join(selected)}\n")
+        self.apply_btn.setEnabled(False)
+        self.preview_btn.setEnabled(False)
+        self.worker.start(selected, dry_run, self.latest_scan)
+
+    def latest_scan(self):
+        """The scan shown last, else the newest one in history (None if there is none)."""
+        if self.last_scan_data is not None:
+            return self.last_scan_data
+        path = history_mod.latest_scan()
+        return history_mod.load_scan(path) if path else None
+
+    def on_step_changed(self, fix_id, status, result):
+        line = f"{fix_id}: {status}"
+        if status in ("done", "failed") and result is not None:
+            line += f" {result}"
+        self.log_text.append(line)
+
+    def on_plan_finished(self, outcome, dry_run):
+        self.apply_btn.setEnabled(True)
+        self.preview_btn.setEnabled(True)
+        if isinstance(outcome, Exception):
+            self.log_text.append(f"Remediation failed: {outcome}\n")
+            return
+        fix_plan, verification = outcome
+        if dry_run:
+            self.log_text.append("".join(fix_plan.describe()))
+        else:
+            done = sum(1 for step in fix_plan.steps if step.status == "done")
+            self.log_text.append(f"{done} of {len(fix_plan.steps)} fixes applied\n")
+            self.log_text.append("".join(remediation.format_verification(verification)))
+            self.last_scan_data = verification["payload"]
+            self.verified.emit(verification["payload"])
+
         # Ensure newest log entries are visible
         sb = self.log_text.verticalScrollBar()
         sb.setValue(sb.maximum())
 
+
+class RemediationWorker(QObject):
+    """Plans and applies fixes on a worker thread; signals reach the GUI thread queued."""
+    step_changed = pyqtSignal(str, str, object)   # fix id, status, result
+    finished = pyqtSignal(object, bool)
+
+    def start(self, fix_ids, dry_run=False, previous=None):
+        """Emits finished((plan, verification) or the exception, dry_run).
+
+        Unless dry_run, the checks the applied fixes affect are re-run and
+        scored against `previous()`, the last scan payload.
+        """
+        # Steps keep changing on the worker thread, so send a snapshot of each update.
+        def progress(step):
+            self.step_changed.emit(step.fix.id, step.status, step.result)
+
+        def worker():
+            try:
+                fix_plan = remediation.remediate(fix_ids, dry_run=dry_run, progress=progress)
+                verification = None if dry_run else remediation.verify(fix_plan, previous() if previous else None)
+                result = (fix_plan, verification)
+            except Exception as e:
+                result = e
+            self.finished.emit(result, dry_run)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+class ScanTableModel(QAbstractTableModel):
+    """Paged, sortable, filterable table over the history metadata index.
+
+    Rows come from `history.list_metadata()` so no scan payload is parsed to
+    fill the table; rows are handed to the view a page at a time through
+    canFetchMore/fetchMore.
+    """
+    COLUMNS = ("time", "type", "score", "band")
+    PAGE_SIZE = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._all = []
+        self._rows = []
+        self._loaded = 0
+        self._filter = ""
+        self.query_error = None
+        self._sort = ("file", Qt.DescendingOrder)
+
+    def reload(self):
+        self._all = history_mod.list_metadata()
+        self._apply()
+
+    def set_filter(self, text):
+        self._filter = text.strip()
+        self._apply()
+
+    def _apply(self):
+        self.beginResetModel()
+        rows = self._all
+        self.query_error = None
+        if search_mod.is_query(self._filter):
+            # Field queries (e.g. user:guest) go through the search index
+            try:
+                hits = {d["file"] for d in search_mod.search(self._filter)}
+            except search_mod.QueryError as e:
+                self.query_error = str(e)
+                hits = set()
+            rows = [r for r in rows if r["file"] in hits]
+        elif self._filter:
+            needle = self._filter.lower()
+            rows = [
+                r for r in rows
+                if needle in " ".join(str(r.get(c, "")) for c in self.COLUMNS).lower()
+            ]
+        col, order = self._sort
+
+        def sort_key(rec):
+            value = rec.get(col)
+            if col == "score":
+                return (value is None, value or 0)
+            return (value is None, str(value or ""))
+
+        self._rows = sorted(rows, key=sort_key, reverse=order == Qt.DescendingOrder)
+        self._loaded = min(self.PAGE_SIZE, len(self._rows))
+        self.endResetModel()
+
+    def record(self, row):
+        return self._rows[row]
+
+    def previous_of(self, name):
+        """Return the file name of the scan of the same host saved just before `name`, if any."""
+        return history_mod.previous_scan(name, self._all)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        value = self._rows[index.row()].get(self.COLUMNS[index.column()])
+        return "" if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section].title()
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(self.PAGE_SIZE, len(self._rows) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._sort = (self.COLUMNS[column], order)
+        self._apply()
+
+
+class ScanLoader(QObject):
+    """Loads scan payloads on a worker thread and signals the GUI thread."""
+    loaded = pyqtSignal(str, object)
+
+    def load(self, label, func):
+        def worker():
+            try:
+                result = func()
+            except Exception as e:
+                result = e
+            self.loaded.emit(label, result)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+
 class HistoryTab(QWidget):
     """Tab for viewing past scan results."""
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.loader = ScanLoader()
+        self.loader.loaded.connect(self.on_scan_loaded)
         self.setup_ui()
 
     def setup_ui(self):
@@ -238,64 +520,144 @@ class HistoryTab(QWidget):
         header.setFont(QFont("Segoe UI", 12))
         layout.addWidget(header)
 
-        # Scan selector
-        self.scan_combo = QComboBox()
-        self.scan_combo.addItems([p.name for p in history_mod.list_scans()])
-        layout.addWidget(self.scan_combo)
-
-        load_btn = QPushButton("Load Selected Scan")
-        load_btn.clicked.connect(self.load_selected_scan)
-        layout.addWidget(load_btn)
-
-        # History viewer
+        # Filter and actions
+        controls = QHBoxLayout()
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter text, or a query such as user:guest AND av:\"not detected\"")
+        self.filter_edit.textChanged.connect(self.apply_filter)
+        controls.addWidget(self.filter_edit)
+
+        diff_btn = QPushButton("Compare With Previous")
+        diff_btn.clicked.connect(self.diff_selected_scan)
+        controls.addWidget(diff_btn)
+        layout.addLayout(controls)
+
+        # Scan table (paged model, metadata only)
+        self.model = ScanTableModel(self)
+        self.model.reload()
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.DescendingOrder)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.selectionModel().currentRowChanged.connect(self.load_selected_scan)
+        layout.addWidget(self.table)
+
+        # Selected scan as a tree; nodes are filled in when first expanded
+        self.detail_tree = QTreeWidget()
+        self.detail_tree.setHeaderLabels(["Field", "Value"])
+        self.detail_tree.setColumnWidth(0, 300)
+        self.detail_tree.itemExpanded.connect(self.on_detail_expanded)
+        self.detail_tree.itemClicked.connect(self.on_detail_clicked)
+        self.detail_nodes = {}
+        self.detail_more = {}
+        layout.addWidget(self.detail_tree, 2)
+
+        # Messages and diffs
         self.history_text = QTextEdit()
         self.history_text.setReadOnly(True)
         self.history_text.setFont(QFont("Consolas", 10))
-        layout.addWidget(self.history_text)
-
-    def load_selected_scan(self):
-        """Load and display the selected scan's data."""
-        scan_name = self.scan_combo.currentText()
+        layout.addWidget(self.history_text, 1)
+
+    def refresh(self):
+        """Re-read the metadata index after a new scan was saved."""
+        self.model.reload()
+
+    def apply_filter(self, text):
+        """Filter the list; an invalid query is reported in the status bar."""
+        self.model.set_filter(text)
+        window = self.window()
+        if self.model.query_error and hasattr(window, "update_status"):
+            window.update_status(f"Invalid query: {self.model.query_error}", 5000)
+
+    def selected_name(self):
+        index = self.table.currentIndex()
+        if not index.isValid():
+            return None
+        return self.model.record(index.row())["file"]
+
+    def load_selected_scan(self, *args):
+        """Load the selected scan's payload in the background."""
+        scan_name = self.selected_name()
         if not scan_name:
             self.history_text.setText("No scan selected.")
             return
+        path = history_mod.HISTORY_DIR / scan_name
+        if not path.exists():
+            self.history_text.setText("Selected scan not found.")
+            return
+        self.history_text.setText(f"Loading {scan_name}...")
+        self.loader.load("scan", lambda: history_mod.load_scan(path))
 
-        for p in history_mod.list_scans():
-            if p.name == scan_name:
-                data = history_mod.load_scan(p)
-                self.history_text.clear()
-                self.format_and_display_data(data)
-                return
-        
-        self.history_text.setText("Selected scan not found.")
-
-    def format_and_display_data(self, data):
-        """Format and display scan data in the text area."""
-        def format_dict(d, indent=0):
-            text = []
-            for k, v in d.items():
-                if isinstance(v, dict):
-                    text.append("  " * indent + f"{k}:")
-                    text.append(format_dict(v, indent + 1))
-                elif isinstance(v, list):
-                    text.append("  " * indent + f"{k}:")
-                    for item in v:
-                        if isinstance(item, dict):
-                            text.append(format_dict(item, indent + 1))
-                        else:
-                            text.append("  " * (indent + 1) + f"- {item}")
-                else:
-                    text.append("  " * indent + f"{k}: {v}")
-            return "\n".join(text)
+    def diff_selected_scan(self):
+        """Show what changed between the selected scan and the one before it."""
+        scan_name = self.selected_name()
+        if not scan_name:
+            self.history_text.setText("No scan selected.")
+            return
+        previous = self.model.previous_of(scan_name)
+        if not previous:
+            self.history_text.setText("No earlier scan of this host to compare with.")
+            return
+        old_path = history_mod.HISTORY_DIR / previous
+        new_path = history_mod.HISTORY_DIR / scan_name
+        self.history_text.setText("Comparing...")
+        self.loader.load(
+            f"diff:{previous}",
+            lambda: diff_mod.diff_scans(history_mod.load_scan(old_path), history_mod.load_scan(new_path)),
+        )
 
-        formatted = format_dict(data)
-        self.history_text.setText(formatted)
+    def on_scan_loaded(self, label, result):
+        if isinstance(result, Exception):
+            self.history_text.setText(f"Could not load scan: {result}")
+        elif label.startswith("diff:"):
+            self.history_text.setText(
+                f"Changes since {label[5:]}:\n\n" + diff_mod.to_markdown(result)
+            )
+        else:
+            self.history_text.clear()
+            self.show_scan_tree(result)
+
+    def show_scan_tree(self, data):
+        self.detail_tree.clear()
+        self.detail_nodes.clear()
+        self.detail_more.clear()
+        self.insert_detail_children(self.detail_tree.invisibleRootItem(), data, 0)
+
+    def insert_detail_children(self, parent, value, start):
+        """Add one page of a node's children; expandable ones get filled in later."""
+        for label, child in islice(formatter.iter_children(value, start), TREE_PAGE_SIZE):
+            item = QTreeWidgetItem(parent, [label, formatter.describe(child)])
+            if formatter.is_expandable(child):
+                item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+                self.detail_nodes[id(item)] = child
+        remaining = len(value) - start - TREE_PAGE_SIZE
+        if remaining > 0:
+            item = QTreeWidgetItem(parent, [f"… {remaining} more (click to load)", ""])
+            self.detail_more[id(item)] = (parent, value, start + TREE_PAGE_SIZE)
+
+    def on_detail_expanded(self, item):
+        value = self.detail_nodes.pop(id(item), None)
+        if value is not None:
+            self.insert_detail_children(item, value, 0)
+
+    def on_detail_clicked(self, item, column):
+        more = self.detail_more.pop(id(item), None)
+        if more is not None:
+            parent = more[0]
+            parent.removeChild(item)
+            self.insert_detail_children(*more)
 
 class SettingsTab(QWidget):
     """Tab for application settings."""
     def __init__(self, parent=None):
         super().__init__(parent)
         self.config = config_mod.load_config()
+        self.retention_loader = ScanLoader()
+        self.retention_loader.loaded.connect(self.on_retention_planned)
         self.setup_ui()
 
     def setup_ui(self):
@@ -318,21 +680,46 @@ class SettingsTab(QWidget):
         self.theme_cb.stateChanged.connect(self.toggle_theme)
         layout.addWidget(self.theme_cb)
 
+        # Retention preview
+        self.retention_btn = QPushButton("Preview History Cleanup")
+        self.retention_btn.clicked.connect(self.preview_retention)
+        layout.addWidget(self.retention_btn)
+
         layout.addStretch()
 
     def toggle_offline(self, state):
         """Toggle and save offline mode setting."""
         self.config["offline_mode"] = bool(state)
         config_mod.save_config(self.config)
-        if self.parent():
-            self.parent().parent().update_status(
-                f"Offline Mode: {'ON' if state else 'OFF'}"
-            )
+        self.update_status(f"Offline Mode: {'ON' if state else 'OFF'}")
+
+    def update_status(self, message):
+        # Inside the tab widget the parent is its page stack; the main window is window().
+        window = self.window()
+        if hasattr(window, "update_status"):
+            window.update_status(message)
+
+    def preview_retention(self):
+        """Work out in the background how much space the retention policy would reclaim."""
+        self.retention_btn.setEnabled(False)
+        self.update_status("Planning history cleanup...")
+        # The first plan reads every scan payload; keep it off the GUI thread.
+        self.retention_loader.load("retention", lambda: retention.projected_savings(retention.plan_retention()))
+
+    def on_retention_planned(self, label, savings):
+        self.retention_btn.setEnabled(True)
+        if isinstance(savings, Exception):
+            self.update_status(f"Retention preview failed: {savings}")
+            return
+        files = sum(s["files_deleted"] for s in savings.values())
+        mb = sum(s["bytes_reclaimed"] for s in savings.values()) / (1024 * 1024)
+        self.update_status(f"Retention would remove {files} files ({mb:.1f} MB)")
 
     def toggle_theme(self, state):
         """Toggle application theme."""
-        if self.parent():
-            self.parent().parent().apply_theme(dark=bool(state))
+        window = self.window()
+        if hasattr(window, "apply_theme"):
+            window.apply_theme(dark=bool(state))
 
 class SecurityCheckApp(QMainWindow):
     """Main application window."""
@@ -343,10 +730,21 @@ class SecurityCheckApp(QMainWindow):
         
         # Set the fusion style for better theme support
         QApplication.setStyle(QStyleFactory.create('Fusion'))
+
+        # Scans run on a worker thread; results come back through the loader's signal
+        self.active_scan = None
+        self.scan_loader = ScanLoader()
+        self.scan_loader.loaded.connect(self.on_scan_finished)
         
         self.setup_ui()
         self.apply_theme(dark=True)  # Start with dark theme
 
+        # Background history/export retention (no-op unless enabled in config)
+        self.retention_worker = retention.start_background()
+        # Push scans to a collector (no-op unless an upload URL is configured)
+        self.uploader = uploader.start_background(
+            on_error=lambda message: self.update_status(f"Uploads disabled: {message}"))
+
     def setup_ui(self):
         """Initialize the main UI components."""
         # Central widget and main layout
@@ -357,11 +755,14 @@ class SecurityCheckApp(QMainWindow):
         # Create tab widget and tabs
         self.tabs = QTabWidget()
         self.results_tab = ResultsTab()
+        self.timings_tab = TimingsTab()
         self.remediation_tab = RemediationTab()
+        self.remediation_tab.verified.connect(lambda data: self.results_tab.update_score(data["risk_score"]))
         self.history_tab = HistoryTab()
         self.settings_tab = SettingsTab()
 
         self.tabs.addTab(self.results_tab, "Results")
+        self.tabs.addTab(self.timings_tab, "Timings")
         self.tabs.addTab(self.remediation_tab, "Fix Issues")
         self.tabs.addTab(self.history_tab, "History")
         self.tabs.addTab(self.settings_tab, "Settings")
@@ -390,6 +791,11 @@ class SecurityCheckApp(QMainWindow):
         full_audit_btn.clicked.connect(self.run_full_audit)
         sidebar_layout.addWidget(full_audit_btn)
 
+        self.cancel_scan_btn = QPushButton("⏹ Cancel Scan")
+        self.cancel_scan_btn.setEnabled(False)
+        self.cancel_scan_btn.clicked.connect(self.cancel_scan)
+        sidebar_layout.addWidget(self.cancel_scan_btn)
+
         sidebar_layout.addWidget(QFrame(frameShape=QFrame.HLine))
 
         # Individual checks section
@@ -450,7 +856,7 @@ class SecurityCheckApp(QMainWindow):
                 border-radius: 2px;
                 text-align: center;
             }
-            QTextEdit {
+            QTextEdit, QPlainTextEdit {
                 border: 1px solid;
                 padding: 5px;
             }
@@ -476,49 +882,51 @@ class SecurityCheckApp(QMainWindow):
         """Update status bar with optional timeout."""
         self.statusBar().showMessage(message, timeout)
 
-    def format_dict(self, data, indent=0):
-        """Format dictionary data for display."""
-        text = []
-        for key, value in data.items():
-            if isinstance(value, dict):
-                text.append("  " * indent + f"{key}:")
-                text.extend(self.format_dict(value, indent + 1))
-            elif isinstance(value, list):
-                text.append("  " * indent + f"{key}:")
-                for item in value:
-                    if isinstance(item, dict):
-                        text.extend(self.format_dict(item, indent + 1))
-                    else:
-                        text.append("  " * (indent + 1) + f"- {item}")
-            else:
-                text.append("  " * indent + f"{key}: {value}")
-        return text
-
     # Scan methods
+    def save_to_history(self, data):
+        """Save a scan to history and queue it for upload to the collector."""
+        history_mod.save_scan(data)
+        if self.uploader:
+            self.uploader.submit(data)
+        self.history_tab.refresh()
+
+    def start_scan(self, kind, checks, message):
+        """Run `checks` as a cancellable scan on a worker thread."""
+        if self.active_scan is not None:
+            self.update_status("A scan is already running")
+            return
+        scan = self.active_scan = scanner.Scan(checks)
+        self.cancel_scan_btn.setEnabled(True)
+        self.update_status(f"{message} (up to {scan.deadline:g}s)...")
+        self.scan_loader.load(kind, scan.run)
+
+    def cancel_scan(self):
+        """Stop the running scan; its commands are killed and nothing is saved."""
+        if self.active_scan is not None:
+            self.active_scan.cancel()
+            self.update_status("Cancelling scan...")
+
+    def on_scan_finished(self, kind, results):
+        scan, self.active_scan = self.active_scan, None
+        self.cancel_scan_btn.setEnabled(False)
+        if scan is None or scan.cancelled:
+            self.update_status("Scan cancelled")
+        elif isinstance(results, Exception):
+            self.update_status(f"Scan failed: {results}")
+        elif kind == "quick":
+            self.finish_quick_scan(scan, results)
+        else:
+            self.finish_full_audit(scan, results)
+
     def run_quick_scan(self):
         """Run essential security checks."""
-        self.update_status("Running quick scan...")
-        
-        # OS Check
-        os_name, os_version = os_detect.get_os_info()
-
-        # Firewall Check
-        fw_status = firewall_check.get_status()
-
-        # Antivirus Check
-        av_status = av_check.get_av_status()
+        self.start_scan("quick", scanner.QUICK_SCAN, "Running quick scan")
 
-        # Compile findings
-        quick_findings = {
-            "os": {"name": os_name, "version": os_version},
-            "firewall": fw_status,
-            "antivirus": av_status
-        }
-
-        # Score calculation
-        scorer = risk_score.RiskScorer()
-        mapped = {"firewall": fw_status, "antivirus": av_status}
-        score, deductions = scorer.calculate_score(mapped)
+    def finish_quick_scan(self, scan, results):
+        data = scanner.build_payload(scan, results, quick=True)
+        os_name, os_version = data["os"]["name"], data["os"]["version"]
+        fw_status, av_status = results["firewall"], results["antivirus"]
+        score, deductions = data["risk_score"], data["deductions"]
         band, _ = risk_score.interpret_band(score)
 
         # Update UI
@@ -533,19 +941,18 @@ class SecurityCheckApp(QMainWindow):
                 result_text += f" - {d['reason']}: -{d['points']}\n"
 
         result_text += f"\nRisk Score: {score}/100 ({band})\n"
+        if scan.timed_out:
+            result_text += f"Timed out: {', '.join(scan.timed_out)}\n"
+        if scan.insufficient_privilege:
+            result_text += f"Skipped (insufficient privilege): {', '.join(scan.insufficient_privilege)}\n"
 
         self.results_tab.update_results(result_text)
         self.results_tab.update_score(score)
+        self.timings_tab.show_scan(data["scan"])
+        self.remediation_tab.last_scan_data = data
         
         # Save to history
-        history_mod.save_scan({
-            "timestamp": datetime.now().isoformat(),
-            "type": "quick",
-            "os": {"name": os_name, "version": os_version},
-            "findings": quick_findings,
-            "risk_score": score,
-            "deductions": deductions
-        })
+        self.save_to_history(data)
 
         # Update status
         if score >= 80:
@@ -557,38 +964,11 @@ class SecurityCheckApp(QMainWindow):
 
     def run_full_audit(self):
         """Run comprehensive system audit."""
-        self.update_status("Running full system audit...")
+        self.start_scan("full", scanner.FULL_AUDIT, "Running full system audit")
 
-        # Gather all information
-        os_name, os_version = os_detect.get_os_info()
-        fw_status = firewall_check.get_status()
-        av_status = av_check.get_av_status()
-        disk_status = disk_encryption.get_encryption_status()
-        user_status = user_audit.get_user_accounts()
-        net_info = network_info.get_network_info()
-
-        # Compile data
-        audit_data = {
-            "timestamp": datetime.now().isoformat(),
-            "os": {"name": os_name, "version": os_version},
-            "firewall": fw_status,
-            "antivirus": av_status,
-            "disk_encryption": disk_status,
-            "user_accounts": user_status,
-            "network": net_info
-        }
-
-        # Score calculation
-        scorer = risk_score.RiskScorer()
-        mapped = {
-            "firewall": fw_status,
-            "antivirus": av_status,
-            "disk_encryption": disk_status,
-            "user_accounts": user_status
-        }
-        score, deductions = scorer.calculate_score(mapped)
-        audit_data["risk_score"] = score
-        audit_data["deductions"] = deductions
+    def finish_full_audit(self, scan, results):
+        audit_data = scanner.build_payload(scan, results)
+        score = audit_data["risk_score"]
 
         # Export
         json_file = exporter.export_json(audit_data)
@@ -599,18 +979,23 @@ class SecurityCheckApp(QMainWindow):
         })
 
         # Save to history
-        history_mod.save_scan(audit_data)
+        self.save_to_history(audit_data)
 
         # Update UI
-        result_lines = ["Full System Audit Results\n"]
-        result_lines.extend(self.format_dict(audit_data))
-        result_lines.append(f"\nAudit logs saved to:")
-        result_lines.append(f"- {json_file.name}")
-        result_lines.append(f"- {md_file.name}")
-
-        self.results_tab.update_results("\n".join(result_lines))
+        self.results_tab.begin_results()
+        self.results_tab.append_results("Full System Audit Results\n\n")
+        self.results_tab.append_results(formatter.iter_chunks(audit_data))
+        self.results_tab.append_results(f"\nAudit logs saved to:\n- {json_file.name}\n- {md_file.name}\n")
         self.results_tab.update_score(score)
-        self.update_status("Full audit completed")
+        self.timings_tab.show_scan(audit_data["scan"])
+        self.remediation_tab.last_scan_data = audit_data
+        if scan.timed_out:
+            self.update_status(f"Full audit completed; timed out: {', '.join(scan.timed_out)}")
+        elif scan.insufficient_privilege:
+            self.update_status(f"Full audit completed; skipped (insufficient privilege): "
+                               f"{', '.join(scan.insufficient_privilege)}")
+        else:
+            self.update_status("Full audit completed")
 
     def run_os_check(self):
         self.update_status("Checking OS information...")
@@ -626,7 +1011,7 @@ class SecurityCheckApp(QMainWindow):
         self.update_status("Checking firewall status...")
         fw_status = firewall_check.get_status()
         self.results_tab.update_results(
-            "Firewall Status:\n\n" + "\n".join(self.format_dict(fw_status))
+            "Firewall Status:\n\n" + formatter.format_text(fw_status)
         )
         self.update_status("Ready")
 
@@ -634,7 +1019,7 @@ class SecurityCheckApp(QMainWindow):
         self.update_status("Checking antivirus status...")
         av_status = av_check.get_av_status()
         self.results_tab.update_results(
-            "Antivirus Status:\n\n" + "\n".join(self.format_dict(av_status))
+            "Antivirus Status:\n\n" + formatter.format_text(av_status)
         )
         self.update_status("Ready")
 
@@ -642,7 +1027,7 @@ class SecurityCheckApp(QMainWindow):
         self.update_status("Checking disk encryption...")
         disk_status = disk_encryption.get_encryption_status()
         self.results_tab.update_results(
-            "Disk Encryption Status:\n\n" + "\n".join(self.format_dict(disk_status))
+            "Disk Encryption Status:\n\n" + formatter.format_text(disk_status)
         )
         self.update_status("Ready")
 
@@ -650,7 +1035,7 @@ class SecurityCheckApp(QMainWindow):
         self.update_status("Auditing user accounts...")
         user_status = user_audit.get_user_accounts()
         self.results_tab.update_results(
-            "User Account Audit:\n\n" + "\n".join(self.format_dict(user_status))
+            "User Account Audit:\n\n" + formatter.format_text(user_status)
         )
         self.update_status("Ready")
 
@@ -658,7 +1043,7 @@ class SecurityCheckApp(QMainWindow):
         self.update_status("Gathering network information...")
         net_info = network_info.get_network_info()
         self.results_tab.update_results(
-            "Network Information:\n\n" + "\n".join(self.format_dict(net_info))
+            "Network Information:\n\n" + formatter.format_text(net_info)
         )
         self.update_status("Ready")
 
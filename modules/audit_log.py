@@ -0,0 +1,244 @@
+"""Structured audit log for remediation and scans, written off the calling thread.
+
+Every event is one JSON line in `logs/audit.jsonl`:
+
+    {"ts": "2026-10-19T07:09:25.114", "level": "INFO", "source": "remediation",
+     "event": "command_result", "thread": "fix_0", "cmd": ["ufw", "enable"], ...}
+
+`event()` only puts the record on a bounded queue; a `QueueListener`
+thread formats and writes it. When the queue is full the record is dropped
+and counted (`stats()`), so logging never blocks a fix or a check.
+
+String fields longer than `max_field_chars` are cut, and the entry keeps
+the full value's SHA-256 and size (`stdout_sha256`, `stdout_bytes`,
+`stdout_truncated`). The file rolls over when it reaches `max_bytes` or
+`rotate_seconds` after its first entry, whichever comes first. Rotated
+files are gzipped (`audit.jsonl.1.gz`, ...) and only `backups` of them are
+kept, so the log never takes more than about `max_bytes * (backups + 1)`
+on disk. Settings come from "audit_log" in config.json.
+
+Set `NEXUM_LOG_DIR` to write the log somewhere other than `logs/`.
+"""
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, Optional
+import atexit
+import copy
+import gzip
+import hashlib
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+
+from . import config as config_mod, serializer
+
+# Created by `start()`, so importing this module never touches the disk.
+LOG_DIR = Path(os.environ.get("NEXUM_LOG_DIR") or Path(__file__).parent.parent / "logs")
+AUDIT_LOG = LOG_DIR / "audit.jsonl"
+
+# How long `stop()` waits for room in a full queue for the stop marker.
+STOP_TIMEOUT = 5.0
+
+DEFAULT_SETTINGS = {
+    "max_bytes": 10 * 1024 * 1024,
+    "backups": 5,
+    "rotate_seconds": 86400,      # 0 disables time-based rotation
+    "compress": True,
+    "max_field_chars": 8192,
+    "queue_size": 10000,
+}
+
+# Parent of every audit logger; `event(source, ...)` logs to "nexum.<source>".
+ROOT_LOGGER = "nexum"
+
+
+def load_settings() -> Dict:
+    cfg = config_mod.load_config()
+    return {**DEFAULT_SETTINGS, **(cfg.get("audit_log") or {})}
+
+
+def _truncate(fields: Dict[str, Any], limit: int) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for key, value in fields.items():
+        if isinstance(value, str) and len(value) > limit:
+            raw = value.encode("utf-8", "surrogateescape")
+            out[key] = value[:limit]
+            out[f"{key}_sha256"] = hashlib.sha256(raw).hexdigest()
+            out[f"{key}_bytes"] = len(raw)
+            out[f"{key}_truncated"] = True
+        else:
+            out[key] = value
+    return out
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per record: time, level, source, event and the record's fields."""
+
+    def __init__(self, max_field_chars: int = DEFAULT_SETTINGS["max_field_chars"]):
+        super().__init__()
+        self.max_field_chars = max_field_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        # The size check before a rollover formats the record too; do the work once.
+        line = getattr(record, "audit_line", None)
+        if line is not None:
+            return line
+        source = record.name[len(ROOT_LOGGER) + 1:] if record.name.startswith(ROOT_LOGGER + ".") else record.name
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "source": source,
+            "event": record.getMessage(),
+            "thread": record.threadName,
+        }
+        entry.update(_truncate(getattr(record, "fields", None) or {}, self.max_field_chars))
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        record.audit_line = line = serializer.dumps(entry).decode("utf-8")
+        return line
+
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as src, gzip.open(dest, "wb", 6) as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def _first_entry_time(path: Path) -> Optional[float]:
+    try:
+        with open(path, "rb") as f:
+            line = f.readline()
+        return datetime.fromisoformat(serializer.loads(line)["ts"]).timestamp()
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+class AuditFileHandler(RotatingFileHandler):
+    """Size- and time-based rotation, with optional gzip of the rotated files."""
+
+    def __init__(self, path: Path, max_bytes: int, backups: int, rotate_seconds: float, compress: bool):
+        super().__init__(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+        self.rotate_seconds = rotate_seconds
+        if compress:
+            self.namer = lambda name: name + ".gz"
+            self.rotator = _gzip_rotator
+        # Short-lived processes (CLI runs) append to the same file, so its age counts from its first entry.
+        self.rollover_at = self._next_rollover(_first_entry_time(Path(path)) or time.time())
+
+    def _next_rollover(self, since: float) -> float:
+        return since + self.rotate_seconds if self.rotate_seconds > 0 else float("inf")
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if time.time() >= self.rollover_at:
+            if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+                return True
+            self.rollover_at = self._next_rollover(time.time())
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = self._next_rollover(time.time())
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records to the writer thread; drops them when the queue is full."""
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting (JSON, hashing) is left to the writer thread; only the
+        # traceback has to be rendered while it still exists.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AuditQueueListener(QueueListener):
+    """Queue listener whose stop marker waits for room instead of failing on a full queue."""
+
+    def enqueue_sentinel(self):
+        # The writer keeps draining, so room appears unless it is stuck.
+        self.queue.put(self._sentinel, timeout=STOP_TIMEOUT)
+
+
+_lock = threading.Lock()
+_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def start(path: Path = None, settings: Dict = None) -> DroppingQueueHandler:
+    """Start the writer thread (once per process); later calls return the running handler."""
+    global _handler, _listener
+    with _lock:
+        if _handler is not None:
+            return _handler
+        settings = {**DEFAULT_SETTINGS, **(settings if settings is not None else load_settings())}
+        Path(path or AUDIT_LOG).parent.mkdir(parents=True, exist_ok=True)
+        file_handler = AuditFileHandler(path or AUDIT_LOG, settings["max_bytes"], settings["backups"],
+                                        settings["rotate_seconds"], settings["compress"])
+        file_handler.setFormatter(JsonLineFormatter(settings["max_field_chars"]))
+        q: queue.Queue = queue.Queue(maxsize=settings["queue_size"])
+        _listener = AuditQueueListener(q, file_handler)
+        _listener.start()
+        _handler = DroppingQueueHandler(q)
+        logger = logging.getLogger(ROOT_LOGGER)
+        logger.addHandler(_handler)
+        logger.setLevel(logging.INFO)
+        # The audit log is the sink; keep full command output out of the root logger's handlers.
+        logger.propagate = False
+        return _handler
+
+
+def stop():
+    """Write out everything queued and stop the writer thread."""
+    global _handler, _listener
+    with _lock:
+        if _handler is None:
+            return
+        logging.getLogger(ROOT_LOGGER).removeHandler(_handler)
+        try:
+            _listener.stop()
+        except queue.Full:
+            # The writer made no progress for STOP_TIMEOUT; give up on what is still queued.
+            pass
+        else:
+            for handler in _listener.handlers:
+                handler.close()
+        _handler = _listener = None
+
+
+atexit.register(stop)
+
+
+def event(source: str, name: str, level: int = logging.INFO, exc_info: bool = False, **fields):
+    """Queue one audit entry; `fields` become top-level keys of the JSON line."""
+    if _handler is None:
+        start()
+    logging.getLogger(f"{ROOT_LOGGER}.{source}").log(level, name, exc_info=exc_info, extra={"fields": fields})
+
+
+def stats() -> Dict:
+    """Where the log goes, records waiting to be written and records dropped."""
+    handler, listener = _handler, _listener
+    return {
+        "path": listener.handlers[0].baseFilename if listener is not None else str(AUDIT_LOG),
+        "running": handler is not None,
+        "queued": handler.queue.qsize() if handler is not None else 0,
+        "dropped": handler.dropped if handler is not None else 0,
+    }
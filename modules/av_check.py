@@ -1,17 +1,17 @@
-import platform
-import subprocess
 import json
 
+from . import runner
+
 def get_av_status():
     """Check antivirus status based on the operating system."""
-    system = platform.system().lower()
+    system = runner.system()
     
     if system == "windows":
         try:
             # Using PowerShell to get Windows Defender status
             cmd = ["powershell", "-Command", 
                   "Get-MpComputerStatus | Select-Object RealTimeProtectionEnabled, AntivirusEnabled | ConvertTo-Json"]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = runner.run(cmd)
             if result.returncode == 0:
                 status = json.loads(result.stdout)
                 return {
@@ -27,7 +27,7 @@ def get_av_status():
         av_list = ["clamav", "sophos-av", "comodo"]
         for av in av_list:
             try:
-                result = subprocess.run(["which", av], capture_output=True, text=True)
+                result = runner.run(["which", av])
                 if result.returncode == 0:
                     return {"name": av, "status": "installed"}
             except Exception:
@@ -37,11 +37,7 @@ def get_av_status():
     elif system == "darwin":  # macOS
         try:
             # Check XProtect status
-            result = subprocess.run(
-                ["defaults", "read", "/Library/Preferences/com.apple.security", "XProtectEnabled"],
-                capture_output=True,
-                text=True
-            )
+            result = runner.run(["defaults", "read", "/Library/Preferences/com.apple.security", "XProtectEnabled"])
             return {
                 "name": "XProtect",
                 "status": "active" if result.stdout.strip() == "1" else "inactive"
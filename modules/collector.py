@@ -0,0 +1,266 @@
+"""Local collector service for scans submitted by agents.
+
+Agents POST scan payloads to `/v1/scans` (one scan object, or a JSON list
+of scans for a batched upload), optionally with `Content-Encoding: gzip`.
+Request bodies are queued still compressed and only decoded by the writer
+thread, which drains the queue in batches into the history store with one
+index append and one rollup/search update per batch (`history.save_scans`).
+Scans that arrive without a score are scored with `RiskScorer`.
+
+Each request is answered once its scans are on disk, with the saved file
+names as acknowledgement ids. The ingest queue is bounded: when it is full
+the collector answers 503 with `Retry-After` instead of buffering without
+limit, so agents back off rather than the collector running out of memory.
+
+A body that cannot be decoded or scored is answered 400 and the rest of its
+batch is still stored; a storage failure is answered 500 so agents retry.
+
+    collector = Collector(port=8765)
+    collector.serve_forever()
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+import gzip
+import logging
+import queue
+import threading
+import zlib
+
+from . import audit_log, history, serializer
+from .risk_score import RiskScorer
+
+DEFAULT_PORT = 8765
+SUBMIT_PATH = "/v1/scans"
+HEALTH_PATH = "/v1/health"
+
+MAX_BODY = 16 * 1024 * 1024
+RETRY_AFTER = 1
+
+
+class Submission:
+    """One request body waiting in the ingest queue."""
+    __slots__ = ("body", "encoding", "host", "done", "files", "error", "status")
+
+    def __init__(self, body: bytes, encoding: str = "", host: str = ""):
+        self.body = body
+        self.encoding = encoding
+        self.host = host
+        self.done = threading.Event()
+        self.files: List[str] = []
+        self.error: Optional[str] = None
+        self.status = 400               # reply status when `error` is set
+
+    def decode(self) -> List[Dict]:
+        body = self.body
+        if self.encoding == "gzip":
+            body = gzip.decompress(body)
+        elif self.encoding == "deflate":
+            body = zlib.decompress(body)
+        elif self.encoding not in ("", "identity"):
+            raise ValueError(f"Unsupported Content-Encoding: {self.encoding}")
+        payload = serializer.loads(body)
+        scans = payload if isinstance(payload, list) else [payload]
+        if not all(isinstance(s, dict) for s in scans):
+            raise ValueError("Expected a scan object or a list of scan objects")
+        return scans
+
+
+def ensure_score(data: Dict, scorer: RiskScorer) -> Dict:
+    """Fill in `risk_score` and `deductions` when the agent did not send them."""
+    if not isinstance(data.get("risk_score"), (int, float)):
+        findings = data.get("findings") if isinstance(data.get("findings"), dict) else data
+        score, deductions = scorer.calculate_score(findings)
+        data["risk_score"] = score
+        data.setdefault("deductions", deductions)
+    return data
+
+
+def scan_host(data: Dict, fallback: str = "") -> str:
+    findings = data.get("findings") if isinstance(data.get("findings"), dict) else data
+    return (findings.get("network") or {}).get("hostname") or fallback or "unknown"
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so agents can reuse connections
+    server_version = "NexumCollector/1.0"
+    # Headers and body go out as separate writes; with Nagle on, every reply
+    # would stall on the client's delayed ACK (~40ms).
+    disable_nagle_algorithm = True
+
+    def _reply(self, status: int, body: Dict, headers: Dict = None):
+        data = serializer.dumps(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, str(v))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != HEALTH_PATH:
+            self._reply(404, {"error": "not found"})
+            return
+        self._reply(200, self.server.collector.stats())
+
+    def do_POST(self):
+        collector = self.server.collector
+        if self.path != SUBMIT_PATH:
+            self._reply(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self._reply(411, {"error": "Content-Length required"})
+            return
+        if length > collector.max_body:
+            self.close_connection = True
+            self._reply(413, {"error": "body too large"})
+            return
+        body = self.rfile.read(length)
+
+        sub = Submission(body, self.headers.get("Content-Encoding", "").strip().lower(),
+                         self.headers.get("X-Nexum-Host", ""))
+        if not collector.offer(sub):
+            self._reply(503, {"error": "ingest queue full"}, {"Retry-After": RETRY_AFTER})
+            return
+        if not sub.done.wait(collector.ack_timeout):
+            # Still queued; it will be stored, but the agent cannot be told where.
+            self._reply(202, {"queued": True})
+            return
+        if sub.error:
+            self._reply(sub.status, {"error": sub.error})
+            return
+        self._reply(200, {"accepted": len(sub.files), "ids": sub.files})
+
+    def log_message(self, format, *args):
+        # One line per request would dominate the cost at thousands of requests/s.
+        pass
+
+
+class CollectorServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # listen backlog; the default of 5 resets bursts of agents
+
+
+class Collector:
+    """HTTP ingest server plus the batch writer that feeds `history`."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                 queue_size: int = 1024, batch_size: int = 256,
+                 flush_interval: float = 0.05, ack_timeout: float = 30.0,
+                 max_body: int = MAX_BODY):
+        self.queue: "queue.Queue[Submission]" = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.ack_timeout = ack_timeout
+        self.max_body = max_body
+        self.scorer = RiskScorer()
+        self.counters = {"received": 0, "stored": 0, "rejected": 0, "invalid": 0, "batches": 0}
+        self._count_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, name="collector-writer", daemon=True)
+        self.httpd = CollectorServer((host, port), CollectorHandler)
+        self.httpd.collector = self
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def offer(self, sub: Submission) -> bool:
+        """Queue a submission; False means the queue is full (backpressure)."""
+        if self._stop.is_set():
+            return False
+        try:
+            self.queue.put_nowait(sub)
+        except queue.Full:
+            self._count("rejected")
+            return False
+        self._count("received")
+        return True
+
+    def _count(self, name: str, n: int = 1):
+        with self._count_lock:
+            self.counters[name] += n
+
+    def stats(self) -> Dict:
+        return {**self.counters, "queued": self.queue.qsize(), "capacity": self.queue.maxsize}
+
+    def _drain(self) -> List[Submission]:
+        try:
+            first = self.queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        subs = [first]
+        while len(subs) < self.batch_size:
+            try:
+                subs.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return subs
+
+    def _store(self, subs: List[Submission]):
+        batch, hosts, owners = [], [], []
+        for sub in subs:
+            # A body that cannot be decoded or scored (e.g. a section that is
+            # not an object) is rejected on its own; the rest of the batch is stored.
+            try:
+                scans = [ensure_score(data, self.scorer) for data in sub.decode()]
+                scan_hosts = [scan_host(data, sub.host) for data in scans]
+            except Exception as e:
+                sub.error = f"invalid scan: {e or e.__class__.__name__}"
+                self._count("invalid")
+                continue
+            batch.extend(scans)
+            hosts.extend(scan_hosts)
+            owners.extend([sub] * len(scans))
+        if batch:
+            try:
+                paths = history.save_scans(batch, hosts)
+            except Exception as e:
+                for sub in set(owners):
+                    sub.error, sub.status = f"storage failed: {e}", 500
+            else:
+                for sub, path in zip(owners, paths):
+                    sub.files.append(path.name)
+                self._count("stored", len(paths))
+                self._count("batches")
+        for sub in subs:
+            sub.done.set()
+
+    def _write_loop(self):
+        while not self._stop.is_set() or not self.queue.empty():
+            subs = self._drain()
+            if not subs:
+                continue
+            try:
+                self._store(subs)
+            except Exception as e:
+                # Keep the writer alive: a dead writer would leave every later request unstored.
+                audit_log.event("collector", "store_failed", logging.ERROR, exc_info=True, submissions=len(subs))
+                for sub in subs:
+                    if not sub.done.is_set():
+                        sub.error, sub.status = f"storage failed: {e}", 500
+                        sub.done.set()
+
+    def start(self) -> "Collector":
+        """Serve on a background thread; returns self."""
+        self._writer.start()
+        threading.Thread(target=self.httpd.serve_forever, name="collector-http", daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        self._writer.start()
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stop accepting requests and flush whatever is still queued."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._stop.set()
+        if self._writer.is_alive():
+            self._writer.join()
+
@@ -1,6 +1,7 @@
 """Simple configuration storage for toggles like Offline Mode."""
 from pathlib import Path
-import json
+
+from . import serializer
 
 CONFIG_FILE = Path(__file__).parent.parent / "config.json"
 
@@ -11,14 +12,12 @@ DEFAULTS = {"offline_mode": False}
 def load_config() -> dict:
     if CONFIG_FILE.exists():
         try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return {**DEFAULTS, **data}
+            data = serializer.load(CONFIG_FILE)
+            return {**DEFAULTS, **data}
         except Exception:
             return DEFAULTS.copy()
     return DEFAULTS.copy()
 
 
 def save_config(cfg: dict):
-    with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-        json.dump(cfg, f, indent=2)
+    serializer.dump(cfg, CONFIG_FILE, pretty=True)
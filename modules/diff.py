@@ -0,0 +1,166 @@
+"""Structural diff between scan payloads.
+
+Every subtree of a payload is hashed once (`HashedTree`). Diffing two trees
+compares hashes top-down and only descends into sections whose hashes differ,
+so identical sections are skipped without being walked. Lists of records are
+matched by a natural key (interfaces by `name`, users by `username`, ...)
+instead of by position, so a new user does not show up as every later user
+having "changed".
+
+The result is a flat list of `Change` records which can be rendered with
+`to_json` or `to_markdown`.
+"""
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
+import json
+
+# Field used to identify items in a list of dicts, tried in order.
+LIST_KEYS = ("name", "username", "reason", "addr")
+
+# Keys that differ on every scan and carry no posture information.
+DEFAULT_IGNORE = ("timestamp", "scan")  # "scan": deadline, timings and trace
+
+
+@dataclass
+class Change:
+    op: str  # "added", "removed" or "changed"
+    path: str
+    old: Any = None
+    new: Any = None
+
+
+class HashedTree:
+    """A payload node with its subtree hash and hashed children.
+
+    Children are keyed by dict key, or by the item key for keyed lists, or by
+    index for plain lists.
+    """
+    __slots__ = ("value", "digest", "children", "kind")
+
+    def __init__(self, value: Any, ignore: Tuple[str, ...] = DEFAULT_IGNORE):
+        self.value = value
+        self.children: Optional[Dict[Any, "HashedTree"]] = None
+        if isinstance(value, dict):
+            self.kind = "dict"
+            self.children = {
+                k: HashedTree(v, ignore) for k, v in value.items() if k not in ignore
+            }
+        elif isinstance(value, list):
+            key = _list_key(value)
+            if key:
+                self.kind = "keyed"
+                self.children = {item[key]: HashedTree(item, ignore) for item in value}
+            else:
+                self.kind = "list"
+                self.children = {i: HashedTree(v, ignore) for i, v in enumerate(value)}
+        else:
+            self.kind = "leaf"
+
+        h = hashlib.blake2b(self.kind.encode(), digest_size=16)
+        if self.children is None:
+            # repr keeps types apart ("1" vs 1) without a JSON round-trip
+            h.update(repr(value).encode("utf-8"))
+        else:
+            items = self.children.items()
+            if self.kind != "list":
+                items = sorted(items, key=lambda kv: str(kv[0]))
+            for k, child in items:
+                h.update(str(k).encode("utf-8"))
+                h.update(b"\0")
+                h.update(child.digest)
+        self.digest = h.digest()
+
+
+def _list_key(items: List) -> Optional[str]:
+    if not items or not all(isinstance(i, dict) for i in items):
+        return None
+    for key in LIST_KEYS:
+        values = [i.get(key) for i in items]
+        if all(v is not None for v in values) and len(set(map(str, values))) == len(values):
+            return key
+    return None
+
+
+def _join(path: str, key: Any, kind: str) -> str:
+    if kind == "dict":
+        return f"{path}.{key}" if path else str(key)
+    return f"{path}[{key}]"
+
+
+def _walk(old: HashedTree, new: HashedTree, path: str) -> Iterator[Change]:
+    if old.digest == new.digest:
+        return
+    if old.kind != new.kind or old.children is None:
+        yield Change("changed", path or "$", old.value, new.value)
+        return
+    for key, child in old.children.items():
+        sub = _join(path, key, old.kind)
+        other = new.children.get(key)
+        if other is None:
+            yield Change("removed", sub, old=child.value)
+        else:
+            yield from _walk(child, other, sub)
+    for key, child in new.children.items():
+        if key not in old.children:
+            yield Change("added", _join(path, key, new.kind), new=child.value)
+
+
+def diff_trees(old: HashedTree, new: HashedTree) -> List[Change]:
+    return list(_walk(old, new, ""))
+
+
+def diff_scans(old: Dict, new: Dict, ignore: Tuple[str, ...] = DEFAULT_IGNORE) -> List[Change]:
+    """Return the changes needed to turn `old` into `new`."""
+    return diff_trees(HashedTree(old, ignore), HashedTree(new, ignore))
+
+
+class HistoryDiffer:
+    """Diff one payload against many history entries.
+
+    The reference payload is hashed once and each history file is hashed at
+    most once per (path, mtime), so repeated comparisons only pay for the
+    sections that actually differ.
+    """
+
+    def __init__(self, ignore: Tuple[str, ...] = DEFAULT_IGNORE):
+        self.ignore = ignore
+        self._cache: Dict[Path, Tuple[float, HashedTree]] = {}
+
+    def tree_for(self, path: Path) -> HashedTree:
+        mtime = path.stat().st_mtime
+        cached = self._cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, "r", encoding="utf-8") as f:
+            tree = HashedTree(json.load(f), self.ignore)
+        self._cache[path] = (mtime, tree)
+        return tree
+
+    def compare(self, data: Dict, paths: Iterable[Path]) -> Iterator[Tuple[Path, List[Change]]]:
+        ref = HashedTree(data, self.ignore)
+        for p in paths:
+            yield p, diff_trees(self.tree_for(p), ref)
+
+
+def to_json(changes: List[Change], indent: int = None) -> str:
+    return json.dumps([asdict(c) for c in changes], indent=indent, default=str)
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, default=str)
+    text = str(value).replace("|", "\\|").replace("\n", " ")
+    return text if len(text) <= 80 else text[:77] + "..."
+
+
+def to_markdown(changes: List[Change]) -> str:
+    if not changes:
+        return "No changes.\n"
+    lines = ["| Change | Path | Old | New |", "|---|---|---|---|"]
+    for c in changes:
+        lines.append(f"| {c.op} | `{c.path}` | {_cell(c.old)} | {_cell(c.new)} |")
+    return "\n".join(lines) + "\n"
@@ -1,52 +1,59 @@
-import platform
-import subprocess
-import os
+from typing import Dict
+
+from . import runner
+
+
+def parse_manage_bde(text: str) -> Dict:
+    """Classify `manage-bde -status` output."""
+    if "Protection On" in text:
+        return {"status": "encrypted", "type": "BitLocker"}
+    elif "Protection Off" in text:
+        return {"status": "not encrypted", "type": "BitLocker available"}
+    return {"status": "unknown", "type": "BitLocker not available"}
+
+
+def parse_lsblk(text: str) -> Dict:
+    """Classify `lsblk -f` output."""
+    if "crypto_LUKS" in text:
+        return {"status": "encrypted", "type": "LUKS"}
+    return {"status": "not encrypted", "type": "No LUKS detected"}
+
+
+def parse_fdesetup(text: str) -> Dict:
+    """Classify `fdesetup status` output."""
+    if "FileVault is On" in text:
+        return {"status": "encrypted", "type": "FileVault"}
+    elif "FileVault is Off" in text:
+        return {"status": "not encrypted", "type": "FileVault available"}
+    return {"status": "unknown", "type": "FileVault status unknown"}
+
 
 def get_encryption_status():
     """Check disk encryption status based on the operating system."""
-    system = platform.system().lower()
-    
+    system = runner.system()
+
     if system == "windows":
         try:
             # Check BitLocker status using manage-bde
-            cmd = ["manage-bde", "-status"]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if "Protection On" in result.stdout:
-                return {"status": "encrypted", "type": "BitLocker"}
-            elif "Protection Off" in result.stdout:
-                return {"status": "not encrypted", "type": "BitLocker available"}
-            else:
-                return {"status": "unknown", "type": "BitLocker not available"}
+            result = runner.run(["manage-bde", "-status"])
+            return parse_manage_bde(result.stdout)
         except Exception as e:
             return {"status": "error", "message": str(e)}
-            
+
     elif system == "linux":
         try:
             # Check LUKS encryption
-            cmd = ["lsblk", "-f"]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if "crypto_LUKS" in result.stdout:
-                return {"status": "encrypted", "type": "LUKS"}
-            else:
-                return {"status": "not encrypted", "type": "No LUKS detected"}
+            result = runner.run(["lsblk", "-f"])
+            return parse_lsblk(result.stdout)
         except Exception as e:
             return {"status": "error", "message": str(e)}
-            
+
     elif system == "darwin":  # macOS
         try:
             # Check FileVault status
-            cmd = ["fdesetup", "status"]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if "FileVault is On" in result.stdout:
-                return {"status": "encrypted", "type": "FileVault"}
-            elif "FileVault is Off" in result.stdout:
-                return {"status": "not encrypted", "type": "FileVault available"}
-            else:
-                return {"status": "unknown", "type": "FileVault status unknown"}
+            result = runner.run(["fdesetup", "status"])
+            return parse_fdesetup(result.stdout)
         except Exception as e:
             return {"status": "error", "message": str(e)}
-    
-    return {"status": "unknown", "error": "Unsupported operating system"}
\ No newline at end of file
+
+    return {"status": "unknown", "error": "Unsupported operating system"}
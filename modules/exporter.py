@@ -1,50 +1,301 @@
 """Export utilities for NEXUM-CHECKPOINT
 
-Exports data to JSON and Markdown. Keeps exports in an `exports/` directory
-by default.
+Exports data to JSON, NDJSON, CSV and Markdown. Keeps exports in an
+`exports/` directory by default.
+
+Every format is a `Writer` that streams its output chunk by chunk, so memory
+use does not grow with the size of the rendered document. Output goes to a
+temporary file that is renamed into place when complete (optionally gzip or
+zstd compressed), and an existing export is never overwritten: a second
+export in the same second gets a numbered suffix.
 """
+import csv
+import gzip
+import io
 import json
+import os
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+from . import serializer
+from .models import HostResult
+
+try:
+    import zstandard
+    HAVE_ZSTD = True
+except ImportError:
+    HAVE_ZSTD = False
 
 
 BASE_DIR = Path(__file__).parent.parent
 EXPORTS_DIR = BASE_DIR / "exports"
 EXPORTS_DIR.mkdir(exist_ok=True)
 
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
 
-def export_json(data: Dict[str, Any], filename: str = None) -> Path:
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = filename or f"audit_{ts}.json"
-    path = EXPORTS_DIR / filename
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, default=str)
-    return path
 
+def _findings(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the findings part of an export payload (either shape)."""
+    findings = data.get("findings")
+    return findings if isinstance(findings, dict) else data
 
-def export_markdown(data: Dict[str, Any], filename: str = None) -> Path:
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = filename or f"audit_{ts}.md"
-    path = EXPORTS_DIR / filename
-
-    # Basic markdown representation
-    with open(path, "w", encoding="utf-8") as f:
-        f.write("# NEXUM-CHECKPOINT Audit\n\n")
-        f.write(f"Export Date: {datetime.now().isoformat()}\n\n")
-        # If data contains timestamp and os info, include
+
+def iter_finding_records(data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Yield one flat record per finding.
+
+    Each check section becomes one record; lists of items inside a section
+    (users, interfaces) produce one record per item instead.
+    """
+    for check, section in _findings(data).items():
+        if not isinstance(section, dict):
+            continue
+        scalars = {k: v for k, v in section.items() if not isinstance(v, (dict, list))}
+        nested = {k: v for k, v in section.items() if isinstance(v, list)}
+        yield {"check": check, **scalars}
+        for key, items in nested.items():
+            for item in items:
+                if isinstance(item, dict):
+                    yield {"check": check, "collection": key, **item}
+                else:
+                    yield {"check": check, "collection": key, "value": item}
+
+
+class Writer:
+    """Base class for streaming export writers."""
+    extension = ""
+
+    def write(self, data: Dict[str, Any], out: TextIO):
+        raise NotImplementedError
+
+
+class JSONWriter(Writer):
+    extension = ".json"
+
+    def write(self, data, out):
+        if not isinstance(data, dict) or not data:
+            out.write(serializer.dumps(data, pretty=True).decode("utf-8"))
+            return
+        # Encode one top-level section at a time so memory is bounded by the
+        # largest section, not the whole document. JSON strings never contain
+        # raw newlines, so re-indenting by replacing "\n" is safe.
+        out.write("{")
+        for i, (key, value) in enumerate(data.items()):
+            out.write(",\n  " if i else "\n  ")
+            out.write(serializer.dumps(str(key)).decode("utf-8"))
+            out.write(": ")
+            out.write(serializer.dumps(value, pretty=True).decode("utf-8").replace("\n", "\n  "))
+        out.write("\n}")
+
+
+class NDJSONWriter(Writer):
+    """One JSON object per line, one line per finding."""
+    extension = ".ndjson"
+
+    def write(self, data, out):
+        for record in iter_finding_records(data):
+            out.write(serializer.dumps(record).decode("utf-8"))
+            out.write("\n")
+
+
+class CSVWriter(Writer):
+    """One row per risk deduction and one row per user account."""
+    extension = ".csv"
+    columns = ("kind", "name", "points", "uid", "enabled", "home", "shell")
+
+    def write(self, data, out):
+        writer = csv.DictWriter(out, fieldnames=self.columns, extrasaction="ignore")
+        writer.writeheader()
+        for d in data.get("deductions") or _findings(data).get("deductions") or []:
+            writer.writerow({"kind": "deduction", "name": d.get("reason"), "points": d.get("points")})
+        accounts = (_findings(data).get("user_accounts") or {}).get("users") or []
+        for u in accounts:
+            # Fixed columns last, so a record's own "kind" or "name" key cannot replace them.
+            writer.writerow({**u, "kind": "account", "name": u.get("username")})
+
+
+def _md_cell(value: Any) -> str:
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, default=str)
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+
+class MarkdownWriter(Writer):
+    extension = ".md"
+
+    def _table(self, out: TextIO, rows, columns):
+        out.write("| " + " | ".join(c.title() for c in columns) + " |\n")
+        out.write("|" + "---|" * len(columns) + "\n")
+        for row in rows:
+            out.write("| " + " | ".join(_md_cell(row.get(c, "")) for c in columns) + " |\n")
+        out.write("\n")
+
+    def write(self, data, out):
+        out.write("# NEXUM-CHECKPOINT Audit\n\n")
+        out.write(f"Export Date: {datetime.now().isoformat()}\n\n")
         osinfo = data.get("os")
         if osinfo:
-            f.write("## System Information\n")
-            f.write(f"- OS: {osinfo.get('name', '')} {osinfo.get('version', '')}\n\n")
+            out.write("## System Information\n")
+            out.write(f"- OS: {osinfo.get('name', '')} {osinfo.get('version', '')}\n\n")
 
-        # Score if present
         if "risk_score" in data:
-            f.write(f"## Risk Score: {data.get('risk_score')}\n\n")
+            out.write(f"## Risk Score: {data.get('risk_score')}\n\n")
+
+        deductions = data.get("deductions") or _findings(data).get("deductions")
+        if deductions:
+            out.write("## Deductions\n\n")
+            self._table(out, deductions, ("reason", "points"))
+
+        out.write("## Findings\n\n")
+        for check, section in _findings(data).items():
+            if not isinstance(section, dict) or check == "os":
+                continue
+            out.write(f"### {check.replace('_', ' ').title()}\n\n")
+            scalars = [{"field": k, "value": v} for k, v in section.items() if not isinstance(v, list)]
+            if scalars:
+                self._table(out, scalars, ("field", "value"))
+            for key, items in section.items():
+                if not isinstance(items, list) or not items:
+                    continue
+                out.write(f"#### {key.replace('_', ' ').title()}\n\n")
+                if all(isinstance(i, dict) for i in items):
+                    columns = []
+                    for item in items:
+                        columns.extend(c for c in item if c not in columns)
+                    self._table(out, items, columns)
+                else:
+                    self._table(out, [{"value": i} for i in items], ("value",))
+
+
+WRITERS: Dict[str, Writer] = {
+    "json": JSONWriter(),
+    "ndjson": NDJSONWriter(),
+    "csv": CSVWriter(),
+    "markdown": MarkdownWriter(),
+}
+
+
+def register_writer(name: str, writer: Writer):
+    """Make an additional export format available to `export`."""
+    WRITERS[name] = writer
+
+
+# Export names: `export` writes audit_<ts>, os_detect audit_log_<ts>, quick scans quick_<ts>.
+EXPORT_PREFIXES = ("audit_", "quick_")
+
+
+def export_suffix(name: str) -> str:
+    """The writer extension plus compression suffix `name` ends with ("" if none)."""
+    return max((w.extension + c for w in WRITERS.values() for c in COMPRESSION_SUFFIXES.values()
+                if name.endswith(w.extension + c)), key=len, default="")
+
+
+def is_export_name(name: str) -> bool:
+    """Whether `name` is a file the exporter writes (not a cache, temp or foreign file)."""
+    if name.startswith(".") or not name.startswith(EXPORT_PREFIXES):
+        return False
+    return bool(export_suffix(name))
+
+
+def _open_compressed(path: Path, compression: Optional[str]):
+    if compression is None:
+        return open(path, "w", encoding="utf-8", newline="")
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    if compression == "zstd":
+        if not HAVE_ZSTD:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        raw = open(path, "wb")
+        stream = zstandard.ZstdCompressor().stream_writer(raw)
+        return io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def _publish(tmp: Path, path: Path) -> Path:
+    """Move a finished temp file to `path`, or a numbered sibling if taken."""
+    # "audit_x.json.gz" numbers as "audit_x_001.json.gz"; other names just get the number,
+    # so dots inside a name ("audit_web1.example.com") are not taken for a suffix.
+    suffix = export_suffix(path.name)
+    stem = path.name[:-len(suffix)] if suffix else path.name
+    n = 0
+    while True:
+        try:
+            # link() fails if the target exists, so concurrent exports never
+            # overwrite each other.
+            os.link(tmp, path)
+            tmp.unlink()
+            return path
+        except FileExistsError:
+            n += 1
+            path = path.with_name(f"{stem}_{n:03d}{suffix}")
+        except OSError:
+            # Filesystem without hard links: fall back to a checked rename.
+            if path.exists():
+                n += 1
+                path = path.with_name(f"{stem}_{n:03d}{suffix}")
+                continue
+            os.replace(tmp, path)
+            return path
+
+
+class AtomicWriter:
+    """Context manager yielding a text stream that appears at `path` only when complete.
+
+    After the block exits, `self.path` holds the final name, which may carry
+    a numbered suffix if the requested name was already taken.
+    """
+
+    def __init__(self, path: Path, compression: Optional[str] = None):
+        self.path = path
+        self.compression = compression
+        self._tmp = path.with_name(f".{path.name}.{os.getpid()}.{id(self)}.tmp")
+        self._stream = None
+
+    def __enter__(self) -> TextIO:
+        self._stream = _open_compressed(self._tmp, self.compression)
+        return self._stream
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._stream.close()
+            if exc_type is None:
+                self.path = _publish(self._tmp, self.path)
+        finally:
+            # Gone already once published; otherwise the write, the close or the publish failed.
+            self._tmp.unlink(missing_ok=True)
+        return False
+
+
+def export(data: Dict[str, Any], fmt: str = "json", filename: str = None,
+           compression: Optional[str] = None, directory: Path = None) -> Path:
+    """Stream `data` (a dict or `models.HostResult`) to a file and return its path."""
+    if isinstance(data, HostResult):
+        data = data.to_dict()
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression: {compression}")
+    writer = WRITERS[fmt]
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = filename or f"audit_{ts}{writer.extension}"
+    path = (directory or EXPORTS_DIR) / (filename + COMPRESSION_SUFFIXES[compression])
+    target = AtomicWriter(path, compression)
+    with target as out:
+        writer.write(data, out)
+    return target.path
+
+
+def export_json(data: Dict[str, Any], filename: str = None, compression: Optional[str] = None) -> Path:
+    return export(data, "json", filename, compression)
+
+
+def export_markdown(data: Dict[str, Any], filename: str = None, compression: Optional[str] = None) -> Path:
+    return export(data, "markdown", filename, compression)
+
+
+def export_ndjson(data: Dict[str, Any], filename: str = None, compression: Optional[str] = None) -> Path:
+    return export(data, "ndjson", filename, compression)
 
-        f.write("## Findings\n")
-        f.write("```")
-        f.write(json.dumps(data.get("findings", data), indent=2, default=str))
-        f.write("\n```\n")
 
-    return path
+def export_csv(data: Dict[str, Any], filename: str = None, compression: Optional[str] = None) -> Path:
+    return export(data, "csv", filename, compression)
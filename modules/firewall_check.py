@@ -1,18 +1,24 @@
-import platform
-import subprocess
+import re
+
+from . import runner
+
+_UFW_STATUS = re.compile(r"^status:\s*(active|inactive)\b", re.I | re.M)
+
+
+def parse_ufw_status(text: str) -> str:
+    """"active", "inactive" or "unknown" (e.g. ufw's not-root error) from `ufw status`."""
+    match = _UFW_STATUS.search(text)
+    return match.group(1).lower() if match else "unknown"
+
 
 def get_status():
     """Check firewall status based on the operating system."""
-    system = platform.system().lower()
+    system = runner.system()
     
     if system == "windows":
         try:
             # Check Windows Defender Firewall status
-            result = subprocess.run(
-                ["netsh", "advfirewall", "show", "allprofiles"], 
-                capture_output=True, 
-                text=True
-            )
+            result = runner.run(["netsh", "advfirewall", "show", "allprofiles"])
             return {"status": "active" if "ON" in result.stdout else "inactive"}
         except Exception as e:
             return {"status": "unknown", "error": str(e)}
@@ -20,23 +26,18 @@ def get_status():
     elif system == "linux":
         try:
             # Check UFW status on Linux
-            result = subprocess.run(
-                ["ufw", "status"], 
-                capture_output=True, 
-                text=True
-            )
-            return {"status": "active" if "active" in result.stdout.lower() else "inactive"}
+            result = runner.run(["ufw", "status"])
+            status = parse_ufw_status(result.stdout)
+            if status == "unknown":
+                return {"status": status, "error": (result.stderr or result.stdout).strip() or "Unrecognized ufw output"}
+            return {"status": status}
         except Exception as e:
             return {"status": "unknown", "error": str(e)}
             
     elif system == "darwin":  # macOS
         try:
             # Check macOS firewall status
-            result = subprocess.run(
-                ["defaults", "read", "/Library/Preferences/com.apple.alf", "globalstate"],
-                capture_output=True,
-                text=True
-            )
+            result = runner.run(["defaults", "read", "/Library/Preferences/com.apple.alf", "globalstate"])
             return {"status": "active" if result.stdout.strip() != "0" else "inactive"}
         except Exception as e:
             return {"status": "unknown", "error": str(e)}
@@ -0,0 +1,227 @@
+"""Fleet aggregation over exported audit files.
+
+Ingests a directory of `audit_*.json` exports (one or more per host) into a
+columnar `FleetTable`: one list per column, one row per export, with the
+score and deductions recomputed by `RiskScorer`. `latest_per_host()` keeps
+each host's newest export, which is what fleet-wide counts should use. Parsing runs in a process
+pool, and the table is cached next to the exports together with a manifest
+of file sizes and mtimes, so a re-load only parses files that are new or
+changed.
+
+Example queries::
+
+    table = fleet.load("share/exports").latest_per_host()
+    table.hosts(table.select(firewall="inactive", disk_encryption="not encrypted"))
+    table.value_counts("antivirus_product")
+"""
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import os
+
+from . import serializer
+from .report import find_exports, load_export
+from .models import Encryption, Protection
+from .risk_score import RiskScorer, interpret_band
+
+CACHE_NAME = ".fleet_cache.bin"
+CACHE_VERSION = 2
+
+COLUMNS = (
+    "source", "host", "timestamp", "os_name", "os_version",
+    "firewall", "antivirus", "antivirus_product", "disk_encryption", "disk_type",
+    "users", "interfaces", "score", "band", "deductions",
+)
+
+
+def normalize(source: str, data: Dict) -> Tuple:
+    """Flatten one export payload into a row tuple ordered like COLUMNS."""
+    findings = data.get("findings") if isinstance(data.get("findings"), dict) else data
+    fw = findings.get("firewall") or {}
+    av = findings.get("antivirus") or {}
+    disk = findings.get("disk_encryption") or {}
+    users = findings.get("user_accounts") or {}
+    network = findings.get("network") or {}
+    osinfo = findings.get("os") or data.get("os") or {}
+    score, deductions = RiskScorer().calculate_score(findings)
+    return (
+        source,
+        network.get("hostname") or source.split(".")[0],
+        str(findings.get("timestamp") or data.get("timestamp") or ""),
+        osinfo.get("name", ""),
+        osinfo.get("version", ""),
+        # One vocabulary per column, whichever OS the export came from
+        Protection.parse(fw.get("status")).value,
+        Protection.parse(av.get("status")).value,
+        av.get("name", ""),
+        Encryption.parse(disk.get("status")).value,
+        disk.get("type", ""),
+        len(users.get("users") or []),
+        len(network.get("interfaces") or []),
+        score,
+        interpret_band(score)[0],
+        tuple(d["reason"] for d in deductions),
+    )
+
+
+def _parse_chunk(paths: List[Path]) -> List[Optional[Tuple]]:
+    """Process-pool worker: parse and normalize a chunk of exports."""
+    rows = []
+    for p in paths:
+        try:
+            rows.append(normalize(p.name, load_export(p)))
+        except Exception:
+            rows.append(None)
+    return rows
+
+
+class FleetTable:
+    """Column-oriented table of normalized audit exports."""
+
+    def __init__(self, columns: Dict[str, List] = None):
+        self.columns: Dict[str, List] = columns or {c: [] for c in COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.columns["source"])
+
+    @classmethod
+    def from_rows(cls, rows: List[Tuple]) -> "FleetTable":
+        if not rows:
+            return cls()
+        return cls({c: list(values) for c, values in zip(COLUMNS, zip(*rows))})
+
+    def rows(self) -> List[Tuple]:
+        return list(zip(*(self.columns[c] for c in COLUMNS)))
+
+    def row(self, i: int) -> Dict[str, Any]:
+        return {c: self.columns[c][i] for c in COLUMNS}
+
+    def select(self, **conditions: Any) -> List[int]:
+        """Return row indices where every column matches.
+
+        A condition is either a value (compared case-insensitively for
+        strings) or a callable predicate, e.g. `score=lambda s: s < 50`.
+        """
+        candidates = range(len(self))
+        for column, want in conditions.items():
+            if column not in self.columns:
+                raise KeyError(f"Unknown column: {column}")
+            values = self.columns[column]
+            if callable(want):
+                candidates = [i for i in candidates if want(values[i])]
+            elif isinstance(want, str):
+                want = want.lower()
+                candidates = [i for i in candidates if str(values[i]).lower() == want]
+            else:
+                candidates = [i for i in candidates if values[i] == want]
+        return list(candidates)
+
+    def latest_per_host(self) -> "FleetTable":
+        """A table with only the newest export of each host (by timestamp, then file name)."""
+        latest: Dict[str, int] = {}
+        host, ts, source = self.columns["host"], self.columns["timestamp"], self.columns["source"]
+        for i in range(len(self)):
+            j = latest.get(host[i])
+            if j is None or (ts[i], source[i]) > (ts[j], source[j]):
+                latest[host[i]] = i
+        keep = sorted(latest.values())
+        return FleetTable({c: [values[i] for i in keep] for c, values in self.columns.items()})
+
+    def with_deduction(self, reason: str) -> List[int]:
+        return [i for i, ds in enumerate(self.columns["deductions"]) if reason in ds]
+
+    def hosts(self, indices: List[int]) -> List[str]:
+        """Distinct hosts of the rows, in row order."""
+        host = self.columns["host"]
+        return list(dict.fromkeys(host[i] for i in indices))
+
+    def value_counts(self, column: str, indices: List[int] = None) -> List[Tuple[Any, int]]:
+        values = self.columns[column]
+        if indices is not None:
+            values = [values[i] for i in indices]
+        if column == "deductions":
+            return Counter(r for ds in values for r in ds).most_common()
+        return Counter(values).most_common()
+
+
+def _manifest(paths: List[Path]) -> Dict[str, List[int]]:
+    out = {}
+    for p in paths:
+        st = p.stat()
+        out[p.name] = [st.st_mtime_ns, st.st_size]
+    return out
+
+
+def _read_cache(cache: Path) -> Optional[Dict]:
+    try:
+        blob = serializer.loads_binary(cache.read_bytes())
+    except Exception:
+        return None
+    if blob.get("version") != CACHE_VERSION:
+        return None
+    return blob
+
+
+def _write_cache(cache: Path, manifest: Dict, table: FleetTable):
+    blob = {"version": CACHE_VERSION, "manifest": manifest, "columns": table.columns}
+    tmp = cache.with_suffix(".tmp")
+    tmp.write_bytes(serializer.dumps_binary(blob))
+    tmp.replace(cache)
+
+
+def parse_all(paths: List[Path], workers: int = None) -> List[Optional[Tuple]]:
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < 256:
+        return _parse_chunk(paths)
+    size = max(64, len(paths) // (workers * 8))
+    chunks = [paths[i:i + size] for i in range(0, len(paths), size)]
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(_parse_chunk, chunks):
+            rows.extend(part)
+    return rows
+
+
+def load(directory: Path, workers: int = None, use_cache: bool = True) -> FleetTable:
+    """Load the fleet table for a directory, parsing only new or changed files."""
+    directory = Path(directory)
+    cache = directory / CACHE_NAME
+    paths = find_exports(directory)
+    manifest = _manifest(paths)
+
+    cached_rows: Dict[str, Tuple] = {}
+    if use_cache:
+        blob = _read_cache(cache)
+        if blob is not None:
+            if blob["manifest"] == manifest:
+                return FleetTable(blob["columns"])
+            old = blob["manifest"]
+            for row in FleetTable(blob["columns"]).rows():
+                if old.get(row[0]) == manifest.get(row[0]):
+                    cached_rows[row[0]] = row
+
+    todo = [p for p in paths if p.name not in cached_rows]
+    for row in parse_all(todo, workers):
+        if row is not None:
+            cached_rows[row[0]] = row
+
+    table = FleetTable.from_rows([cached_rows[p.name] for p in paths if p.name in cached_rows])
+    if use_cache:
+        _write_cache(cache, manifest, table)
+    return table
+
+
+def parse_condition(text: str) -> Tuple[str, Any]:
+    """Parse a CLI condition such as `firewall=inactive` or `score<50`."""
+    for op, fn in (("<=", lambda a, b: a <= b), (">=", lambda a, b: a >= b),
+                   ("<", lambda a, b: a < b), (">", lambda a, b: a > b)):
+        if op in text:
+            column, value = text.split(op, 1)
+            limit = float(value)
+            return column.strip(), (lambda v, fn=fn, limit=limit: fn(v, limit))
+    column, sep, value = text.partition("=")
+    if not sep:
+        raise ValueError(f"Expected column=value, got: {text}")
+    return column.strip(), value.strip()
+
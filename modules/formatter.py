@@ -0,0 +1,99 @@
+"""Plain-text and tree rendering of scan payloads for the GUIs.
+
+`iter_lines` walks a payload with an explicit stack and yields one line at a
+time, so rendering is linear in the size of the payload and callers can
+stream the output (`iter_chunks`) instead of building one huge string.
+
+The tree helpers (`describe`, `is_expandable`, `iter_children`) let a tree
+view show one level at a time: a node's children are only produced when it
+is expanded, so even a very large audit shows its top level immediately.
+"""
+from itertools import islice
+from typing import Any, Iterator, List, Tuple
+
+INDENT = "  "
+CHUNK_SIZE = 64 * 1024
+
+# Fields that name a list item better than its index (users, interfaces, ...)
+LABEL_KEYS = ("name", "username", "reason", "addr")
+
+
+def iter_lines(data: Any, indent: int = 0) -> Iterator[str]:
+    """Yield the indented text rendering of `data`, one line (with newline) at a time."""
+    if not isinstance(data, dict):
+        data = {"value": data}
+    # Each stack entry is (iterator over key/value pairs or list items, padding, is_list).
+    # The inner for-loop resumes the top iterator and breaks out to descend.
+    stack = [(iter(data.items()), INDENT * indent, False)]
+    while stack:
+        items, pad, is_list = stack[-1]
+        if is_list:
+            for entry in items:
+                if isinstance(entry, dict):
+                    stack.append((iter(entry.items()), pad, False))
+                    break
+                yield f"{pad}- {entry}\n"
+            else:
+                stack.pop()
+            continue
+        for key, value in items:
+            if isinstance(value, dict):
+                yield f"{pad}{key}:\n"
+                stack.append((iter(value.items()), pad + INDENT, False))
+                break
+            if isinstance(value, list):
+                yield f"{pad}{key}:\n"
+                stack.append((iter(value), pad + INDENT, True))
+                break
+            yield f"{pad}{key}: {value}\n"
+        else:
+            stack.pop()
+
+
+def iter_chunks(data: Any, size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Yield the text rendering in chunks of roughly `size` characters."""
+    buf: List[str] = []
+    length = 0
+    for line in iter_lines(data):
+        buf.append(line)
+        length += len(line)
+        if length >= size:
+            yield "".join(buf)
+            buf, length = [], 0
+    if buf:
+        yield "".join(buf)
+
+
+def format_text(data: Any) -> str:
+    """Return the whole text rendering (fine for small payloads)."""
+    return "".join(iter_lines(data))
+
+
+def is_expandable(value: Any) -> bool:
+    return isinstance(value, (dict, list)) and len(value) > 0
+
+
+def describe(value: Any) -> str:
+    """One-line summary of a node for the tree's value column."""
+    if isinstance(value, dict):
+        return f"{{{len(value)} fields}}"
+    if isinstance(value, list):
+        return f"[{len(value)} items]"
+    return str(value)
+
+
+def _item_label(index: int, item: Any) -> str:
+    if isinstance(item, dict):
+        for key in LABEL_KEYS:
+            if key in item:
+                return f"[{index}] {item[key]}"
+    return f"[{index}]"
+
+
+def iter_children(value: Any, start: int = 0) -> Iterator[Tuple[str, Any]]:
+    """Yield (label, child) pairs of a dict or list node, from position `start`."""
+    if isinstance(value, dict):
+        yield from islice(((str(k), v) for k, v in value.items()), start, None)
+    elif isinstance(value, list):
+        for i in range(start, len(value)):
+            yield _item_label(i, value[i]), value[i]
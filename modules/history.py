@@ -1,19 +1,115 @@
-"""History storage helpers for past scans."""
+"""History storage helpers for past scans.
+
+Besides the scan files themselves, `history/index.jsonl` keeps one line of
+metadata per scan (file, time, type, score, band) so browsers can list and
+sort thousands of scans without parsing any payload.
+
+Scans received from other hosts (`save_scans(hosts=...)`, the collector)
+carry the host in their file name, `scan_<time>_<host>.json`; scans of this
+machine have none (`LOCAL_HOST`). Characters other than letters, digits,
+"." and "-" in a host become "-", and further scans of a host in the same
+second get `~002`, `~003`, ... before `.json`. `scan_host`, `previous_scan` and
+`latest_scan` keep comparisons between scans of the same host.
+
+Set `NEXUM_HISTORY_DIR` to keep the store somewhere other than `history/`
+(e.g. for a collector or a benchmark run).
+"""
 from pathlib import Path
-import json
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional
+import logging
+import os
+import re
+
+from . import serializer
+from .models import HostResult
+from .risk_score import interpret_band
+
+HISTORY_DIR = Path(os.environ.get("NEXUM_HISTORY_DIR") or Path(__file__).parent.parent / "history")
+HISTORY_DIR.mkdir(parents=True, exist_ok=True)
+INDEX_FILE = HISTORY_DIR / "index.jsonl"
+
+LOCAL_HOST = ""   # scans of this machine are saved without a host
+
+_UNSAFE_HOST = re.compile(r"[^A-Za-z0-9.-]")
+# scan_<YYYYmmdd_HHMMSS>[_<host>][~<n>].json; saved hosts never contain "_" or "~".
+_SCAN_NAME = re.compile(r"^scan_\d{8}_\d{6}(?:_(?P<host>[A-Za-z0-9.-]+))?(?:~\d+)?\.json$")
+
+
+def safe_host(host: str) -> str:
+    """`host` as it appears in scan file names (and so in `scan_host`)."""
+    return _UNSAFE_HOST.sub("-", host)
+
 
-HISTORY_DIR = Path(__file__).parent.parent / "history"
-HISTORY_DIR.mkdir(exist_ok=True)
+def scan_host(name: str) -> str:
+    """The host a scan file belongs to, from its name; `LOCAL_HOST` for this machine."""
+    m = _SCAN_NAME.match(name)
+    return (m.group("host") or LOCAL_HOST) if m else LOCAL_HOST
+
+
+def _unique_path(stem: str) -> Path:
+    """Return a scan path that does not overwrite an existing scan."""
+    path = HISTORY_DIR / f"{stem}.json"
+    n = 2
+    while path.exists():
+        path = HISTORY_DIR / f"{stem}~{n:03d}.json"
+        n += 1
+    return path
+
+
+def scan_metadata(path: Path, data: Dict) -> Dict:
+    """Build the index record for a scan payload."""
+    score = data.get("risk_score")
+    band = interpret_band(score)[0] if isinstance(score, (int, float)) else ""
+    return {
+        "file": path.name,
+        "host": scan_host(path.name),
+        "time": str(data.get("timestamp") or datetime.fromtimestamp(path.stat().st_mtime).isoformat()),
+        "type": data.get("type", "full"),
+        "score": score,
+        "band": band,
+    }
 
 
 def save_scan(data: Dict) -> Path:
+    return save_scans([data])[0]
+
+
+def save_scans(batch: List[Dict], hosts: Optional[List[str]] = None) -> List[Path]:
+    """Save several scans with one index append and one rollup/search update.
+
+    `hosts` optionally names the submitting host of each scan; it becomes
+    part of the file name so scans from many agents in the same second do
+    not collide. Typed `models.HostResult` records are saved in dict form.
+    """
+    batch = [d.to_dict() if isinstance(d, HostResult) else d for d in batch]
+    if not INDEX_FILE.exists() and list_scans():
+        # Scans saved before the index existed; appending alone would hide them.
+        rebuild_index()
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    path = HISTORY_DIR / f"scan_{ts}.json"
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, default=str)
-    return path
+    paths = []
+    lines = []
+    for i, data in enumerate(batch):
+        host = hosts[i] if hosts else None
+        stem = f"scan_{ts}_{safe_host(host)}" if host else f"scan_{ts}"
+        path = _unique_path(stem)
+        serializer.dump(data, path, pretty=True)
+        paths.append(path)
+        lines.append(serializer.dumps(scan_metadata(path, data)) + b"\n")
+
+    with open(INDEX_FILE, "ab") as f:
+        f.write(b"".join(lines))
+
+    from . import audit_log, trends, search
+    try:
+        trends.record_scans(batch, [scan_host(p.name) for p in paths])
+    except Exception:
+        # The scans are saved; the rollups are derived data and get rebuilt from them.
+        audit_log.event("history", "rollup_update_failed", logging.ERROR, exc_info=True,
+                        files=[p.name for p in paths])
+        trends.invalidate()
+    search.index_scans(paths, batch)
+    return paths
 
 
 def list_scans() -> List[Path]:
@@ -22,5 +118,95 @@ def list_scans() -> List[Path]:
 
 
 def load_scan(path: Path) -> Dict:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return serializer.load(path)
+
+
+def latest_scan(host: str = LOCAL_HOST) -> Optional[Path]:
+    """The newest scan file of `host` (this machine by default), or None."""
+    return next((p for p in list_scans() if scan_host(p.name) == host), None)
+
+
+def previous_scan(name: str, records: Optional[List[Dict]] = None) -> Optional[str]:
+    """File name of the scan of the same host saved just before `name`, if any.
+
+    `records` are index records newest first (`list_metadata()` by default).
+    """
+    records = records if records is not None else list_metadata()
+    names = [r["file"] for r in records]
+    if name not in names:
+        return None
+    host = scan_host(name)
+    return next((n for n in names[names.index(name) + 1:] if scan_host(n) == host), None)
+
+
+def _write_index(records: List[Dict]):
+    """Atomically replace the index with `records` (oldest first)."""
+    tmp = INDEX_FILE.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        for rec in records:
+            f.write(serializer.dumps(rec) + b"\n")
+    tmp.replace(INDEX_FILE)
+
+
+def rebuild_index() -> List[Dict]:
+    """Recreate `index.jsonl` by reading every scan file once."""
+    records = []
+    for p in sorted(HISTORY_DIR.glob("scan_*.json")):
+        try:
+            records.append(scan_metadata(p, load_scan(p)))
+        except Exception:
+            # Listed anyway, so the index still covers every file on disk.
+            records.append({"file": p.name, "time": datetime.fromtimestamp(p.stat().st_mtime).isoformat(),
+                            "type": "unreadable", "score": None, "band": ""})
+    _write_index(records)
+    return records
+
+
+def _read_index() -> List[Dict]:
+    """The index records as stored (oldest first), without checking them against the disk."""
+    records = []
+    if INDEX_FILE.exists():
+        with open(INDEX_FILE, "rb") as f:
+            for line in f:
+                try:
+                    records.append(serializer.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+
+def list_metadata() -> List[Dict]:
+    """Return index records for all scans, newest first.
+
+    The index is append-only, so file order is save order. It is rebuilt
+    when it is missing or does not list exactly the scan files on disk
+    (histories written before it existed, files copied in or removed by
+    hand).
+    """
+    records = _read_index()
+    if {r.get("file") for r in records} != {p.name for p in HISTORY_DIR.glob("scan_*.json")}:
+        records = rebuild_index()
+    records.reverse()
+    return records
+
+
+def delete_scans(paths: Iterable[Path]) -> int:
+    """Delete scan files and drop them from the index. Returns bytes freed."""
+    names = set()
+    freed = 0
+    for p in paths:
+        try:
+            size = p.stat().st_size
+            p.unlink()
+            freed += size
+        except FileNotFoundError:
+            pass
+        names.add(p.name)
+    if names:
+        from . import search
+        search.forget(names)
+    if names and INDEX_FILE.exists():
+        # Filter the stored records: the files are already gone, so the disk
+        # check in list_metadata() would re-read every remaining scan.
+        _write_index([r for r in _read_index() if r.get("file") not in names])
+    return freed
@@ -0,0 +1,200 @@
+"""Scan metrics in the Prometheus text exposition format.
+
+`Metrics.observe_scan` takes each finished scan payload (from
+`scanner.build_payload`). It updates the gauges, counters and per-check
+duration histograms, then renders the whole exposition once. The text is
+served as-is: a scrape reads one attribute and writes the bytes, so it takes
+no lock and allocates nothing, however often it happens.
+
+Two ways to expose it:
+
+* `MetricsServer(port=9464).start()` serves `GET /metrics` on localhost;
+* `write_textfile(path)` writes a file for node_exporter's textfile
+  collector (`--collector.textfile.directory`), replacing it atomically.
+
+`python nexum_checkpoint.py monitor` scans on an interval and does either
+or both. `scan --metrics-file` suits cron jobs.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+import os
+import tempfile
+import threading
+import time
+
+from . import runner
+
+DEFAULT_PORT = 9464
+METRICS_PATH = "/metrics"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Check durations range from milliseconds to the whole scan deadline.
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count for one label set."""
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * buckets
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float, bounds: Sequence[float]):
+        for i, bound in enumerate(bounds):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Metric state plus its pre-rendered exposition (`body`)."""
+
+    def __init__(self, buckets: Sequence[float] = DURATION_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.score = None
+        self.deductions: Dict[str, float] = {}
+        self.durations: Dict[str, Histogram] = {}
+        self.timed_out: Dict[str, int] = {}
+        self.scans: Dict[str, int] = {}
+        self.last_scan = 0.0
+        self.last_elapsed = 0.0
+        self._lock = threading.Lock()
+        # Replaced whole on each update; readers never see a partial render.
+        self.body: bytes = b""
+        self._render()
+
+    def observe_scan(self, data: Dict):
+        """Record a finished scan payload and re-render the exposition."""
+        summary = data.get("scan") or {}
+        kind = data.get("type", "full")
+        with self._lock:
+            self.score = data.get("risk_score")
+            # Deductions describe the current state: ones that went away are dropped.
+            self.deductions = {}
+            for d in data.get("deductions") or []:
+                reason = d.get("reason", "unknown")
+                self.deductions[reason] = self.deductions.get(reason, 0) + d.get("points", 0)
+            for check, seconds in (summary.get("durations") or {}).items():
+                hist = self.durations.get(check)
+                if hist is None:
+                    hist = self.durations[check] = Histogram(len(self.buckets))
+                hist.observe(seconds, self.buckets)
+            for check in summary.get("timed_out") or []:
+                self.timed_out[check] = self.timed_out.get(check, 0) + 1
+            self.scans[kind] = self.scans.get(kind, 0) + 1
+            self.last_scan = time.time()
+            self.last_elapsed = summary.get("elapsed", 0.0)
+            self._render()
+
+    def _render(self):
+        calls = runner.stats()
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[Tuple[str, float]]):
+            lines.append(f"# HELP {name} {help_text}\n# TYPE {name} {kind}\n")
+            lines.extend(f"{name}{labels} {_number(value)}\n" for labels, value in samples)
+
+        if self.score is not None:
+            metric("nexum_risk_score", "gauge", "Risk score of the last scan (0-100, higher is better).",
+                   [("", self.score)])
+        metric("nexum_deduction_points", "gauge", "Points deducted from the last scan's score, by reason.",
+               [(f'{{reason="{_label(r)}"}}', p) for r, p in sorted(self.deductions.items())])
+
+        lines.append("# HELP nexum_check_duration_seconds Wall time of each check.\n"
+                     "# TYPE nexum_check_duration_seconds histogram\n")
+        for check, hist in sorted(self.durations.items()):
+            check = _label(check)
+            for bound, count in zip(self.buckets, hist.counts):
+                lines.append(f'nexum_check_duration_seconds_bucket{{check="{check}",le="{bound}"}} {count}\n')
+            lines.append(f'nexum_check_duration_seconds_bucket{{check="{check}",le="+Inf"}} {hist.count}\n'
+                         f'nexum_check_duration_seconds_sum{{check="{check}"}} {_number(hist.sum)}\n'
+                         f'nexum_check_duration_seconds_count{{check="{check}"}} {hist.count}\n')
+
+        metric("nexum_check_timed_out_total", "counter", "Checks that ran out of time.",
+               [(f'{{check="{_label(c)}"}}', n) for c, n in sorted(self.timed_out.items())])
+        metric("nexum_scans_total", "counter", "Scans completed, by type.",
+               [(f'{{type="{_label(k)}"}}', n) for k, n in sorted(self.scans.items())])
+        metric("nexum_last_scan_timestamp_seconds", "gauge", "Unix time the last scan finished.",
+               [("", self.last_scan)])
+        metric("nexum_last_scan_duration_seconds", "gauge", "Wall time of the last scan.",
+               [("", self.last_elapsed)])
+        metric("nexum_subprocesses_total", "counter", "External commands started (cache hits excluded).",
+               [("", calls["calls"] - calls["cached"])])
+        metric("nexum_command_failures_total", "counter", "Commands that failed, timed out or were cancelled.",
+               [("", calls["failed"] + calls["timed_out"] + calls["cancelled"])])
+        metric("nexum_command_cache_hit_ratio", "gauge", "Share of command calls answered from the scan cache.",
+               [("", round(calls["cached"] / calls["calls"], 4) if calls["calls"] else 0.0)])
+        self.body = "".join(lines).encode("utf-8")
+
+
+REGISTRY = Metrics()
+
+
+def observe_scan(data: Dict, metrics: Metrics = None):
+    (metrics or REGISTRY).observe_scan(data)
+
+
+def write_textfile(path: Path, metrics: Metrics = None) -> Path:
+    """Write the exposition to `path` atomically (temp file in the same directory, then rename)."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write((metrics or REGISTRY).body)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return path
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "NexumMetrics/1.0"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != METRICS_PATH:
+            self.send_error(404)
+            return
+        body = self.server.metrics.body
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, metrics: Metrics = None):
+        super().__init__((host, port), MetricsHandler)
+        self.metrics = metrics or REGISTRY
+
+    def start(self) -> "MetricsServer":
+        """Serve on a background thread; returns self."""
+        threading.Thread(target=self.serve_forever, name="metrics-http", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,407 @@
+"""Typed result records for scan findings.
+
+The check modules and the on-disk formats (history, exports, the collector)
+keep using plain dicts; `HostResult.from_dict` and `HostResult.to_dict`
+convert at those edges. In between, results are compact `__slots__` records
+whose statuses are enums. Conversion is lossless: each section keeps the
+status string the check reported (`raw_status`, which the risk rules read),
+the key its error came under, and any keys it does not model (`extra`).
+
+Status strings from every check module map onto one vocabulary per kind of
+check. For example, antivirus reports "active"/"inactive" on Windows and
+macOS but "installed"/"not detected" on Linux; both map onto `Protection`.
+
+`SCHEMA_VERSION` is written into `to_dict` output and bumped whenever the
+record layout changes.
+"""
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple
+
+SCHEMA_VERSION = 1
+
+
+class Protection(str, Enum):
+    """Status of a protective service (firewall, antivirus)."""
+    ACTIVE = "active"
+    INACTIVE = "inactive"
+    INSTALLED = "installed"
+    NOT_DETECTED = "not detected"
+    UNKNOWN = "unknown"
+    ERROR = "error"
+    TIMED_OUT = "timed_out"
+    INSUFFICIENT_PRIVILEGE = "insufficient_privilege"
+
+    @classmethod
+    def parse(cls, value: Any) -> "Protection":
+        return _parse(cls, value, _PROTECTION_LOOKUP)
+
+
+class Encryption(str, Enum):
+    ENCRYPTED = "encrypted"
+    NOT_ENCRYPTED = "not encrypted"
+    UNKNOWN = "unknown"
+    ERROR = "error"
+    TIMED_OUT = "timed_out"
+    INSUFFICIENT_PRIVILEGE = "insufficient_privilege"
+
+    @classmethod
+    def parse(cls, value: Any) -> "Encryption":
+        return _parse(cls, value, _ENCRYPTION_LOOKUP)
+
+
+class Outcome(str, Enum):
+    """Whether a collecting check (user accounts) ran."""
+    SUCCESS = "success"
+    UNKNOWN = "unknown"
+    ERROR = "error"
+    TIMED_OUT = "timed_out"
+    INSUFFICIENT_PRIVILEGE = "insufficient_privilege"
+
+    @classmethod
+    def parse(cls, value: Any) -> "Outcome":
+        return _parse(cls, value, _OUTCOME_LOOKUP)
+
+
+_PROTECTION_ALIASES = {
+    "on": Protection.ACTIVE, "enabled": Protection.ACTIVE, "running": Protection.ACTIVE,
+    "off": Protection.INACTIVE, "disabled": Protection.INACTIVE, "stopped": Protection.INACTIVE,
+    "not installed": Protection.NOT_DETECTED, "missing": Protection.NOT_DETECTED,
+    "none": Protection.NOT_DETECTED,
+}
+
+_ENCRYPTION_ALIASES = {
+    "on": Encryption.ENCRYPTED, "true": Encryption.ENCRYPTED,
+    "off": Encryption.NOT_ENCRYPTED, "unencrypted": Encryption.NOT_ENCRYPTED,
+    "false": Encryption.NOT_ENCRYPTED,
+}
+
+
+_PROTECTION_LOOKUP = {**{m.value: m for m in Protection}, **_PROTECTION_ALIASES}
+_ENCRYPTION_LOOKUP = {**{m.value: m for m in Encryption}, **_ENCRYPTION_ALIASES}
+_OUTCOME_LOOKUP = {m.value: m for m in Outcome}
+
+
+def _parse(cls, value, lookup):
+    if value is None:
+        return cls.UNKNOWN
+    # Enum members hash like their values, so members and already-normalized
+    # strings hit the first lookup without any lower-casing.
+    found = lookup.get(value)
+    if found is None:
+        found = lookup.get(str(value).strip().lower(), cls.UNKNOWN)
+    return found
+
+
+def _error(section: Dict, default_key: str = "error") -> Tuple[str, str]:
+    """Return (text, key): checks report failures under either key."""
+    for key in ("error", "message"):
+        if section.get(key):
+            return str(section[key]), key
+    return "", default_key
+
+
+def _raw_status(section: Dict) -> str:
+    status = section.get("status")
+    return status if isinstance(status, str) else ""
+
+
+def _extra(section: Dict, known: Tuple[str, ...], error_key: str) -> Dict[str, Any]:
+    return {k: v for k, v in section.items() if k not in known and k != error_key}
+
+
+def _with_error(out: Dict, record) -> Dict:
+    if record.error:
+        out[record.error_key] = record.error
+    out.update(record.extra)
+    return out
+
+
+@dataclass(slots=True)
+class FirewallResult:
+    status: Protection = Protection.UNKNOWN
+    error: str = ""
+    raw_status: str = ""
+    error_key: str = "error"
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "FirewallResult":
+        error, key = _error(d)
+        return cls(Protection.parse(d.get("status")), error, _raw_status(d), key,
+                   _extra(d, ("status",), key))
+
+    def reported_status(self) -> str:
+        return self.raw_status or self.status.value
+
+    def to_dict(self) -> Dict:
+        return _with_error({"status": self.reported_status()}, self)
+
+
+@dataclass(slots=True)
+class AntivirusResult:
+    status: Protection = Protection.UNKNOWN
+    name: str = ""
+    realtime_protection: Optional[bool] = None
+    error: str = ""
+    raw_status: str = ""
+    error_key: str = "error"
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "AntivirusResult":
+        error, key = _error(d)
+        return cls(Protection.parse(d.get("status")), d.get("name") or "",
+                   d.get("realtime_protection"), error, _raw_status(d), key,
+                   _extra(d, ("status", "name", "realtime_protection"), key))
+
+    def reported_status(self) -> str:
+        return self.raw_status or self.status.value
+
+    def to_dict(self) -> Dict:
+        out = {}
+        if self.name:
+            out["name"] = self.name
+        out["status"] = self.reported_status()
+        if self.realtime_protection is not None:
+            out["realtime_protection"] = self.realtime_protection
+        return _with_error(out, self)
+
+
+@dataclass(slots=True)
+class DiskResult:
+    status: Encryption = Encryption.UNKNOWN
+    type: str = ""
+    error: str = ""
+    raw_status: str = ""
+    error_key: str = "message"
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "DiskResult":
+        error, key = _error(d, "message")
+        return cls(Encryption.parse(d.get("status")), d.get("type") or "", error, _raw_status(d), key,
+                   _extra(d, ("status", "type"), key))
+
+    def reported_status(self) -> str:
+        return self.raw_status or self.status.value
+
+    def to_dict(self) -> Dict:
+        out = {"status": self.reported_status()}
+        if self.type:
+            out["type"] = self.type
+        return _with_error(out, self)
+
+
+@dataclass(slots=True)
+class UserAccount:
+    username: str
+    uid: Optional[int] = None
+    home: str = ""
+    shell: str = ""
+    enabled: bool = True
+    requires_password: Optional[bool] = None
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "UserAccount":
+        return cls(str(d.get("username", "")), d.get("uid"), d.get("home") or "",
+                   d.get("shell") or "", bool(d.get("enabled", True)), d.get("requires_password"))
+
+    def to_dict(self) -> Dict:
+        out = {"username": self.username}
+        if self.uid is not None:
+            out["uid"] = self.uid
+        if self.home:
+            out["home"] = self.home
+        if self.shell:
+            out["shell"] = self.shell
+        out["enabled"] = self.enabled
+        if self.requires_password is not None:
+            out["requires_password"] = self.requires_password
+        return out
+
+
+@dataclass(slots=True)
+class UserAccounts:
+    status: Outcome = Outcome.UNKNOWN
+    users: Tuple[UserAccount, ...] = ()
+    guest_enabled: bool = False
+    error: str = ""
+    raw_status: str = ""
+    error_key: str = "message"
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "UserAccounts":
+        users = tuple(UserAccount.from_dict(u) for u in d.get("users") or () if isinstance(u, dict))
+        error, key = _error(d, "message")
+        return cls(Outcome.parse(d.get("status")), users, bool(d.get("guest_enabled")), error,
+                   _raw_status(d), key, _extra(d, ("status", "users", "guest_enabled"), key))
+
+    def to_dict(self) -> Dict:
+        out = {"status": self.raw_status or self.status.value}
+        if self.status is not Outcome.ERROR or self.users:
+            out["users"] = [u.to_dict() for u in self.users]
+        if self.guest_enabled:
+            out["guest_enabled"] = True
+        return _with_error(out, self)
+
+
+@dataclass(slots=True)
+class Address:
+    family: str
+    addr: str
+
+
+@dataclass(slots=True)
+class NetworkInterface:
+    name: str
+    status: str = ""
+    mac: str = ""
+    addresses: Tuple[Address, ...] = ()
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "NetworkInterface":
+        addresses = tuple(Address(str(a.get("type", "")), str(a.get("addr", "")))
+                          for a in d.get("addresses") or () if isinstance(a, dict))
+        return cls(str(d.get("name", "")), d.get("status") or "", d.get("mac") or "", addresses)
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "status": self.status,
+            "mac": self.mac,
+            "addresses": [{"type": a.family, "addr": a.addr} for a in self.addresses],
+        }
+
+
+@dataclass(slots=True)
+class NetworkInfo:
+    hostname: str = ""
+    fqdn: str = ""
+    interfaces: Tuple[NetworkInterface, ...] = ()
+    status: str = ""   # only set when the check did not complete ("timed_out", "insufficient_privilege")
+    error: str = ""
+    fqdn_source: str = ""   # "hosts", "cache", "dns", "timeout" or "offline"
+    error_key: str = "error"
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "NetworkInfo":
+        interfaces = tuple(NetworkInterface.from_dict(i) for i in d.get("interfaces") or () if isinstance(i, dict))
+        error, key = _error(d)
+        return cls(d.get("hostname") or "", d.get("fqdn") or "", interfaces, d.get("status") or "", error,
+                   d.get("fqdn_source") or "", key,
+                   _extra(d, ("interfaces", "hostname", "fqdn", "status", "fqdn_source"), key))
+
+    def to_dict(self) -> Dict:
+        out = {
+            "interfaces": [i.to_dict() for i in self.interfaces],
+            "hostname": self.hostname,
+            "fqdn": self.fqdn,
+        }
+        if self.fqdn_source:
+            out["fqdn_source"] = self.fqdn_source
+        if self.status:
+            out["status"] = self.status
+        return _with_error(out, self)
+
+
+@dataclass(frozen=True, slots=True)
+class Deduction:
+    reason: str
+    points: int
+
+    def to_dict(self) -> Dict:
+        return {"reason": self.reason, "points": self.points}
+
+
+# Top-level keys HostResult models; anything else is carried in `extra`.
+_SECTIONS = ("os", "firewall", "antivirus", "disk_encryption", "user_accounts", "network", "updates")
+_TOP_LEVEL = ("schema_version", "timestamp", "type", "findings", "risk_score", "deductions") + _SECTIONS
+
+
+@dataclass(slots=True)
+class HostResult:
+    """One scan of one host.
+
+    Sections a scan did not run (a quick scan has no disk or user data) are
+    None and are left out of `to_dict`.
+    """
+    timestamp: str = ""
+    type: str = "full"
+    os_name: str = ""
+    os_version: str = ""
+    firewall: Optional[FirewallResult] = None
+    antivirus: Optional[AntivirusResult] = None
+    disk_encryption: Optional[DiskResult] = None
+    user_accounts: Optional[UserAccounts] = None
+    network: Optional[NetworkInfo] = None
+    updates: Optional[bool] = None
+    risk_score: Optional[int] = None
+    deductions: Tuple[Deduction, ...] = ()
+    schema_version: int = SCHEMA_VERSION
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def hostname(self) -> str:
+        return self.network.hostname if self.network else ""
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "HostResult":
+        """Build a record from either saved shape (flat full audit or nested quick scan)."""
+        findings = data.get("findings") if isinstance(data.get("findings"), dict) else data
+        osinfo = findings.get("os") or data.get("os") or {}
+        if isinstance(osinfo, (list, tuple)):  # os_detect.get_os_info() tuple
+            osinfo = {"name": osinfo[0], "version": osinfo[1] if len(osinfo) > 1 else ""}
+
+        def section(name, record):
+            value = findings.get(name)
+            return record.from_dict(value) if isinstance(value, dict) else None
+
+        deductions = tuple(
+            Deduction(str(d.get("reason", "")), int(d.get("points", 0)))
+            for d in data.get("deductions") or findings.get("deductions") or () if isinstance(d, dict)
+        )
+        score = data.get("risk_score")
+        updates = findings.get("updates")
+        return cls(
+            timestamp=str(data.get("timestamp") or findings.get("timestamp") or ""),
+            type=data.get("type", "full"),
+            os_name=str(osinfo.get("name", "")),
+            os_version=str(osinfo.get("version", "")),
+            firewall=section("firewall", FirewallResult),
+            antivirus=section("antivirus", AntivirusResult),
+            disk_encryption=section("disk_encryption", DiskResult),
+            user_accounts=section("user_accounts", UserAccounts),
+            network=section("network", NetworkInfo),
+            updates=updates if isinstance(updates, bool) else None,
+            risk_score=score if isinstance(score, (int, float)) else None,
+            deductions=deductions,
+            schema_version=int(data.get("schema_version", SCHEMA_VERSION)),
+            extra={k: v for k, v in data.items() if k not in _TOP_LEVEL},
+        )
+
+    def findings_dict(self) -> Dict:
+        out = {"os": {"name": self.os_name, "version": self.os_version}}
+        for name in ("firewall", "antivirus", "disk_encryption", "user_accounts", "network"):
+            value = getattr(self, name)
+            if value is not None:
+                out[name] = value.to_dict()
+        if self.updates is not None:
+            out["updates"] = self.updates
+        return out
+
+    def to_dict(self) -> Dict:
+        """Return the dict shape the GUIs save: quick scans nest their findings."""
+        out = {"schema_version": self.schema_version, "timestamp": self.timestamp, "type": self.type}
+        if self.type == "quick":
+            out["os"] = {"name": self.os_name, "version": self.os_version}
+            out["findings"] = self.findings_dict()
+        else:
+            out.update(self.findings_dict())
+        if self.risk_score is not None:
+            out["risk_score"] = self.risk_score
+            out["deductions"] = [d.to_dict() for d in self.deductions]
+        out.update(self.extra)
+        return out
@@ -1,110 +1,123 @@
-import platform
-import subprocess
 import socket
 import json
+from typing import Dict, List, Optional, Tuple
+
+from . import config as config_mod, resolver, runner
+
+ADAPTERS_CMD = ["powershell", "-Command",
+                "Get-NetAdapter | Select-Object Name,Status,MacAddress | ConvertTo-Json"]
+
+
+def ip_addresses_cmd(adapter: str) -> List[str]:
+    return ["powershell", "-Command",
+            f"Get-NetIPAddress -InterfaceAlias '{adapter}' | Select-Object IPAddress,AddressFamily | ConvertTo-Json"]
+
+
+def _json_list(text: str) -> List[Dict]:
+    # ConvertTo-Json emits a bare object when there is only one item.
+    value = json.loads(text)
+    return [value] if isinstance(value, dict) else value
+
+
+def parse_adapters(text: str) -> List[Dict]:
+    """Parse `Get-NetAdapter | ConvertTo-Json` into interface dicts without addresses."""
+    return [
+        {"name": a["Name"], "status": a["Status"].lower(), "mac": a["MacAddress"], "addresses": []}
+        for a in _json_list(text)
+    ]
+
+
+def parse_ip_addresses(text: str) -> List[Dict]:
+    """Parse `Get-NetIPAddress | ConvertTo-Json` into address dicts."""
+    addresses = []
+    for ip in _json_list(text):
+        if ip["AddressFamily"] == 2:  # IPv4
+            addresses.append({"type": "IPv4", "addr": ip["IPAddress"]})
+        elif ip["AddressFamily"] == 23:  # IPv6
+            addresses.append({"type": "IPv6", "addr": ip["IPAddress"]})
+    return addresses
+
+
+def parse_ip_addr(text: str) -> List[Dict]:
+    """Parse `ip addr` output into interface dicts (name, addresses, status, mac)."""
+    interfaces = []
+    current: Optional[Dict] = None
+    for line in text.split('\n'):
+        if not line.startswith(' '):
+            if current:
+                interfaces.append(current)
+                current = None
+            if ':' in line:
+                current = {
+                    "name": line.split(':')[1].strip().split('@')[0],
+                    "addresses": [],
+                    "status": "up" if "UP" in line else "down"
+                }
+        elif current:
+            if 'inet ' in line:
+                addr = line.split('inet ')[1].split('/')[0]
+                current["addresses"].append({"type": "IPv4", "addr": addr})
+            elif 'inet6 ' in line:
+                addr = line.split('inet6 ')[1].split('/')[0]
+                current["addresses"].append({"type": "IPv6", "addr": addr})
+            elif 'link/ether' in line:
+                current["mac"] = line.split('link/ether')[1].split()[0]
+    if current:
+        interfaces.append(current)
+    return interfaces
+
+
+def _names() -> Tuple[str, str, str]:
+    """(hostname, fqdn, where the fqdn came from); never waits long on DNS."""
+    hostname = runner.probe("socket.gethostname", socket.gethostname)
+    # A probe, so a replay follows the recorded host's setting rather than this one's.
+    if runner.probe("config.offline_mode", lambda: bool(config_mod.load_config().get("offline_mode")), trace=False):
+        return hostname, hostname, "offline"
+    lookup = {}
+
+    def resolve():
+        name, lookup["source"] = resolver.fqdn(hostname)
+        return name
+
+    fqdn = runner.probe("socket.getfqdn", resolve)
+    source = runner.probe("resolver.fqdn_source", lambda: lookup["source"], trace=False)
+    return hostname, fqdn, source
+
 
 def get_network_info():
     """Get comprehensive network interface information."""
+    hostname, fqdn, fqdn_source = _names()
     info = {
         "interfaces": [],
-        "hostname": socket.gethostname(),
-        "fqdn": socket.getfqdn()
+        "hostname": hostname,
+        "fqdn": fqdn,
+        "fqdn_source": fqdn_source,
     }
-    
-    system = platform.system().lower()
-    
+
+    system = runner.system()
+
     if system == "windows":
         try:
             # Get network adapters using PowerShell
-            cmd = ["powershell", "-Command", 
-                  "Get-NetAdapter | Select-Object Name,Status,MacAddress | ConvertTo-Json"]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = runner.run(ADAPTERS_CMD)
             if result.returncode == 0:
-                adapters = json.loads(result.stdout)
-                if isinstance(adapters, dict):  # Single adapter
-                    adapters = [adapters]
-                for adapter in adapters:
-                    interface = {
-                        "name": adapter["Name"],
-                        "status": adapter["Status"].lower(),
-                        "mac": adapter["MacAddress"],
-                        "addresses": []
-                    }
-                    
+                for interface in parse_adapters(result.stdout):
                     # Get IP addresses
-                    cmd = ["powershell", "-Command", 
-                          f"Get-NetIPAddress -InterfaceAlias '{adapter['Name']}' | Select-Object IPAddress,AddressFamily | ConvertTo-Json"]
-                    ip_result = subprocess.run(cmd, capture_output=True, text=True)
+                    ip_result = runner.run(ip_addresses_cmd(interface["name"]))
                     if ip_result.returncode == 0:
                         try:
-                            ips = json.loads(ip_result.stdout)
-                            if isinstance(ips, dict):
-                                ips = [ips]
-                            for ip in ips:
-                                if ip["AddressFamily"] == 2:  # IPv4
-                                    interface["addresses"].append({
-                                        "type": "IPv4",
-                                        "addr": ip["IPAddress"]
-                                    })
-                                elif ip["AddressFamily"] == 23:  # IPv6
-                                    interface["addresses"].append({
-                                        "type": "IPv6",
-                                        "addr": ip["IPAddress"]
-                                    })
+                            interface["addresses"] = parse_ip_addresses(ip_result.stdout)
                         except json.JSONDecodeError:
                             pass
-                    
                     info["interfaces"].append(interface)
         except Exception as e:
             info["error"] = str(e)
     else:
         try:
-            # Try using 'ip' command first (modern Linux)
-            cmd = ["ip", "addr"]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            current_interface = None
-            for line in result.stdout.split('\n'):
-                if not line.startswith(' '):
-                    if current_interface:
-                        info["interfaces"].append(current_interface)
-                    if ':' in line:
-                        iface_name = line.split(':')[1].strip()
-                        current_interface = {
-                            "name": iface_name,
-                            "addresses": [],
-                            "status": "up" if "UP" in line else "down"
-                        }
-                elif current_interface:
-                    if 'inet ' in line:
-                        addr = line.split('inet ')[1].split('/')[0]
-                        current_interface["addresses"].append({
-                            "type": "IPv4",
-                            "addr": addr
-                        })
-                    elif 'inet6 ' in line:
-                        addr = line.split('inet6 ')[1].split('/')[0]
-                        current_interface["addresses"].append({
-                            "type": "IPv6",
-                            "addr": addr
-                        })
-            
-            if current_interface:
-                info["interfaces"].append(current_interface)
-                
-            # Get MAC addresses
-            cmd = ["ip", "link"]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode == 0:
-                for line in result.stdout.split('\n'):
-                    if 'link/ether' in line:
-                        mac = line.split('link/ether')[1].split()[0]
-                        iface_name = line.split(':')[1].strip().split('@')[0]
-                        for interface in info["interfaces"]:
-                            if interface["name"] == iface_name:
-                                interface["mac"] = mac
-                                break
+            # `ip addr` lists addresses and MACs ("link/ether") per interface
+            result = runner.run(["ip", "addr"])
+            info["interfaces"] = parse_ip_addr(result.stdout)
         except Exception as e:
             info["error"] = str(e)
-    
-    return info
\ No newline at end of file
+
+    return info
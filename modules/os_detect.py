@@ -1,8 +1,12 @@
 import platform
 from datetime import datetime
-import json
 from pathlib import Path
 
+try:
+    from . import serializer
+except ImportError:  # run directly as a script
+    import serializer
+
 def get_os_info():
     return platform.system(), platform.release()
 
@@ -12,8 +16,7 @@ def save_audit_log(data):
     
     # Save JSON log
     json_file = exports_dir / f"audit_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(json_file, "w") as f:
-        json.dump(data, f, indent=4)
+    serializer.dump(data, json_file, pretty=True)
 
     # Save MD log
     md_file = exports_dir / f"audit_log_{datetime.now().strftime('%Y%m%d')}.md"
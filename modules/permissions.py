@@ -1,11 +1,45 @@
 """Permission and elevation helpers
 
 Simple cross-platform detection of admin/root privileges.
+
+`capabilities()` probes what this process may do, once per process: admin
+or root, the effective Linux capabilities (`CapEff` in /proc/self/status)
+and group membership. `sudo_mode()` adds whether sudo works without a
+password; it spawns `sudo -n -l`, so it is only probed when asked for.
+Checks name what they need (`"root"`, a capability such as `"net_admin"`,
+`"group:adm"` or `"sudo"`) and the scanner skips those the process cannot
+run.
 """
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
 import os
+import shutil
+import subprocess
 import sys
 
-def is_admin() -> bool:
+from . import runner
+
+try:
+    import grp
+    HAVE_GRP = True
+except ImportError:  # Windows
+    HAVE_GRP = False
+
+STATUS_FILE = "/proc/self/status"
+SUDO_TIMEOUT = 2.0
+
+# Bit numbers from linux/capability.h.
+CAPABILITY_BITS = {
+    "dac_override": 1,
+    "dac_read_search": 2,
+    "net_admin": 12,
+    "net_raw": 13,
+    "sys_admin": 21,
+}
+
+
+def _is_admin() -> bool:
     try:
         if sys.platform.startswith("win"):
             import ctypes
@@ -16,6 +50,97 @@ def is_admin() -> bool:
         return False
 
 
+def parse_cap_eff(text: str) -> Optional[int]:
+    """The CapEff bitmask from the text of /proc/<pid>/status, or None."""
+    for line in text.splitlines():
+        if line.startswith("CapEff:"):
+            try:
+                return int(line.split(":", 1)[1].strip(), 16)
+            except ValueError:
+                return None
+    return None
+
+
+def _effective_capabilities() -> Optional[int]:
+    try:
+        with open(STATUS_FILE) as f:
+            return parse_cap_eff(f.read())
+    except OSError:
+        return None
+
+
+def _group_names() -> Tuple[str, ...]:
+    if not HAVE_GRP:
+        return ()
+    names = []
+    for gid in dict.fromkeys([os.getegid(), *os.getgroups()]):
+        try:
+            names.append(grp.getgrgid(gid).gr_name)
+        except KeyError:
+            names.append(str(gid))
+    return tuple(names)
+
+
+@dataclass(frozen=True)
+class Capabilities:
+    admin: bool
+    effective: Optional[int] = None     # CapEff bitmask; None where there is none (not Linux)
+    groups: Tuple[str, ...] = ()
+
+    def has(self, name: str) -> bool:
+        """Whether the process holds `name`: "root", "sudo", "group:<name>" or a capability."""
+        if self.admin:
+            return True
+        if name == "root":
+            return False
+        if name == "sudo":
+            return sudo_mode() == "passwordless"
+        if name.startswith("group:"):
+            return name[len("group:"):] in self.groups
+        bit = CAPABILITY_BITS.get(name)
+        return bit is not None and self.effective is not None and bool(self.effective >> bit & 1)
+
+    def missing(self, requires: Iterable[str]) -> List[str]:
+        return [name for name in requires if not self.has(name)]
+
+    def to_dict(self) -> Dict:
+        return {
+            "admin": self.admin,
+            "capabilities": [n for n, bit in CAPABILITY_BITS.items()
+                             if self.effective is not None and self.effective >> bit & 1],
+            "groups": list(self.groups),
+        }
+
+
+@lru_cache(maxsize=None)
+def capabilities() -> Capabilities:
+    """What this process may do; probed on first call and cached."""
+    return Capabilities(_is_admin(), _effective_capabilities(), _group_names())
+
+
+@lru_cache(maxsize=None)
+def sudo_mode() -> str:
+    """"root", "passwordless", "password" or "unavailable"; probed on first call and cached.
+
+    Uses `sudo -n -l`, which lists rather than runs anything and never prompts.
+    It goes through `runner`, so it is traced, replayed and killed when the
+    scan is cancelled (`runner.Cancelled` propagates and nothing is cached).
+    """
+    if capabilities().admin:
+        return "root"
+    if runner.system() == "windows" or runner.probe("shutil.which sudo", lambda: shutil.which("sudo")) is None:
+        return "unavailable"
+    try:
+        proc = runner.run(["sudo", "-n", "-l"], timeout=SUDO_TIMEOUT)
+    except (OSError, subprocess.SubprocessError):
+        return "unavailable"
+    return "passwordless" if proc.returncode == 0 else "password"
+
+
+def is_admin() -> bool:
+    return capabilities().admin
+
+
 def require_admin_or_raise():
     if not is_admin():
         raise PermissionError("This action requires administrator privileges.")
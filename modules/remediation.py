@@ -1,45 +1,136 @@
 """Remediation helpers that perform (or simulate) safe system fixes.
 
 All actions are gated by explicit user approval and admin checks.
+
+Each fix in `FIXES` names the scanner checks that show whether it is still
+needed. `plan` runs those checks once and skips fixes that are already
+satisfied, and `execute` applies the rest in parallel:
+
+    fix_plan = plan(["enable_firewall", "enable_auto_updates"])
+    print("".join(fix_plan.describe()))      # dry run
+    execute(fix_plan, progress=lambda step: print(step.fix.id, step.status))
+    verify(fix_plan, previous=last_scan)     # re-run only the affected checks
+
+`verify` re-runs just the checks the applied fixes touch and rescores the
+previous scan with the fresh results merged in.
 """
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import copy
 import subprocess
-import platform
-from typing import Dict, List
-from .permissions import is_admin
-from pathlib import Path
+import time
 import logging
+from . import audit_log, runner
+from .models import Protection
+from .permissions import is_admin
+from .risk_score import RiskScorer
+
+# Fixes may install or restart services, so they get longer than a check.
+COMMAND_TIMEOUT = 120.0
+
+
+@dataclass(frozen=True)
+class Fix:
+    id: str
+    description: str
+    commands: Callable[[str], List[List[str]]]     # OS name -> commands run in order
+    checks: Tuple[str, ...] = ()                     # scanner checks showing whether it is needed
+    # Given those checks' results: True if already satisfied, False if needed, None if unknown.
+    satisfied: Callable[[Dict[str, Dict]], Optional[bool]] = lambda results: None
+    systems: Tuple[str, ...] = ()                    # OS names it applies to; empty for all
+
+
+def _firewall_commands(system: str) -> List[List[str]]:
+    if system == "windows":
+        return [["netsh", "advfirewall", "set", "allprofiles", "state", "on"]]
+    # On linux, use ufw if present
+    return [["ufw", "enable"]]
+
+
+def _firewall_on(results: Dict[str, Dict]) -> Optional[bool]:
+    status = Protection.parse((results.get("firewall") or {}).get("status"))
+    if status is Protection.ACTIVE:
+        return True
+    return False if status is Protection.INACTIVE else None
+
+
+def _guest_commands(system: str) -> List[List[str]]:
+    if system == "windows":
+        return [["net", "user", "guest", "/active:no"]]
+    # On linux, lock the guest user if exists
+    return [["sudo", "usermod", "-L", "guest"]]
+
+
+def _guest_disabled(results: Dict[str, Dict]) -> Optional[bool]:
+    accounts = results.get("user_accounts") or {}
+    if accounts.get("status") != "success":
+        return None
+    return not any(u.get("username", "").lower() == "guest" and u.get("enabled")
+                   for u in accounts.get("users") or [])
+
 
-LOG_DIR = Path(__file__).parent.parent / "logs"
-LOG_DIR.mkdir(exist_ok=True)
-logger = logging.getLogger("nexum.remediation")
-handler = logging.FileHandler(LOG_DIR / "remediation.log")
-logger.addHandler(handler)
-logger.setLevel(logging.INFO)
+def _updates_commands(system: str) -> List[List[str]]:
+    if system == "windows":
+        # set service to auto and start
+        return [["sc", "config", "wuauserv", "start=", "auto"], ["net", "start", "wuauserv"]]
+    # example for systemd-based systems
+    return [["sudo", "systemctl", "enable", "--now", "apt-daily.timer"]]
+
+
+def _updates_enabled(results: Dict[str, Dict]) -> Optional[bool]:
+    """No scan check covers updates, so ask the service manager directly."""
+    system = runner.system()
+    try:
+        if system == "windows":
+            config = runner.run(["sc", "qc", "wuauserv"]).stdout
+            state = runner.run(["sc", "query", "wuauserv"]).stdout
+            return "AUTO_START" in config and "RUNNING" in state
+        if system == "linux":
+            enabled = runner.run(["systemctl", "is-enabled", "apt-daily.timer"]).stdout.strip()
+            active = runner.run(["systemctl", "is-active", "apt-daily.timer"]).stdout.strip()
+            return enabled == "enabled" and active == "active"
+    except (OSError, subprocess.SubprocessError, runner.Cancelled):
+        pass
+    return None
+
+
+FIXES: Dict[str, Fix] = {f.id: f for f in (
+    Fix("enable_firewall", "Enable Windows Firewall (all profiles)", _firewall_commands,
+        ("firewall",), _firewall_on),
+    # Changing UAC requires registry edits; there is no command for it.
+    Fix("set_uac_secure", "Set UAC to a secure level (Windows)", lambda system: [], systems=("windows",)),
+    Fix("disable_guest", "Disable guest account", _guest_commands, ("user_accounts",), _guest_disabled),
+    Fix("enable_auto_updates", "Enable automatic updates/service", _updates_commands, (), _updates_enabled),
+)}
 
 
 def available_fixes() -> Dict[str, str]:
     """Return a dict of fix_id -> human friendly description."""
-    return {
-        "enable_firewall": "Enable Windows Firewall (all profiles)",
-        "set_uac_secure": "Set UAC to a secure level (Windows)",
-        "disable_guest": "Disable guest account",
-        "enable_auto_updates": "Enable automatic updates/service"
-    }
+    return {fid: fix.description for fid, fix in FIXES.items()}
 
 
-def run_command(cmd: List[str], simulate: bool = False) -> Dict:
-    """Run a system command and return result dict. If simulate, don't execute."""
-    logger.info(f"run_command simulate={simulate} cmd={cmd}")
+def run_command(cmd: List[str], simulate: bool = False, timeout: float = COMMAND_TIMEOUT) -> Dict:
+    """Run a system command and return result dict. If simulate, don't execute.
+
+    A command still running after `timeout` seconds is killed and reported
+    with status "timed_out".
+    """
+    audit_log.event("remediation", "command", cmd=cmd, simulate=simulate)
     if simulate:
         return {"cmd": cmd, "status": "simulated"}
 
     try:
-        proc = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        # Fixes change the system, so never reuse an earlier result.
+        proc = runner.run(cmd, timeout=timeout, memoize=False)
         result = {"returncode": proc.returncode, "stdout": proc.stdout, "stderr": proc.stderr}
-        logger.info(f"Command result: {result}")
+        audit_log.event("remediation", "command_result", cmd=cmd, duration=round(proc.duration, 3), **result)
         return result
+    except subprocess.TimeoutExpired:
+        audit_log.event("remediation", "command_timed_out", logging.WARNING, cmd=cmd, timeout=timeout)
+        return {"cmd": cmd, "status": "timed_out", "error": f"Timed out after {timeout:g}s"}
     except Exception as e:
-        logger.exception("Command execution failed")
+        audit_log.event("remediation", "command_failed", logging.ERROR, exc_info=True, cmd=cmd)
         return {"error": str(e)}
 
 
@@ -48,45 +139,220 @@ def apply_fix(fix_id: str, simulate_if_not_admin: bool = True) -> Dict:
 
     If not running as admin, either simulate (if simulate_if_not_admin) or raise.
     """
-    admin = is_admin()
-    simulate = not admin and simulate_if_not_admin
+    return _apply(fix_id, not is_admin() and simulate_if_not_admin)
 
-    if fix_id == "enable_firewall":
-        if platform.system().lower().startswith("win"):
-            cmd = ["netsh", "advfirewall", "set", "allprofiles", "state", "on"]
-            return run_command(cmd, simulate=simulate)
-        else:
-            # On linux, use ufw if present
-            cmd = ["ufw", "enable"]
-            return run_command(cmd, simulate=simulate)
-
-    if fix_id == "disable_guest":
-        if platform.system().lower().startswith("win"):
-            cmd = ["net", "user", "guest", "/active:no"]
-            return run_command(cmd, simulate=simulate)
-        else:
-            # On linux, lock the guest user if exists
-            cmd = ["sudo", "usermod", "-L", "guest"]
-            return run_command(cmd, simulate=simulate)
-
-    if fix_id == "enable_auto_updates":
-        if platform.system().lower().startswith("win"):
-            # set service to auto and start
-            cmd1 = ["sc", "config", "wuauserv", "start=", "auto"]
-            cmd2 = ["net", "start", "wuauserv"]
-            res1 = run_command(cmd1, simulate=simulate)
-            res2 = run_command(cmd2, simulate=simulate)
-            return {"step1": res1, "step2": res2}
-        else:
-            # example for systemd-based systems
-            cmd = ["sudo", "systemctl", "enable", "--now", "apt-daily.timer"]
-            return run_command(cmd, simulate=simulate)
 
+def _apply(fix_id: str, simulate: bool) -> Dict:
+    fix = FIXES.get(fix_id)
+    if fix is None:
+        return {"error": "unknown_fix"}
     if fix_id == "set_uac_secure":
-        # Changing UAC requires registry edits - we simulate unless elevated
-        if not admin and simulate_if_not_admin:
+        if simulate:
             return {"status": "simulated", "message": "Would set UAC to secure level (requires admin)"}
         # Actual implementation left minimal/safe
         return {"status": "not_implemented", "message": "UAC change not implemented programmatically for safety"}
+    results = [run_command(cmd, simulate=simulate) for cmd in fix.commands(runner.system())]
+    if len(results) == 1:
+        return results[0]
+    return {f"step{i}": r for i, r in enumerate(results, 1)}
+
+
+def failed(result: Dict) -> bool:
+    """Whether an `apply_fix` result reports an error, a timeout or a non-zero exit."""
+    if any(k.startswith("step") for k in result):
+        return any(failed(r) for k, r in result.items() if k.startswith("step"))
+    return "error" in result or result.get("status") in ("timed_out", "not_implemented") or bool(result.get("returncode"))
+
+
+# -- planner ------------------------------------------------------------------
+
+APPLY = "apply"
+SKIP = "skip"
+
+DEFAULT_WORKERS = 4
+
+
+@dataclass
+class PlanStep:
+    fix: Fix
+    action: str                     # APPLY or SKIP (already satisfied)
+    reason: str
+    status: str = "pending"         # pending, running, done, failed or skipped
+    result: Optional[Dict] = None
+    duration: float = 0.0
+
+    def to_dict(self) -> Dict:
+        out = {"fix": self.fix.id, "action": self.action, "reason": self.reason,
+               "status": self.status, "duration": round(self.duration, 3)}
+        if self.result is not None:
+            out["result"] = self.result
+        return out
+
+
+@dataclass
+class Plan:
+    steps: List[PlanStep]
+    simulate: bool
+    checks: Dict[str, Dict] = field(default_factory=dict)   # pre-check results by check name
+
+    def describe(self) -> List[str]:
+        """Dry-run output: what would run and why."""
+        system = runner.system()
+        mode = "simulated (not admin)" if self.simulate else "for real"
+        lines = [f"Remediation plan, {mode}:\n"]
+        for step in self.steps:
+            outcome = f" -> {step.status}" if step.status != "pending" else ""
+            lines.append(f"  {step.fix.id}: {step.action} ({step.reason}){outcome}\n")
+            if step.action == APPLY:
+                for cmd in step.fix.commands(system):
+                    lines.append(f"        $ {' '.join(cmd)}\n")
+        return lines
+
+    def to_dict(self) -> Dict:
+        return {"simulate": self.simulate, "steps": [s.to_dict() for s in self.steps]}
+
+
+def plan(fix_ids: Iterable[str], simulate_if_not_admin: bool = True, precheck: bool = True,
+         deadline: Optional[float] = None) -> Plan:
+    """Check the current state behind each fix and plan the ones still needed.
+
+    The checks the fixes name run once, as one scan, so fixes sharing a
+    check share its result. Fixes whose state cannot be determined are
+    applied.
+    """
+    fix_ids = list(dict.fromkeys(fix_ids))
+    unknown = [fid for fid in fix_ids if fid not in FIXES]
+    if unknown:
+        raise KeyError(f"Unknown fix: {', '.join(unknown)}")
+    results: Dict[str, Dict] = {}
+    if precheck:
+        # Deferred: the scanner's check modules are not needed to apply a fix.
+        from . import scanner
+        checks = list(dict.fromkeys(c for fid in fix_ids for c in FIXES[fid].checks))
+        if checks:
+            results = scanner.Scan(checks, deadline).run()
+    system = runner.system()
+    steps = []
+    for fid in fix_ids:
+        fix = FIXES[fid]
+        state = fix.satisfied(results) if precheck else None
+        if fix.systems and system not in fix.systems:
+            steps.append(PlanStep(fix, SKIP, f"not applicable on {system}"))
+        elif state:
+            steps.append(PlanStep(fix, SKIP, "already satisfied"))
+        else:
+            steps.append(PlanStep(fix, APPLY, "needed" if state is False else "state unknown"))
+    simulate = not is_admin() and simulate_if_not_admin
+    audit_log.event("remediation", "plan", simulate=simulate,
+                    steps=[{"fix": s.fix.id, "action": s.action, "reason": s.reason} for s in steps])
+    return Plan(steps, simulate, results)
+
+
+def execute(fix_plan: Plan, progress: Callable[[PlanStep], None] = None,
+            workers: int = DEFAULT_WORKERS) -> Plan:
+    """Run a plan's fixes in parallel.
+
+    `progress(step)` is called from worker threads whenever a step changes
+    status.
+    """
+    def report(step: PlanStep, status: str):
+        step.status = status
+        if progress:
+            progress(step)
+
+    def work(step: PlanStep) -> PlanStep:
+        report(step, "running")
+        began = time.monotonic()
+        try:
+            step.result = _apply(step.fix.id, fix_plan.simulate)
+        except Exception as e:
+            audit_log.event("remediation", "fix_failed", logging.ERROR, exc_info=True, fix=step.fix.id)
+            step.result = {"error": str(e)}
+        step.duration = time.monotonic() - began
+        report(step, "failed" if failed(step.result) else "done")
+        return step
+
+    for step in fix_plan.steps:
+        if step.action == SKIP:
+            report(step, "skipped")
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="fix") as pool:
+        for step in fix_plan.steps:
+            if step.action == APPLY:
+                pool.submit(work, step)
+    return fix_plan
+
+
+# -- verification ---------------------------------------------------------------
+
+def affected_checks(fix_ids: Iterable[str]) -> List[str]:
+    """Scanner checks whose results the given fixes can change, deduplicated, in order."""
+    return list(dict.fromkeys(c for fid in fix_ids for c in FIXES[fid].checks))
+
+
+def _findings(data: Dict) -> Dict:
+    # Quick scans nest their findings; full audits are flat.
+    return data["findings"] if isinstance(data.get("findings"), dict) else data
+
+
+def verify(fix_plan: Plan, previous: Optional[Dict] = None, deadline: Optional[float] = None) -> Dict:
+    """Re-run only the checks the applied fixes affect and rescore.
+
+    The fresh results, and the plan's own pre-check results, replace their
+    sections of `previous` (the last scan payload, quick or full), and the
+    merged findings are scored again.
+    Returns the checks run, the before/after score and deductions, each
+    applied fix's state afterwards (True, False or None if unknown) and the
+    merged `payload`.
+    """
+    from . import scanner
+    applied = [s.fix for s in fix_plan.steps if s.status == "done"]
+    checks = affected_checks(f.id for f in applied)
+    scan = scanner.Scan(checks, deadline)
+    fresh = scan.run() if checks else {}
+
+    scorer = RiskScorer()
+    payload = copy.deepcopy(previous) if previous else {}
+    findings = _findings(payload)
+    if isinstance(payload.get("risk_score"), (int, float)):
+        before = (payload["risk_score"], payload.get("deductions") or [])
+    else:
+        before = scorer.calculate_score(findings)
+    findings.update(fix_plan.checks)
+    findings.update(fresh)
+    after = scorer.calculate_score(findings)
+    payload["risk_score"], payload["deductions"] = after
+    audit_log.event("remediation", "verify", checks=checks, before=before[0], after=after[0])
+    return {
+        "checks": checks,
+        "elapsed": round(scan.elapsed, 3),
+        "results": fresh,
+        "fixed": {f.id: f.satisfied(findings) for f in applied},
+        "before": {"risk_score": before[0], "deductions": before[1]},
+        "after": {"risk_score": after[0], "deductions": after[1]},
+        "payload": payload,
+    }
+
+
+def format_verification(verification: Dict) -> List[str]:
+    """Before/after summary lines for the fix log."""
+    before, after = verification["before"], verification["after"]
+    checks = ", ".join(verification["checks"]) or "none"
+    lines = [f"Verified ({checks}) in {verification['elapsed']:.2f}s\n"]
+    for fid, state in verification["fixed"].items():
+        lines.append(f"  {fid}: {'fixed' if state else 'still needed' if state is False else 'state unknown'}\n")
+    lines.append(f"Risk score: {before['risk_score']} -> {after['risk_score']}\n")
+    old = {d["reason"]: d["points"] for d in before["deductions"]}
+    new = {d["reason"]: d["points"] for d in after["deductions"]}
+    for reason in old:
+        lines.append(f"  {'-' if reason not in new else ' '} {reason}: -{old[reason]}\n")
+    for reason in new:
+        if reason not in old:
+            lines.append(f"  + {reason}: -{new[reason]}\n")
+    return lines
+
 
-    return {"error": "unknown_fix"}
+def remediate(fix_ids: Iterable[str], dry_run: bool = False, progress: Callable[[PlanStep], None] = None,
+              workers: int = DEFAULT_WORKERS, simulate_if_not_admin: bool = True) -> Plan:
+    """Plan the selected fixes and, unless `dry_run`, execute the plan."""
+    fix_plan = plan(fix_ids, simulate_if_not_admin)
+    return fix_plan if dry_run else execute(fix_plan, progress, workers)
@@ -0,0 +1,228 @@
+"""Record a scan's probes into a bundle, and replay the checks against it.
+
+While a `Recorder` is the current probe source (`runner.use_source`), every
+command (`runner.run`), file read (`runner.read_file`) and Python-level
+query (`runner.probe`) a check makes is captured: arguments, stdout,
+stderr, exit code, timing, or the error raised. A `Replayer` answers the
+same calls from a bundle without spawning processes or touching the file
+system. Because checks also take the OS from `runner.system()`, a Windows
+bundle replays through the Windows parsers on any machine.
+
+Bundles collected on unusual hosts become regression and benchmark inputs
+for the parsers:
+
+    bundle, results = record(scanner.FULL_AUDIT)
+    bundle.save(Path("host.bundle.json.gz"))
+    ...
+    replay(Bundle.load(path))        # same results, nothing executed
+    verify(Bundle.load(path))        # [] when the parsers still agree
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import gzip
+import platform
+import subprocess
+import threading
+
+from . import runner, scanner, serializer
+from .diff import Change, diff_scans
+
+BUNDLE_VERSION = 1
+# Results of checks that did not finish (or were not run) when recorded are not comparable.
+_INCOMPLETE = (scanner.TIMED_OUT, scanner.CANCELLED, scanner.INSUFFICIENT_PRIVILEGE)
+
+
+class ReplayMiss(LookupError):
+    """The bundle holds no recording of a call the check made."""
+
+
+def _command_key(cmd: Sequence[str], env: Optional[Mapping[str, str]]) -> Tuple:
+    return ("cmd", tuple(cmd), tuple(sorted((env or {}).items())))
+
+
+def _error_dict(e: OSError) -> Dict:
+    return {"errno": e.errno, "strerror": e.strerror or str(e),
+            "filename": str(e.filename) if e.filename is not None else None}
+
+
+def _raise_error(error: Dict):
+    if error.get("errno") is not None:
+        # OSError(errno, ...) picks the matching subclass (FileNotFoundError, ...)
+        raise OSError(error["errno"], error["strerror"], *([error["filename"]] if error.get("filename") else []))
+    raise OSError(error.get("strerror", "recorded failure"))
+
+
+@dataclass
+class Bundle:
+    meta: Dict = field(default_factory=dict)
+    entries: List[Dict] = field(default_factory=list)
+    results: Dict[str, Dict] = field(default_factory=dict)   # check results when recorded
+    _index: Optional[Dict[Tuple, List[Dict]]] = field(default=None, repr=False, compare=False)
+
+    @property
+    def checks(self) -> List[str]:
+        return list(self.meta.get("checks") or self.results)
+
+    @property
+    def index(self) -> Dict[Tuple, List[Dict]]:
+        """Entries grouped by call, in recording order (built once per bundle)."""
+        if self._index is None:
+            index: Dict[Tuple, List[Dict]] = {}
+            for entry in self.entries:
+                kind = entry["kind"]
+                if kind == "cmd":
+                    key = _command_key(entry["args"], entry.get("env"))
+                elif kind == "file":
+                    key = ("file", entry["path"])
+                else:
+                    key = ("probe", entry["name"])
+                index.setdefault(key, []).append(entry)
+            self._index = index
+        return self._index
+
+    def to_dict(self) -> Dict:
+        return {"version": BUNDLE_VERSION, "meta": self.meta, "entries": self.entries, "results": self.results}
+
+    def save(self, path: Path) -> Path:
+        """Write the bundle as JSON, gzip-compressed when the name ends in .gz."""
+        path = Path(path)
+        data = serializer.dumps(self.to_dict())
+        path.write_bytes(gzip.compress(data, 6) if path.suffix == ".gz" else data)
+        return path
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Bundle":
+        if data.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported bundle version: {data.get('version')}")
+        return cls(data.get("meta") or {}, data.get("entries") or [], data.get("results") or {})
+
+    @classmethod
+    def load(cls, path: Path) -> "Bundle":
+        raw = Path(path).read_bytes()
+        if raw[:2] == b"\x1f\x8b":
+            raw = gzip.decompress(raw)
+        return cls.from_dict(serializer.loads(raw))
+
+
+class Recorder:
+    """Probe source that captures calls as they really happen."""
+    replaying = False
+
+    def __init__(self):
+        self.entries: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def _add(self, entry: Dict):
+        with self._lock:
+            self.entries.append(entry)
+
+    def add_command(self, cmd: Sequence[str], env: Optional[Mapping[str, str]], result: runner.Completed = None,
+                    error: OSError = None, timed_out: float = None):
+        entry: Dict[str, Any] = {"kind": "cmd", "args": list(cmd)}
+        if env:
+            entry["env"] = dict(env)
+        if error is not None:
+            entry["error"] = _error_dict(error)
+        elif timed_out is not None:
+            entry["timed_out"] = timed_out
+        else:
+            entry.update(returncode=result.returncode, stdout=result.stdout, stderr=result.stderr,
+                         duration=round(result.duration, 4))
+            if result.truncated:
+                entry["truncated"] = True
+        self._add(entry)
+
+    def add_file(self, path: str, data: str = None, error: OSError = None):
+        entry = {"kind": "file", "path": str(path)}
+        if error is not None:
+            entry["error"] = _error_dict(error)
+        else:
+            entry["data"] = data
+        self._add(entry)
+
+    def add_probe(self, name: str, value: Any):
+        self._add({"kind": "probe", "name": name, "value": value})
+
+    def bundle(self, scan: scanner.Scan, results: Dict[str, Dict]) -> Bundle:
+        meta = {
+            "recorded": datetime.now().isoformat(),
+            "system": platform.system(),
+            "release": platform.release(),
+            "host": platform.node(),
+            "checks": [c.name for c in scan.checks],
+            "scan": scan.summary(),
+        }
+        with self._lock:
+            entries = list(self.entries)
+        return Bundle(meta, entries, results)
+
+
+class Replayer:
+    """Probe source that answers calls from a bundle.
+
+    Repeated calls are answered in recording order; once a call's
+    recordings run out, the last one is repeated (memoized commands were
+    recorded only once).
+    """
+    replaying = True
+
+    def __init__(self, bundle: Bundle):
+        self.index = bundle.index
+        self.cursors: Dict[Tuple, int] = {}
+
+    def _next(self, key: Tuple) -> Dict:
+        entries = self.index.get(key)
+        if not entries:
+            raise ReplayMiss(f"Not in bundle: {key[0]} {' '.join(key[1]) if key[0] == 'cmd' else key[1]}")
+        i = self.cursors.get(key, 0)
+        self.cursors[key] = i + 1
+        return entries[min(i, len(entries) - 1)]
+
+    def replay_command(self, cmd: Sequence[str], env: Optional[Mapping[str, str]] = None) -> runner.Completed:
+        entry = self._next(_command_key(cmd, env))
+        if "error" in entry:
+            _raise_error(entry["error"])
+        if "timed_out" in entry:
+            raise subprocess.TimeoutExpired(list(cmd), entry["timed_out"])
+        return runner.Completed(list(cmd), entry["returncode"], entry["stdout"], entry["stderr"],
+                                entry.get("duration", 0.0), entry.get("truncated", False))
+
+    def replay_file(self, path: str) -> str:
+        entry = self._next(("file", str(path)))
+        if "error" in entry:
+            _raise_error(entry["error"])
+        return entry["data"]
+
+    def replay_probe(self, name: str) -> Any:
+        return self._next(("probe", name))["value"]
+
+
+def record(checks: Iterable[str] = scanner.FULL_AUDIT, deadline: float = None) -> Tuple[Bundle, Dict[str, Dict]]:
+    """Run a real scan while capturing every probe; returns (bundle, results)."""
+    scan = scanner.Scan(checks, deadline)
+    recorder = Recorder()
+    with runner.use_source(recorder):
+        results = scan.run()
+    return recorder.bundle(scan, results), results
+
+
+def replay(bundle: Bundle, checks: Iterable[str] = None) -> Dict[str, Dict]:
+    """Run the checks' parsers against `bundle`; nothing is executed or read."""
+    results: Dict[str, Dict] = {}
+    with runner.use_source(Replayer(bundle)):
+        for name in checks or bundle.checks:
+            try:
+                results[name] = scanner.CHECKS[name].func()
+            except Exception as e:
+                results[name] = {"status": "error", "error": str(e)}
+    return results
+
+
+def verify(bundle: Bundle) -> List[Change]:
+    """Differences between a fresh replay and the results stored in the bundle."""
+    names = [n for n in bundle.checks
+             if (bundle.results.get(n) or {}).get("status") not in _INCOMPLETE]
+    expected = {n: bundle.results.get(n) for n in names}
+    return diff_scans(expected, replay(bundle, names), ignore=())
@@ -0,0 +1,264 @@
+"""Batch posture reports across many hosts.
+
+Reads a directory of exported audit JSON files (`audit_*.json`, optionally
+`.json.gz`) and renders one page per export plus a fleet summary with a
+score distribution, the worst hosts and the most common deductions, as
+Markdown and/or static HTML. The summary counts each host once, by its
+newest export.
+
+Templates are compiled once at import time. Hosts are rendered in a process
+pool; each worker writes its own pages and returns only a small summary, so
+the parent never holds rendered documents in memory.
+"""
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from string import Template
+from typing import Dict, Iterable, List, Optional
+import gzip
+import html
+import os
+import re
+
+from . import serializer
+from .exporter import BASE_DIR
+from .risk_score import RiskScorer, interpret_band
+
+REPORTS_DIR = BASE_DIR / "reports"
+FORMATS = ("markdown", "html")
+
+HOST_MD = Template("""# $host
+
+- Source: `$source`
+- Scanned: $timestamp
+- OS: $os
+- Risk score: **$score / 100** ($band)
+
+## Deductions
+
+$deductions
+
+## Checks
+
+| Check | Status |
+|---|---|
+$checks
+""")
+
+HOST_HTML = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>$host</title>
+<style>body{font-family:sans-serif;margin:2em}td,th{border:1px solid #ccc;padding:4px 8px}
+table{border-collapse:collapse}.band-$band_class{font-weight:bold}</style></head>
+<body><h1>$host</h1>
+<p>Source: <code>$source</code><br>Scanned: $timestamp<br>OS: $os</p>
+<p class="band-$band_class">Risk score: $score / 100 ($band)</p>
+<h2>Deductions</h2><ul>$deductions</ul>
+<h2>Checks</h2><table><tr><th>Check</th><th>Status</th></tr>$checks</table>
+<p><a href="index.html">Fleet summary</a></p></body></html>
+""")
+
+FLEET_MD = Template("""# Fleet Posture Summary
+
+Hosts: $count | Mean score: $mean | Failed to parse: $errors
+
+## Score Distribution
+
+| Score | Hosts |
+|---|---|
+$distribution
+
+## Bands
+
+| Band | Hosts |
+|---|---|
+$bands
+
+## Worst Hosts
+
+| Host | Score | Band |
+|---|---|---|
+$worst
+
+## Most Common Deductions
+
+| Deduction | Hosts |
+|---|---|
+$common
+""")
+
+FLEET_HTML = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Fleet Posture Summary</title>
+<style>body{font-family:sans-serif;margin:2em}td,th{border:1px solid #ccc;padding:4px 8px}
+table{border-collapse:collapse}</style></head>
+<body><h1>Fleet Posture Summary</h1>
+<p>Hosts: $count | Mean score: $mean | Failed to parse: $errors</p>
+<h2>Score Distribution</h2><table><tr><th>Score</th><th>Hosts</th></tr>$distribution</table>
+<h2>Bands</h2><table><tr><th>Band</th><th>Hosts</th></tr>$bands</table>
+<h2>Worst Hosts</h2><table><tr><th>Host</th><th>Score</th><th>Band</th></tr>$worst</table>
+<h2>Most Common Deductions</h2><table><tr><th>Deduction</th><th>Hosts</th></tr>$common</table>
+</body></html>
+""")
+
+CHECKS = ("firewall", "antivirus", "disk_encryption", "user_accounts")
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def load_export(path: Path) -> Dict:
+    if path.suffix == ".gz":
+        with gzip.open(path, "rb") as f:
+            return serializer.loads(f.read())
+    return serializer.load(path)
+
+
+def find_exports(directory: Path) -> List[Path]:
+    """Return the audit JSON exports in a directory (not NDJSON/Markdown)."""
+    files = [p for p in directory.iterdir()
+             if p.name.startswith("audit_") and (p.name.endswith(".json") or p.name.endswith(".json.gz"))]
+    return sorted(files)
+
+
+def summarize(path: Path, data: Dict) -> Dict:
+    """Reduce one export to the fields the reports need."""
+    findings = data.get("findings") if isinstance(data.get("findings"), dict) else data
+    score = data.get("risk_score")
+    deductions = data.get("deductions")
+    if not isinstance(score, (int, float)) or deductions is None:
+        score, deductions = RiskScorer().calculate_score(findings)
+    network = findings.get("network") or {}
+    osinfo = findings.get("os") or data.get("os") or {}
+    checks = {}
+    for name in CHECKS:
+        section = findings.get(name)
+        if isinstance(section, dict):
+            checks[name] = section.get("status", "unknown")
+    return {
+        "host": network.get("hostname") or path.name.split(".")[0],
+        "source": path.name,
+        "timestamp": findings.get("timestamp") or data.get("timestamp") or "",
+        "os": f"{osinfo.get('name', '')} {osinfo.get('version', '')}".strip(),
+        "score": score,
+        "band": interpret_band(score)[0],
+        "deductions": [d.get("reason") for d in deductions],
+        "checks": checks,
+    }
+
+
+def _page_name(summary: Dict) -> str:
+    return _SAFE_NAME.sub("_", f"{summary['host']}_{summary['source'].split('.')[0]}")
+
+
+def render_host_markdown(s: Dict) -> str:
+    return HOST_MD.substitute(
+        host=s["host"], source=s["source"], timestamp=s["timestamp"], os=s["os"],
+        score=s["score"], band=s["band"],
+        deductions="\n".join(f"- {r}" for r in s["deductions"]) or "None",
+        checks="\n".join(f"| {k} | {v} |" for k, v in s["checks"].items()),
+    )
+
+
+def render_host_html(s: Dict) -> str:
+    e = html.escape
+    return HOST_HTML.substitute(
+        host=e(s["host"]), source=e(s["source"]), timestamp=e(str(s["timestamp"])), os=e(s["os"]),
+        score=s["score"], band=e(s["band"]), band_class=s["band"].replace(" ", "-").lower(),
+        deductions="".join(f"<li>{e(str(r))}</li>" for r in s["deductions"]) or "<li>None</li>",
+        checks="".join(f"<tr><td>{e(k)}</td><td>{e(str(v))}</td></tr>" for k, v in s["checks"].items()),
+    )
+
+
+def _render_one(args) -> Optional[Dict]:
+    """Process-pool worker: load one export, write its pages, return its summary."""
+    path, out_dir, formats = args
+    try:
+        s = summarize(path, load_export(path))
+    except Exception:
+        return None
+    page = _page_name(s)
+    hosts_dir = out_dir / "hosts"
+    if "markdown" in formats:
+        (hosts_dir / f"{page}.md").write_text(render_host_markdown(s), encoding="utf-8")
+    if "html" in formats:
+        (hosts_dir / f"{page}.html").write_text(render_host_html(s), encoding="utf-8")
+    s["page"] = page
+    return s
+
+
+def latest_per_host(summaries: List[Dict]) -> List[Dict]:
+    """The newest summary of each host (by timestamp, then file name)."""
+    latest: Dict[str, Dict] = {}
+    for s in summaries:
+        current = latest.get(s["host"])
+        if current is None or (str(s["timestamp"]), s["source"]) > (str(current["timestamp"]), current["source"]):
+            latest[s["host"]] = s
+    return list(latest.values())
+
+
+def fleet_summary(summaries: List[Dict], errors: int = 0, worst: int = 20, common: int = 20) -> Dict:
+    """Fleet-wide figures over the newest export of each host."""
+    summaries = latest_per_host(summaries)
+    scores = [s["score"] for s in summaries]
+    distribution = Counter(min(int(sc) // 10 * 10, 90) for sc in scores)
+    deductions = Counter(r for s in summaries for r in set(s["deductions"]))
+    return {
+        "count": len(summaries),
+        "errors": errors,
+        "mean": round(sum(scores) / len(scores), 1) if scores else 0,
+        "distribution": [(f"{lo}-{lo + 9 if lo < 90 else 100}", distribution.get(lo, 0)) for lo in range(0, 100, 10)],
+        "bands": Counter(s["band"] for s in summaries).most_common(),
+        "worst": sorted(summaries, key=lambda s: (s["score"], s["host"]))[:worst],
+        "common": deductions.most_common(common),
+    }
+
+
+def render_fleet_markdown(f: Dict) -> str:
+    return FLEET_MD.substitute(
+        count=f["count"], mean=f["mean"], errors=f["errors"],
+        distribution="\n".join(f"| {label} | {n} |" for label, n in f["distribution"]),
+        bands="\n".join(f"| {b} | {n} |" for b, n in f["bands"]),
+        worst="\n".join(f"| [{s['host']}](hosts/{s['page']}.md) | {s['score']} | {s['band']} |" for s in f["worst"]),
+        common="\n".join(f"| {r} | {n} |" for r, n in f["common"]),
+    )
+
+
+def render_fleet_html(f: Dict) -> str:
+    e = html.escape
+    return FLEET_HTML.substitute(
+        count=f["count"], mean=f["mean"], errors=f["errors"],
+        distribution="".join(f"<tr><td>{label}</td><td>{n}</td></tr>" for label, n in f["distribution"]),
+        bands="".join(f"<tr><td>{e(b)}</td><td>{n}</td></tr>" for b, n in f["bands"]),
+        worst="".join(
+            f"<tr><td><a href=\"hosts/{e(s['page'])}.html\">{e(s['host'])}</a></td><td>{s['score']}</td><td>{e(s['band'])}</td></tr>"
+            for s in f["worst"]
+        ),
+        common="".join(f"<tr><td>{e(str(r))}</td><td>{n}</td></tr>" for r, n in f["common"]),
+    )
+
+
+def build_reports(source_dir: Path, out_dir: Path = None, formats: Iterable[str] = FORMATS,
+                  workers: int = None) -> Dict:
+    """Render per-host pages and the fleet summary. Returns the fleet summary."""
+    formats = tuple(formats)
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown report format(s): {', '.join(sorted(unknown))}")
+    out_dir = Path(out_dir or REPORTS_DIR)
+    (out_dir / "hosts").mkdir(parents=True, exist_ok=True)
+
+    paths = find_exports(Path(source_dir))
+    jobs = [(p, out_dir, formats) for p in paths]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < 64:
+        results = [_render_one(job) for job in jobs]
+    else:
+        chunksize = max(1, len(jobs) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_render_one, jobs, chunksize=chunksize))
+
+    summaries = [r for r in results if r is not None]
+    fleet = fleet_summary(summaries, errors=len(results) - len(summaries))
+    if "markdown" in formats:
+        (out_dir / "index.md").write_text(render_fleet_markdown(fleet), encoding="utf-8")
+    if "html" in formats:
+        (out_dir / "index.html").write_text(render_fleet_html(fleet), encoding="utf-8")
+    return fleet
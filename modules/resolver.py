@@ -0,0 +1,112 @@
+"""Bounded, cached FQDN resolution for the network check.
+
+`socket.getfqdn` asks the system resolver and can block for as long as DNS
+takes to fail. `fqdn(hostname)` bounds that:
+
+1. the hosts file is read first; a line naming the host answers at once
+   (source "hosts");
+2. an answer from an earlier lookup still within its TTL is reused
+   (source "cache");
+3. otherwise `getfqdn` runs on a daemon thread and is waited for at most
+   `timeout` seconds, or what is left of the current check's budget
+   (source "dns"). Past that the host name is used (source "timeout").
+
+A lookup that timed out keeps running in the background. Its answer
+fills the cache when it arrives, and a second caller joins it instead of
+starting another thread. Timeouts are remembered for `NEGATIVE_TTL`, so
+scans on a host with dead DNS do not each wait the full timeout.
+"""
+from typing import Dict, Optional, Tuple
+import socket
+import sys
+import threading
+import time
+
+from . import runner
+
+RESOLVE_TIMEOUT = 2.0
+TTL = 300.0
+NEGATIVE_TTL = 60.0
+
+if sys.platform.startswith("win"):
+    HOSTS_FILE = r"C:\Windows\System32\drivers\etc\hosts"
+else:
+    HOSTS_FILE = "/etc/hosts"
+
+# name -> (fqdn, source, expires at); sources "dns" or "timeout"
+_cache: Dict[str, Tuple[str, str, float]] = {}
+_pending: Dict[str, threading.Event] = {}
+_lock = threading.Lock()
+
+
+def parse_hosts(text: str, hostname: str) -> Optional[str]:
+    """The FQDN a hosts file gives `hostname`, like `getfqdn` would; None if not listed."""
+    wanted = hostname.lower()
+    for line in text.splitlines():
+        names = line.split("#", 1)[0].split()[1:]
+        if wanted in (n.lower() for n in names):
+            return next((n for n in names if "." in n), hostname)
+    return None
+
+
+def _from_hosts(hostname: str) -> Optional[str]:
+    try:
+        with open(HOSTS_FILE, encoding="utf-8", errors="replace") as f:
+            return parse_hosts(f.read(), hostname)
+    except OSError:
+        return None
+
+
+def _lookup(hostname: str, done: threading.Event):
+    try:
+        name = socket.getfqdn(hostname)
+    except Exception:
+        name = hostname
+    with _lock:
+        _cache[hostname] = (name, "dns", time.monotonic() + TTL)
+        _pending.pop(hostname, None)
+    done.set()
+
+
+def _cached(hostname: str) -> Optional[Tuple[str, str]]:
+    entry = _cache.get(hostname)
+    if entry is not None and entry[2] > time.monotonic():
+        return entry[0], entry[1]
+    return None
+
+
+def fqdn(hostname: str, timeout: float = RESOLVE_TIMEOUT) -> Tuple[str, str]:
+    """(fqdn, source) for `hostname`; source is "hosts", "cache", "dns" or "timeout"."""
+    found = _from_hosts(hostname)
+    if found is not None:
+        return found, "hosts"
+    token = runner.current_token()
+    if token is not None and token.remaining() is not None:
+        timeout = min(timeout, token.remaining())
+    with _lock:
+        cached = _cached(hostname)
+        if cached is not None:
+            return cached[0], "cache" if cached[1] == "dns" else cached[1]
+        done = _pending.get(hostname)
+        if done is None:
+            done = _pending[hostname] = threading.Event()
+            threading.Thread(target=_lookup, args=(hostname, done), name="resolve-fqdn", daemon=True).start()
+    if done.wait(timeout):
+        with _lock:
+            cached = _cached(hostname)
+        if cached is not None:
+            return cached
+    with _lock:
+        # The lookup may have finished since the wait gave up.
+        cached = _cached(hostname)
+        if cached is not None:
+            return cached
+        # Otherwise it may still finish; its answer replaces this entry.
+        if hostname in _pending:
+            _cache[hostname] = (hostname, "timeout", time.monotonic() + NEGATIVE_TTL)
+    return hostname, "timeout"
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,313 @@
+"""Retention policy for scan history and exports.
+
+Long-lived hosts accumulate one file per scan in `history/` and several per
+audit in `exports/`. This module thins them out with a tiered policy:
+
+- everything newer than `keep_all_days` is kept,
+- up to `hourly_days` one representative per hour is kept,
+- after that one representative per day is kept,
+- a scan whose score or findings differ from the previous scan of the same
+  host and type is always kept, so no state change is ever lost.
+
+Buckets and change detection are per host (`history.scan_host`), so scans
+the collector stores for many agents are thinned independently.
+
+A plan is computed first (`plan_retention`) and reports the projected space
+savings; `apply_plan` deletes the files. `RetentionWorker` runs both in the
+background in small batches.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+import re
+import threading
+import time
+
+from . import audit_log, config as config_mod, serializer
+from . import history
+from .history import HISTORY_DIR
+from .exporter import EXPORTS_DIR, is_export_name
+
+STATE_FILE = HISTORY_DIR / ".retention_state.json"
+
+DEFAULT_POLICY = {
+    "enabled": False,
+    "keep_all_days": 7,
+    "hourly_days": 90,
+    "keep_changes": True,
+    "interval_seconds": 3600,
+    "batch_size": 200,
+}
+
+# Sections whose changes mark a scan as significant.
+FINDING_KEYS = ("firewall", "antivirus", "disk_encryption", "user_accounts", "updates")
+
+_TS_RE = re.compile(r"(\d{8}_\d{6})")
+
+
+@dataclass
+class RetentionEntry:
+    """One logical scan: its timestamp and every file that belongs to it."""
+    timestamp: datetime
+    paths: List[Path]
+    kind: str = "full"
+    fingerprint: Optional[str] = None
+    host: str = history.LOCAL_HOST
+
+    @property
+    def size(self) -> int:
+        total = 0
+        for p in self.paths:
+            try:
+                total += p.stat().st_size
+            except OSError:
+                pass
+        return total
+
+
+@dataclass
+class RetentionPlan:
+    keep: List[RetentionEntry] = field(default_factory=list)
+    delete: List[RetentionEntry] = field(default_factory=list)
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return sum(e.size for e in self.delete)
+
+    @property
+    def files_deleted(self) -> int:
+        return sum(len(e.paths) for e in self.delete)
+
+    def summary(self) -> Dict:
+        return {
+            "entries_kept": len(self.keep),
+            "entries_deleted": len(self.delete),
+            "files_deleted": self.files_deleted,
+            "bytes_reclaimed": self.bytes_reclaimed,
+        }
+
+
+def load_policy() -> Dict:
+    """Return the retention policy from config.json merged over the defaults."""
+    cfg = config_mod.load_config()
+    return {**DEFAULT_POLICY, **(cfg.get("retention") or {})}
+
+
+def _timestamp_for(path: Path) -> datetime:
+    m = _TS_RE.search(path.name)
+    if m:
+        try:
+            return datetime.strptime(m.group(1), "%Y%m%d_%H%M%S")
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(path.stat().st_mtime)
+
+
+def _load_state() -> Dict[str, Dict]:
+    if STATE_FILE.exists():
+        try:
+            return serializer.load(STATE_FILE)
+        except Exception:
+            return {}
+    return {}
+
+
+def _save_state(state: Dict[str, Dict]):
+    tmp = STATE_FILE.with_suffix(".tmp")
+    serializer.dump(state, tmp)
+    tmp.replace(STATE_FILE)
+
+
+def fingerprint(data: Dict) -> str:
+    """Hash the parts of a scan payload that matter for change detection.
+
+    Timestamps, network details and other volatile data are ignored so two
+    scans of an unchanged host produce the same fingerprint.
+    """
+    findings = data.get("findings") if isinstance(data.get("findings"), dict) else data
+    relevant = {
+        "risk_score": data.get("risk_score"),
+        "deductions": data.get("deductions"),
+        "findings": {k: findings.get(k) for k in FINDING_KEYS if k in findings},
+    }
+    return serializer.content_hash(relevant)
+
+
+def _describe(path: Path, state: Dict[str, Dict]) -> Dict:
+    """Return cached {fingerprint, kind} for a payload file, reading it only once."""
+    key = path.name
+    cached = state.get(key)
+    if cached is not None:
+        return cached
+    try:
+        data = serializer.load(path)
+        info = {"fingerprint": fingerprint(data), "kind": data.get("type", "full")}
+    except Exception:
+        info = {"fingerprint": None, "kind": "full"}
+    state[key] = info
+    return info
+
+
+def collect_history_entries(state: Dict[str, Dict], directory: Path = None) -> List[RetentionEntry]:
+    directory = directory or HISTORY_DIR
+    entries = []
+    for p in directory.glob("scan_*.json"):
+        info = _describe(p, state)
+        entries.append(RetentionEntry(_timestamp_for(p), [p], info["kind"], info["fingerprint"],
+                                      history.scan_host(p.name)))
+    return entries
+
+
+def collect_export_entries(state: Dict[str, Dict], directory: Path = None) -> List[RetentionEntry]:
+    """Group export files sharing a timestamp (JSON + Markdown) into one entry.
+
+    Only names the exporter writes are considered; caches such as the fleet
+    cache, temp files and anything else in the directory are left alone.
+    """
+    directory = directory or EXPORTS_DIR
+    groups: Dict[str, List[Path]] = {}
+    for p in directory.iterdir():
+        if not is_export_name(p.name) or not p.is_file():
+            continue
+        m = _TS_RE.search(p.name)
+        key = m.group(1) if m else p.name
+        groups.setdefault(key, []).append(p)
+
+    entries = []
+    for paths in groups.values():
+        payload = next((p for p in paths if p.suffix == ".json"), None)
+        info = _describe(payload, state) if payload else {"fingerprint": None, "kind": "export"}
+        entries.append(RetentionEntry(_timestamp_for(paths[0]), sorted(paths), "export", info["fingerprint"]))
+    return entries
+
+
+def select(entries: List[RetentionEntry], policy: Dict = None, now: datetime = None) -> RetentionPlan:
+    """Split entries into keep/delete according to the tiered policy."""
+    policy = {**DEFAULT_POLICY, **(policy or {})}
+    now = now or datetime.now()
+    keep_all = now - timedelta(days=policy["keep_all_days"])
+    hourly = now - timedelta(days=policy["hourly_days"])
+
+    plan = RetentionPlan()
+    last_fp: Dict[tuple, Optional[str]] = {}
+    # Newest entry per bucket wins: the latest scan of a day is also the
+    # latest of its hour, so representatives stay stable as scans age.
+    seen_buckets = set()
+    for entry in sorted(entries, key=lambda e: e.timestamp, reverse=True):
+        if entry.timestamp >= keep_all:
+            plan.keep.append(entry)
+            continue
+        fmt = "%Y%m%d%H" if entry.timestamp >= hourly else "%Y%m%d"
+        bucket = (entry.host, entry.kind, entry.timestamp.strftime(fmt))
+        if bucket not in seen_buckets:
+            seen_buckets.add(bucket)
+            plan.keep.append(entry)
+        else:
+            plan.delete.append(entry)
+
+    if policy["keep_changes"]:
+        # Walk oldest-first and rescue any entry whose fingerprint differs
+        # from the previous scan of the same host and kind.
+        doomed = {id(e) for e in plan.delete}
+        rescued = []
+        for entry in sorted(entries, key=lambda e: e.timestamp):
+            series = (entry.host, entry.kind)
+            prev = last_fp.get(series)
+            changed = entry.fingerprint is not None and prev is not None and entry.fingerprint != prev
+            if changed and id(entry) in doomed:
+                rescued.append(entry)
+            if entry.fingerprint is not None:
+                last_fp[series] = entry.fingerprint
+        if rescued:
+            rescued_ids = {id(e) for e in rescued}
+            plan.delete = [e for e in plan.delete if id(e) not in rescued_ids]
+            plan.keep.extend(rescued)
+
+    plan.keep.sort(key=lambda e: e.timestamp)
+    plan.delete.sort(key=lambda e: e.timestamp)
+    return plan
+
+
+def plan_retention(policy: Dict = None, now: datetime = None) -> Dict[str, RetentionPlan]:
+    """Compute (but do not apply) plans for `history/` and `exports/`."""
+    policy = policy or load_policy()
+    state = _load_state()
+    history_entries = collect_history_entries(state)
+    export_entries = collect_export_entries(state)
+    # Forget fingerprints of files that no longer exist.
+    live = {p.name for e in history_entries + export_entries for p in e.paths}
+    _save_state({k: v for k, v in state.items() if k in live})
+    return {
+        "history": select(history_entries, policy, now),
+        "exports": select(export_entries, policy, now),
+    }
+
+
+def projected_savings(plans: Dict[str, RetentionPlan]) -> Dict[str, Dict]:
+    """Return the per-directory summary of what applying the plans would free."""
+    return {name: plan.summary() for name, plan in plans.items()}
+
+
+def apply_plan(plan: RetentionPlan, batch_size: int = None, pause: float = 0.0) -> int:
+    """Delete the files scheduled by a plan. Returns the number of bytes freed.
+
+    Deletions happen in batches of `batch_size` entries with an optional pause
+    between batches so a background run does not monopolise the disk.
+    """
+    state = _load_state()
+    freed = 0
+    batch_size = batch_size or len(plan.delete) or 1
+    for start in range(0, len(plan.delete), batch_size):
+        paths = [p for e in plan.delete[start:start + batch_size] for p in e.paths]
+        # history.delete_scans keeps the scan index in step with the files
+        freed += history.delete_scans(p for p in paths if p.parent == HISTORY_DIR)
+        for p in paths:
+            if p.parent != HISTORY_DIR:
+                try:
+                    size = p.stat().st_size
+                    p.unlink()
+                    freed += size
+                except FileNotFoundError:
+                    pass
+            state.pop(p.name, None)
+        if pause:
+            time.sleep(pause)
+    _save_state(state)
+    return freed
+
+
+class RetentionWorker(threading.Thread):
+    """Background thread that periodically plans and applies retention."""
+
+    def __init__(self, policy: Dict = None):
+        super().__init__(name="nexum-retention", daemon=True)
+        self.policy = policy or load_policy()
+        self._stop_event = threading.Event()
+        self.last_result: Optional[Dict] = None
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                plans = plan_retention(self.policy)
+                self.last_result = projected_savings(plans)
+                for plan in plans.values():
+                    apply_plan(plan, batch_size=self.policy["batch_size"], pause=0.05)
+            except Exception:
+                # Try again next interval; one bad pass must not end the worker.
+                audit_log.event("retention", "pass_failed", logging.ERROR, exc_info=True)
+            self._stop_event.wait(self.policy["interval_seconds"])
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def start_background(policy: Dict = None) -> Optional[RetentionWorker]:
+    """Start the retention worker if the policy enables it."""
+    policy = policy or load_policy()
+    if not policy.get("enabled"):
+        return None
+    worker = RetentionWorker(policy)
+    worker.start()
+    return worker
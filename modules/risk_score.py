@@ -3,67 +3,96 @@
 Provides a simple rule-based scoring system and helpers to format deductions.
 """
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
+from .models import Deduction, HostResult
 
 DEFAULT_BASE = 100
 
+FIREWALL_OFF = Deduction("Firewall is disabled", 20)
+AV_INACTIVE = Deduction("Antivirus is not active", 20)
+DISK_UNENCRYPTED = Deduction("Disk is not encrypted", 30)
+GUEST_ENABLED = Deduction("Guest account enabled", 10)
+UPDATES_OFF = Deduction("Automatic updates disabled", 10)
+
+# Status values each rule deducts for. Antivirus "not detected" and disk
+# "not encrypted" (what the checks report) are deliberately not in here:
+# adding them changes every stored score, so it needs its own migration.
+_OFF = ("off", "inactive", "disabled")
+_UNENCRYPTED = ("off", "unencrypted", "false")
+
+
+def _status(findings: Dict, section: str) -> str:
+    return str((findings.get(section) or {}).get("status", "unknown"))
+
+
+def _reported(section) -> str:
+    return section.reported_status() if section is not None else "unknown"
+
 
 class RiskScorer:
     def __init__(self, base: int = DEFAULT_BASE):
         self.base = base
 
-    def calculate_score(self, findings: Dict) -> Tuple[int, List[Dict]]:
+    def calculate_score(self, findings: Union[Dict, HostResult]) -> Tuple[int, List[Dict]]:
         """Calculate score and return (score, deductions_list).
 
-        findings: a dict containing keys like 'firewall', 'antivirus', 'disk_encryption', 'user_accounts', 'updates'
+        findings: a dict containing keys like 'firewall', 'antivirus', 'disk_encryption', 'user_accounts', 'updates',
+        or a `models.HostResult`
         deductions_list: list of {"reason": str, "points": int}
         """
-        score = self.base
+        if isinstance(findings, HostResult):
+            score, deductions = self.score_result(findings)
+        else:
+            if isinstance(findings.get("findings"), dict):
+                findings = findings["findings"]
+            score, deductions = self._apply(
+                _status(findings, "firewall"),
+                _status(findings, "antivirus"),
+                _status(findings, "disk_encryption"),
+                bool((findings.get("user_accounts") or {}).get("guest_enabled")),
+                findings.get("updates"),
+            )
+        return score, [d.to_dict() for d in deductions]
+
+    def score_result(self, result: HostResult) -> Tuple[int, List[Deduction]]:
+        """Score a typed result without walking its dict form.
+
+        The rules read each section's reported status, so this gives the same
+        score as `calculate_score` on the dict the result was built from.
+        """
+        users = result.user_accounts
+        return self._apply(
+            _reported(result.firewall),
+            _reported(result.antivirus),
+            _reported(result.disk_encryption),
+            users is not None and users.guest_enabled,
+            result.updates,
+        )
+
+    def _apply(self, firewall: str, antivirus: str, disk: str,
+               guest_enabled: bool, updates: Optional[bool]) -> Tuple[int, List[Deduction]]:
+        """The scoring rules, shared by the dict and typed paths."""
         deductions = []
-
-        # Firewall
-        fw = findings.get("firewall") or {}
-        fw_status = fw.get("status", "unknown").lower()
-        if fw_status in ("off", "inactive", "disabled"):
-            deductions.append({"reason": "Firewall is disabled", "points": 20})
-            score -= 20
-
-        # Antivirus
-        av = findings.get("antivirus") or {}
-        av_status = av.get("status", "unknown").lower()
-        if av_status in ("off", "inactive", "disabled"):
-            deductions.append({"reason": "Antivirus is not active", "points": 20})
-            score -= 20
-
-        # Disk encryption
-        disk = findings.get("disk_encryption") or {}
-        disk_status = disk.get("status", "unknown").lower()
-        if disk_status in ("off", "unencrypted", "false"):
-            deductions.append({"reason": "Disk is not encrypted", "points": 30})
-            score -= 30
-
-        # Guest account
-        users = findings.get("user_accounts") or {}
-        if users.get("guest_enabled"):
-            deductions.append({"reason": "Guest account enabled", "points": 10})
-            score -= 10
-
-        # Updates
-        updates = findings.get("updates")
+        if firewall.lower() in _OFF:
+            deductions.append(FIREWALL_OFF)
+        if antivirus.lower() in _OFF:
+            deductions.append(AV_INACTIVE)
+        if disk.lower() in _UNENCRYPTED:
+            deductions.append(DISK_UNENCRYPTED)
+        if guest_enabled:
+            deductions.append(GUEST_ENABLED)
         if updates is False:
-            deductions.append({"reason": "Automatic updates disabled", "points": 10})
-            score -= 10
+            deductions.append(UPDATES_OFF)
 
+        score = self.base
+        for d in deductions:
+            score -= d.points
         # Clamp
         if score < 0:
             score = 0
-        if score > self.base:
-            score = self.base
-
         return score, deductions
 
-
 def interpret_band(score: int) -> Tuple[str, str]:
     """Return (band, color) for a numeric score."""
     if score >= 80:
@@ -0,0 +1,512 @@
+"""The one place the check modules and remediation start external commands.
+
+`run` behaves like `subprocess.run(cmd, capture_output=True, text=True)`,
+with four differences:
+
+* It always applies a timeout: the smaller of the per-command default and
+  whatever is left of the current `CancelToken`'s deadline. The scanner
+  (see `modules/scanner.py`) gives each check its own token and makes it
+  current with `use`. Cancelling the token kills the check's running
+  commands, and anything they started, at once.
+* stdout and stderr are each capped at `MAX_OUTPUT` bytes. The rest is read
+  and counted but not kept, and `result.truncated` is set.
+* Commands run with `DEFAULT_ENV` (`LC_ALL=C`) over the inherited
+  environment, so the parsers always see the same untranslated output.
+* Within a scan, identical commands (same arguments and environment) run
+  once. The scan's `Session` hands later callers the first result.
+
+Every call is recorded with its exit code, duration and byte counts, both in
+its scan's `Session` and in process-wide totals (`stats()`). While a
+`tracing.Tracer` is current, each call is also a span with its wall time,
+the child's CPU time and the bytes read (see `modules/tracing.py`).
+
+Checks read files with `read_file`, and query the OS from Python with
+`probe`. For example, `system()` stands in for `platform.system()`. While a
+probe source is current (`use_source`; see `modules/replay.py`), commands,
+file reads and probes are captured into a bundle, or answered from one
+without touching the system.
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Mapping, Optional, Sequence, Tuple
+import locale
+import os
+import platform
+import selectors
+import signal
+import subprocess
+import threading
+import time
+
+from . import tracing
+
+DEFAULT_TIMEOUT = 10.0
+MAX_OUTPUT = 16 * 1024 * 1024          # bytes kept per stream
+READ_SIZE = 64 * 1024
+DEFAULT_ENV = {"LC_ALL": "C", "LANG": "C"}
+RECENT_CALLS = 256
+
+HAVE_PIDFD = hasattr(os, "pidfd_open")  # Linux 5.3+
+
+
+class Cancelled(Exception):
+    """The scan was cancelled while a command was running or about to start."""
+
+
+class Completed(subprocess.CompletedProcess):
+    """`subprocess.CompletedProcess` plus how the output was obtained."""
+
+    def __init__(self, args, returncode, stdout, stderr, duration: float = 0.0,
+                 truncated: bool = False, cached: bool = False):
+        super().__init__(args, returncode, stdout, stderr)
+        self.duration = duration
+        self.truncated = truncated
+        self.cached = cached
+
+
+@dataclass(slots=True)
+class CallRecord:
+    cmd: Tuple[str, ...]
+    outcome: str                      # "ok", "timed_out", "cancelled" or "error"
+    returncode: Optional[int] = None
+    duration: float = 0.0
+    stdout_bytes: int = 0
+    stderr_bytes: int = 0
+    truncated: bool = False
+    cached: bool = False
+
+    def to_dict(self) -> Dict:
+        return {
+            "cmd": " ".join(self.cmd), "outcome": self.outcome, "returncode": self.returncode,
+            "duration": round(self.duration, 4), "bytes": self.stdout_bytes + self.stderr_bytes,
+            "truncated": self.truncated, "cached": self.cached,
+        }
+
+
+_totals = {"calls": 0, "cached": 0, "failed": 0, "timed_out": 0, "cancelled": 0, "bytes": 0, "seconds": 0.0}
+_recent: Deque[CallRecord] = deque(maxlen=RECENT_CALLS)
+_totals_lock = threading.Lock()
+
+
+def stats() -> Dict:
+    """Process-wide totals over every command run so far."""
+    with _totals_lock:
+        return dict(_totals)
+
+
+def recent_calls() -> List[CallRecord]:
+    with _totals_lock:
+        return list(_recent)
+
+
+def _record(record: CallRecord, session: Optional["Session"]):
+    with _totals_lock:
+        _totals["calls"] += 1
+        _totals["bytes"] += record.stdout_bytes + record.stderr_bytes
+        _totals["seconds"] += record.duration
+        if record.cached:
+            _totals["cached"] += 1
+        if record.outcome in ("timed_out", "cancelled"):
+            _totals[record.outcome] += 1
+        elif record.outcome == "error" or record.returncode:
+            _totals["failed"] += 1
+        _recent.append(record)
+    if session is not None:
+        session._add(record)
+
+
+class Session:
+    """Memoized results and call records for one scan."""
+
+    def __init__(self, memoize: bool = True):
+        self.memoize = memoize
+        self.calls: List[CallRecord] = []
+        self._cache: Dict[Tuple, Completed] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: Tuple) -> Optional[Completed]:
+        with self._lock:
+            return self._cache.get(key)
+
+    def _put(self, key: Tuple, result: Completed):
+        with self._lock:
+            self._cache[key] = result
+
+    def _add(self, record: CallRecord):
+        with self._lock:
+            self.calls.append(record)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            calls = list(self.calls)
+        return {
+            "count": len(calls),
+            "cached": sum(1 for c in calls if c.cached),
+            "bytes": sum(c.stdout_bytes + c.stderr_bytes for c in calls),
+            "seconds": round(sum(c.duration for c in calls if not c.cached), 3),
+        }
+
+
+class CancelToken:
+    """Deadline plus cancellation flag shared by a scan and its checks.
+
+    Child tokens (one per check) get their own, shorter deadline, share their
+    parent's `Session`, and are cancelled together with their parent.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, parent: "CancelToken" = None,
+                 session: Session = None):
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        if parent is not None and parent.deadline is not None:
+            self.deadline = parent.deadline if self.deadline is None else min(self.deadline, parent.deadline)
+        self.session = session if session is not None or parent is None else parent.session
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._procs: List[subprocess.Popen] = []
+        self._children: List["CancelToken"] = []
+        if parent is not None:
+            parent._adopt(self)
+
+    def _adopt(self, child: "CancelToken"):
+        with self._lock:
+            self._children.append(child)
+            cancelled = self._event.is_set()
+        if cancelled:
+            child.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (None when there is no deadline)."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds; True if cancelled meanwhile."""
+        return self._event.wait(timeout)
+
+    def cancel(self):
+        """Cancel this token and its children, killing their running commands."""
+        with self._lock:
+            self._event.set()
+            procs, children = list(self._procs), list(self._children)
+        for proc in procs:
+            _kill(proc)
+        for child in children:
+            child.cancel()
+
+    def _register(self, proc: subprocess.Popen) -> bool:
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self._procs.append(proc)
+            return True
+
+    def _unregister(self, proc: subprocess.Popen):
+        with self._lock:
+            if proc in self._procs:
+                self._procs.remove(proc)
+
+
+_current: ContextVar[Optional[CancelToken]] = ContextVar("nexum_cancel_token", default=None)
+# A replay.Recorder or replay.Replayer; anything with the same methods works.
+_source: ContextVar[Optional[Any]] = ContextVar("nexum_probe_source", default=None)
+
+
+def current_token() -> Optional[CancelToken]:
+    return _current.get()
+
+
+@contextmanager
+def use(token: CancelToken):
+    """Make `token` govern every `run` call in this context (thread)."""
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+
+
+@contextmanager
+def use_source(source):
+    """Record into, or replay from, `source` in this context (thread)."""
+    reset = _source.set(source)
+    try:
+        yield source
+    finally:
+        _source.reset(reset)
+
+
+def replaying() -> bool:
+    """Whether calls in this context are answered from a recording instead of the host."""
+    source = _source.get()
+    return source is not None and source.replaying
+
+
+def _kill(proc: subprocess.Popen):
+    """Kill a command and anything it started (its process group on POSIX)."""
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (OSError, ProcessLookupError):
+        pass
+
+
+def effective_timeout(timeout: Optional[float] = None, token: CancelToken = None) -> float:
+    timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+    remaining = token.remaining() if token is not None else None
+    return timeout if remaining is None else min(timeout, remaining)
+
+
+def _drain(stream, limit: int, out: List):
+    """Read `stream` to EOF, keeping at most `limit` bytes; out = [data, total]."""
+    kept = bytearray()
+    total = 0
+    try:
+        while True:
+            chunk = stream.read1(READ_SIZE)
+            if not chunk:
+                break
+            total += len(chunk)
+            if len(kept) < limit:
+                kept += chunk[:limit - len(kept)]
+    finally:
+        stream.close()
+        out[:] = [bytes(kept), total]
+
+
+def _collect_threads(proc: subprocess.Popen, timeout: float, limit: int) -> Tuple[List, List, bool]:
+    """Drain both pipes on threads while waiting for the exit status."""
+    out: List = [b"", 0]
+    err: List = [b"", 0]
+    readers = [threading.Thread(target=_drain, args=(proc.stdout, limit, out), daemon=True),
+               threading.Thread(target=_drain, args=(proc.stderr, limit, err), daemon=True)]
+    for t in readers:
+        t.start()
+    timed_out = False
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill(proc)
+        proc.wait()
+        timed_out = True
+    for t in readers:
+        t.join()
+    return out, err, timed_out
+
+
+def _collect_select(proc: subprocess.Popen, timeout: float, limit: int) -> Tuple[List, List, bool]:
+    """Drain both pipes from this thread with a selector (POSIX): no extra threads per call.
+
+    On Linux the process's pidfd is watched too, so its exit is noticed at
+    once; `Popen.wait(timeout)` would poll with sleeps instead.
+    """
+    deadline = time.monotonic() + timeout
+    out, err = [bytearray(), 0], [bytearray(), 0]
+    bufs = {proc.stdout.fileno(): out, proc.stderr.fileno(): err}
+    pidfd = None
+    if HAVE_PIDFD:
+        try:
+            pidfd = os.pidfd_open(proc.pid)
+        except OSError:
+            pass
+    timed_out = False
+    try:
+        with selectors.DefaultSelector() as sel:
+            for stream in (proc.stdout, proc.stderr):
+                sel.register(stream, selectors.EVENT_READ)
+            if pidfd is not None:
+                sel.register(pidfd, selectors.EVENT_READ)
+            # Until both pipes hit EOF and (with a pidfd) the process has exited.
+            while sel.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                for key, _ in sel.select(remaining):
+                    if key.fd == pidfd:
+                        sel.unregister(pidfd)
+                        continue
+                    chunk = os.read(key.fd, READ_SIZE)
+                    if not chunk:
+                        sel.unregister(key.fileobj)
+                        continue
+                    buf = bufs[key.fd]
+                    buf[1] += len(chunk)
+                    if len(buf[0]) < limit:
+                        buf[0] += chunk[:limit - len(buf[0])]
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+    if not timed_out:
+        try:
+            proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            timed_out = True
+    if timed_out:
+        _kill(proc)
+        proc.wait()
+    proc.stdout.close()
+    proc.stderr.close()
+    return [bytes(out[0]), out[1]], [bytes(err[0]), err[1]], timed_out
+
+
+_collect = _collect_select if os.name == "posix" else _collect_threads
+
+
+def _decode(data: bytes) -> str:
+    # Same decoding as text=True, but never fails on a stray byte.
+    text = data.decode(locale.getpreferredencoding(False), errors="replace")
+    return text.replace("\r\n", "\n")
+
+
+def run(cmd: Sequence[str], timeout: Optional[float] = None, env: Mapping[str, str] = None,
+        max_output: int = MAX_OUTPUT, memoize: bool = True) -> Completed:
+    """Run a command and return its decoded output.
+
+    `env` entries are applied over `DEFAULT_ENV` and the inherited
+    environment. Pass `memoize=False` for commands that change the system.
+
+    Raises `subprocess.TimeoutExpired` when the command outlives its timeout
+    or the current token's deadline, and `Cancelled` when the token is
+    cancelled; in both cases the command has been killed.
+    """
+    cmd = tuple(cmd)
+    span = tracing.begin(" ".join(cmd), "command")
+    try:
+        return _run(cmd, timeout, env, max_output, memoize, span)
+    finally:
+        tracing.end(span)
+
+
+def _run(cmd: Tuple[str, ...], timeout: Optional[float], env: Optional[Mapping[str, str]], max_output: int,
+         memoize: bool, span: Optional[tracing.Span]) -> Completed:
+    source = _source.get()
+    if source is not None and source.replaying:
+        result = source.replay_command(cmd, env)
+        if span is not None:
+            span.args["replayed"] = True
+            span.bytes = len(result.stdout) + len(result.stderr)
+        return result
+    token = current_token()
+    session = token.session if token is not None else None
+    overrides = {**DEFAULT_ENV, **(env or {})}
+    key = (cmd, tuple(sorted(overrides.items())))
+    if session is not None and session.memoize and memoize:
+        hit = session._get(key)
+        if hit is not None:
+            _record(CallRecord(cmd, "ok", hit.returncode, truncated=hit.truncated, cached=True), session)
+            if span is not None:
+                span.args["cached"] = True
+            return Completed(hit.args, hit.returncode, hit.stdout, hit.stderr, 0.0, hit.truncated, cached=True)
+
+    if token is not None and token.cancelled:
+        raise Cancelled(f"Cancelled before running {cmd[0]}")
+    limit = effective_timeout(timeout, token)
+    if limit <= 0:
+        _record(CallRecord(cmd, "timed_out"), session)
+        raise subprocess.TimeoutExpired(list(cmd), 0)
+
+    start = time.perf_counter()
+    cpu0 = tracing.child_cpu() if span is not None else 0.0
+    kwargs = {"start_new_session": True} if os.name == "posix" else {}
+    try:
+        proc = subprocess.Popen(list(cmd), stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, env={**os.environ, **overrides}, **kwargs)
+    except OSError as e:
+        _record(CallRecord(cmd, "error", duration=time.perf_counter() - start), session)
+        if span is not None:
+            span.args["outcome"] = "error"
+        if source is not None:
+            source.add_command(cmd, env, error=e)
+        raise
+    if token is not None and not token._register(proc):
+        _kill(proc)
+    # Both pipes are drained together, so a chatty stderr cannot stall the
+    # command while stdout is being read.
+    try:
+        out, err, timed_out = _collect(proc, limit, max_output)
+    finally:
+        if token is not None:
+            token._unregister(proc)
+    outcome = "timed_out" if timed_out else "ok"
+    if outcome == "ok" and token is not None and token.cancelled:
+        outcome = "cancelled"
+
+    duration = time.perf_counter() - start
+    truncated = out[1] > len(out[0]) or err[1] > len(err[0])
+    if span is not None:
+        span.children = 1
+        span.bytes = out[1] + err[1]
+        span.child_cpu = tracing.child_cpu() - cpu0
+        span.args["outcome"] = outcome
+    _record(CallRecord(cmd, outcome, proc.returncode, duration, out[1], err[1], truncated), session)
+    if outcome == "timed_out":
+        if source is not None:
+            source.add_command(cmd, env, timed_out=limit)
+        raise subprocess.TimeoutExpired(list(cmd), limit, output=_decode(out[0]), stderr=_decode(err[0]))
+    if outcome == "cancelled":
+        raise Cancelled(f"Cancelled while running {cmd[0]}")
+
+    result = Completed(list(cmd), proc.returncode, _decode(out[0]), _decode(err[0]), duration, truncated)
+    if session is not None and session.memoize and memoize:
+        session._put(key, result)
+    if source is not None:
+        source.add_command(cmd, env, result=result)
+    return result
+
+
+def read_file(path: str) -> str:
+    """Read a text file a check inspects (captured and replayed like a command)."""
+    with tracing.span(str(path), "file") as span:
+        source = _source.get()
+        if source is not None and source.replaying:
+            data = source.replay_file(path)
+        else:
+            try:
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    data = f.read()
+            except OSError as e:
+                if source is not None:
+                    source.add_file(path, error=e)
+                raise
+            if source is not None:
+                source.add_file(path, data)
+        if span is not None:
+            span.bytes = len(data)
+        return data
+
+
+def probe(name: str, func: Callable[[], Any], trace: bool = True) -> Any:
+    """Call `func` for a Python-level system query (captured and replayed by `name`).
+
+    The value must be JSON-serializable so it can be stored in a bundle.
+    Pass `trace=False` for trivial queries not worth a span.
+    """
+    source = _source.get()
+    if source is not None and source.replaying:
+        return source.replay_probe(name)
+    if trace:
+        with tracing.span(f"probe {name}", "probe"):
+            value = func()
+    else:
+        value = func()
+    if source is not None:
+        source.add_probe(name, value)
+    return value
+
+
+def system() -> str:
+    """`platform.system()`, lower-cased, through `probe` so replays use the recorded OS."""
+    return probe("platform.system", platform.system, trace=False).lower()
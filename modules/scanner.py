@@ -0,0 +1,240 @@
+"""Run a set of checks under one scan-wide deadline.
+
+Each check in `CHECKS` declares a relative cost. When a check starts it gets
+a share of the time still left, in proportion to its cost among the checks
+not yet run, so time a fast check does not use carries over to the later
+ones. A check runs on its own thread with its own `runner.CancelToken`:
+
+* when its budget runs out, its commands are killed and it is reported as
+  `{"status": "timed_out"}`, even if it is stuck in Python code (a slow DNS
+  lookup) that cannot be interrupted;
+* `Scan.cancel()` kills whatever is running and skips the remaining checks;
+* a check whose `requires` names privileges this process lacks
+  (`permissions.capabilities()`) is reported as
+  `{"status": "insufficient_privilege"}` without running, so nothing is
+  spawned for output that would be an error message.
+
+A scan therefore never takes much longer than its deadline (plus `GRACE`
+for a check to notice its token).
+
+Scan start, each check's outcome and the scan's end are written to the audit
+log (`modules/audit_log.py`).
+
+Every scan is traced (`modules/tracing.py`): a span for the scan, one per
+check and one per command, stored under `scan.trace` in the payload. With a
+`tracing.Profiler`, the scan and check threads are also run under cProfile.
+
+    scan = Scan(QUICK_SCAN)
+    results = scan.run()          # {"firewall": {...}, "antivirus": {...}}
+"""
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import contextvars
+import threading
+import time
+
+from . import audit_log, av_check, config as config_mod, disk_encryption, firewall_check, network_info, runner, tracing, user_audit
+from . import os_detect, permissions
+from .risk_score import RiskScorer
+
+DEFAULT_DEADLINE = 60.0
+GRACE = 0.5  # time a check gets after its budget to return on its own
+
+TIMED_OUT = "timed_out"
+CANCELLED = "cancelled"
+INSUFFICIENT_PRIVILEGE = "insufficient_privilege"
+
+
+@dataclass(frozen=True)
+class Check:
+    name: str                    # key of the check's section in the scan result
+    label: str                   # progress text
+    func: Callable[[], Dict]
+    cost: float                  # relative share of the deadline
+    # OS name -> privileges the check needs there (see `permissions.Capabilities.has`).
+    requires: Callable[[str], Tuple[str, ...]] = lambda system: ()
+
+
+def _firewall_requires(system: str) -> Tuple[str, ...]:
+    # ufw refuses to run for anyone but root and prints an error instead of the status.
+    return ("root",) if system == "linux" else ()
+
+
+CHECKS: Dict[str, Check] = {c.name: c for c in (
+    Check("firewall", "Checking firewall status", firewall_check.get_status, 1.0, _firewall_requires),
+    Check("antivirus", "Checking antivirus status", av_check.get_av_status, 2.0),
+    Check("disk_encryption", "Checking disk encryption", disk_encryption.get_encryption_status, 2.0),
+    Check("user_accounts", "Auditing user accounts", user_audit.get_user_accounts, 2.0),
+    Check("network", "Gathering network information", network_info.get_network_info, 3.0),
+)}
+
+QUICK_SCAN = ("firewall", "antivirus")
+FULL_AUDIT = tuple(CHECKS)
+
+
+def load_deadline() -> float:
+    """The scan deadline in seconds ("scan_deadline" in config.json)."""
+    value = config_mod.load_config().get("scan_deadline")
+    return float(value) if isinstance(value, (int, float)) and value > 0 else DEFAULT_DEADLINE
+
+
+def split_budget(remaining: float, cost: float, pending_cost: float) -> float:
+    """The share of `remaining` seconds for a check of `cost` among `pending_cost`."""
+    if pending_cost <= 0:
+        return remaining
+    return remaining * cost / pending_cost
+
+
+class Scan:
+    """One run of `checks` with a deadline; `cancel` may be called from any thread."""
+
+    def __init__(self, checks: Iterable[str] = FULL_AUDIT, deadline: Optional[float] = None,
+                 profiler: Optional[tracing.Profiler] = None):
+        self.checks: List[Check] = [CHECKS[name] for name in checks]
+        self.deadline = deadline if deadline is not None else load_deadline()
+        # One session per scan: checks share memoized command results.
+        self.token = runner.CancelToken(self.deadline, session=runner.Session())
+        self.timed_out: List[str] = []
+        self.insufficient_privilege: List[str] = []
+        self.durations: Dict[str, float] = {}
+        self.elapsed = 0.0
+        self.tracer = tracing.Tracer()
+        self.profiler = profiler
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token.cancelled
+
+    def cancel(self):
+        self.token.cancel()
+
+    def _profiling(self):
+        return self.profiler.thread() if self.profiler is not None else nullcontext()
+
+    def run(self, progress: Callable[[Check], None] = None) -> Dict[str, Dict]:
+        """Run the checks in order; returns {check name: result dict}."""
+        with tracing.use(self.tracer), tracing.span("scan", "scan", deadline=self.deadline), self._profiling():
+            return self._run(progress)
+
+    def _run(self, progress: Optional[Callable[[Check], None]]) -> Dict[str, Dict]:
+        start = time.monotonic()
+        audit_log.event("scan", "scan_started", checks=[c.name for c in self.checks], deadline=self.deadline)
+        results: Dict[str, Dict] = {}
+        pending_cost = sum(c.cost for c in self.checks)
+        for check in self.checks:
+            if self.token.cancelled:
+                results[check.name] = {"status": CANCELLED}
+                continue
+            missing = self._missing_privileges(check)
+            if missing:
+                # Its share of the deadline carries over to the checks that do run.
+                pending_cost -= check.cost
+                self.insufficient_privilege.append(check.name)
+                self.durations[check.name] = 0.0
+                results[check.name] = {"status": INSUFFICIENT_PRIVILEGE, "missing": missing,
+                                       "error": f"Requires {', '.join(missing)}"}
+                audit_log.event("scan", "check", check=check.name, status=INSUFFICIENT_PRIVILEGE, missing=missing)
+                continue
+            budget = split_budget(self.token.remaining(), check.cost, pending_cost)
+            pending_cost -= check.cost
+            if progress:
+                progress(check)
+            began = time.monotonic()
+            results[check.name] = result = self._run_check(check, budget)
+            self.durations[check.name] = round(time.monotonic() - began, 3)
+            status = result.get("status") if isinstance(result, dict) else None
+            audit_log.event("scan", "check", check=check.name, status=status, duration=self.durations[check.name],
+                            **({"error": result.get("error")} if status in ("error", TIMED_OUT) else {}))
+        self.elapsed = time.monotonic() - start
+        audit_log.event("scan", "scan_finished", elapsed=round(self.elapsed, 3), timed_out=self.timed_out,
+                        cancelled=self.token.cancelled)
+        return results
+
+    @staticmethod
+    def _missing_privileges(check: Check) -> List[str]:
+        # A replay answers from the recording host, whatever this process may do.
+        if runner.replaying():
+            return []
+        requires = check.requires(runner.system())
+        return permissions.capabilities().missing(requires) if requires else []
+
+    def _run_check(self, check: Check, budget: float) -> Dict:
+        token = runner.CancelToken(budget, parent=self.token)
+        outcome: Dict[str, Dict] = {}
+        done = threading.Event()
+
+        def worker():
+            try:
+                with runner.use(token), tracing.span(check.name, "check", budget=round(budget, 3)) as span, \
+                        self._profiling():
+                    try:
+                        outcome["result"] = check.func()
+                    except Exception as e:
+                        outcome["result"] = {"status": "error", "error": str(e)}
+                    status = outcome["result"].get("status") if isinstance(outcome["result"], dict) else None
+                    if span is not None and isinstance(status, str):
+                        span.args["status"] = status
+            except Exception as e:
+                # Tracing or profiling failed around the check; report it rather than time out.
+                outcome.setdefault("result", {"status": "error", "error": str(e)})
+            finally:
+                # Past its deadline the check's commands were refused or killed,
+                # so whatever it returned is partial at best.
+                outcome["late"] = token.expired
+                done.set()
+
+        # The check thread sees this thread's context (e.g. a replay.Recorder,
+        # the tracer and the scan span).
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(worker,), name=f"check-{check.name}", daemon=True).start()
+        # Wake up on cancel as well as on completion; a check stuck past its
+        # budget plus GRACE is abandoned (its thread is a daemon).
+        limit = time.monotonic() + budget + GRACE
+        while not done.wait(min(0.05, max(0.0, limit - time.monotonic()))):
+            if token.cancelled or time.monotonic() >= limit:
+                break
+        if self.token.cancelled:
+            token.cancel()
+            return {"status": CANCELLED}
+        if not done.is_set() or outcome["late"]:
+            token.cancel()
+            self.timed_out.append(check.name)
+            return {"status": TIMED_OUT, "error": f"Check did not finish within its {budget:.1f}s budget"}
+        return outcome["result"]
+
+    def summary(self) -> Dict:
+        """Scan metadata to store alongside the findings."""
+        return {
+            "deadline": self.deadline,
+            "elapsed": round(self.elapsed, 3),
+            "durations": self.durations,
+            "timed_out": self.timed_out,
+            "insufficient_privilege": self.insufficient_privilege,
+            "commands": self.token.session.summary(),
+            "trace": self.tracer.to_list(),
+        }
+
+
+def build_payload(scan: Scan, results: Dict[str, Dict], quick: bool = False) -> Dict:
+    """Assemble and score the payload the GUIs save and export.
+
+    Quick scans nest their findings under "findings"; full audits are flat.
+    """
+    os_name, os_version = os_detect.get_os_info()
+    osinfo = {"name": os_name, "version": os_version}
+    score, deductions = RiskScorer().calculate_score(results)
+    if quick:
+        data = {
+            "timestamp": datetime.now().isoformat(),
+            "type": "quick",
+            "os": osinfo,
+            "findings": {"os": osinfo, **results},
+        }
+    else:
+        data = {"timestamp": datetime.now().isoformat(), "os": osinfo, **results}
+    data["risk_score"] = score
+    data["deductions"] = deductions
+    data["scan"] = scan.summary()
+    return data
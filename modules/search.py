@@ -0,0 +1,323 @@
+"""Field and full-text search over scan history.
+
+Each saved scan is turned into a set of terms:
+
+- `p:<path>`          the field path exists (e.g. `p:antivirus.error`)
+- `f:<path>=<value>`  the field has that value (lower-cased)
+- `t:<token>`         a word, IP address or name appearing in any value
+
+List indices are dropped from paths, so every user's name lives under
+`user_accounts.users.username`, and quick scans' `findings.` prefix is
+removed so both scan types share paths.
+
+Terms are appended to `history/search.jsonl` as one line per scan
+(`history.save_scan` calls `index_scan`). The in-memory inverted index only
+reads the bytes appended since its last refresh, so queries stay fast while
+scans keep arriving. `rebuild()` regenerates the log from the scan files.
+
+Query syntax::
+
+    field:antivirus.status="not detected" AND user:guest
+    ip:10.0.0.5 OR ip:10.0.0.6
+    NOT field:firewall.status=active
+    (user:root OR user:admin) AND "bitlocker"
+"""
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+import heapq
+import re
+import threading
+
+from . import serializer
+from .history import HISTORY_DIR
+
+INDEX_LOG = HISTORY_DIR / "search.jsonl"
+
+# Shorthand prefixes for common fields.
+ALIASES = {
+    "user": "user_accounts.users.username",
+    "ip": "network.interfaces.addresses.addr",
+    "iface": "network.interfaces.name",
+    "av": "antivirus.status",
+    "firewall": "firewall.status",
+    "disk": "disk_encryption.status",
+    "type": "type",
+}
+
+# Keys not worth indexing (time is kept separately for sorting; "scan" is timings).
+SKIP_KEYS = ("timestamp", "scan")
+
+_TOKEN_RE = re.compile(r"[\w][\w.:@/-]*")
+_PART_RE = re.compile(r"[.:@/-]")
+_QUERY_RE = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+(?:"[^"]*")?')
+
+
+class QueryError(ValueError):
+    pass
+
+
+@lru_cache(maxsize=65536)
+def _token_terms(text: str) -> FrozenSet[str]:
+    """Return the `t:` terms for a lower-cased value.
+
+    Cached: statuses, shells, user names and the like repeat across scans.
+    """
+    found = set(_TOKEN_RE.findall(text))
+    # Also index the parts of dotted/pathed tokens (hosts, paths, addresses)
+    for tok in list(found):
+        found.update(p for p in _PART_RE.split(tok) if p)
+    return frozenset(f"t:{tok}" for tok in found)
+
+
+def extract_terms(data: Dict) -> Set[str]:
+    """Return every index term for a scan payload."""
+    terms: Set[str] = set()
+
+    def walk(value, path):
+        if isinstance(value, dict):
+            for k, v in value.items():
+                if k in SKIP_KEYS:
+                    continue
+                walk(v, f"{path}.{k}" if path else str(k))
+        elif isinstance(value, list):
+            for item in value:
+                walk(item, path)
+        else:
+            if path.startswith("findings."):
+                path = path[len("findings."):]
+            text = str(value).lower()
+            terms.add(f"p:{path}")
+            terms.add(f"f:{path}={text}")
+            terms.update(_token_terms(text))
+
+    walk(data, "")
+    return terms
+
+
+class SearchIndex:
+    """In-memory inverted index backed by an append-only JSON-lines log."""
+
+    def __init__(self, log_path: Path = INDEX_LOG):
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.postings: Dict[str, Set[int]] = {}
+        self.docs: List[Dict] = []
+        self._sort_keys: List[tuple] = []
+        self.by_file: Dict[str, int] = {}
+        self.deleted: Set[int] = set()
+        self._offset = 0
+
+    def _apply(self, rec: Dict):
+        if "forget" in rec:
+            for name in rec["forget"]:
+                doc_id = self.by_file.pop(name, None)
+                if doc_id is not None:
+                    self.deleted.add(doc_id)
+            return
+        doc_id = len(self.docs)
+        old = self.by_file.get(rec["file"])
+        if old is not None:
+            self.deleted.add(old)
+        self.docs.append({"file": rec["file"], "time": rec.get("time", "")})
+        self._sort_keys.append((rec.get("time", ""), rec["file"]))
+        self.by_file[rec["file"]] = doc_id
+        for term in rec["terms"]:
+            self.postings.setdefault(term, set()).add(doc_id)
+
+    def refresh(self):
+        """Read log lines appended since the last refresh."""
+        with self._lock:
+            try:
+                size = self.log_path.stat().st_size
+            except FileNotFoundError:
+                self._reset()
+                return
+            if size < self._offset:  # log was rebuilt
+                self._reset()
+            if size == self._offset:
+                return
+            with open(self.log_path, "rb") as f:
+                f.seek(self._offset)
+                chunk = f.read()
+            # Only consume complete lines; a writer may be mid-append.
+            end = chunk.rfind(b"\n") + 1
+            for line in chunk[:end].splitlines():
+                try:
+                    self._apply(serializer.loads(line))
+                except ValueError:
+                    continue
+            self._offset += end
+
+    def _append(self, *recs: Dict):
+        with open(self.log_path, "ab") as f:
+            f.write(b"".join(serializer.dumps(rec) + b"\n" for rec in recs))
+
+    def add(self, name: str, data: Dict):
+        self.add_many([(name, data)])
+
+    def add_many(self, items: Iterable):
+        """Append one log record per (name, data) pair in a single write."""
+        self._append(*(
+            {"file": name, "time": str(data.get("timestamp", "")), "terms": sorted(extract_terms(data))}
+            for name, data in items
+        ))
+
+    def forget(self, names: Iterable[str]):
+        names = list(names)
+        if names:
+            self._append({"forget": names})
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Return matching scans as [{file, time}], newest first."""
+        self.refresh()
+        matches = _Parser(query, self).parse()
+        matches -= self.deleted
+        key = self._sort_keys.__getitem__
+        if limit:
+            ids = heapq.nlargest(limit, matches, key=key)
+        else:
+            ids = sorted(matches, key=key, reverse=True)
+        return [self.docs[i] for i in ids]
+
+    def term(self, term: str) -> Set[int]:
+        return self.postings.get(term, set())
+
+    def all_docs(self) -> Set[int]:
+        return set(range(len(self.docs)))
+
+
+class _Parser:
+    """Recursive-descent parser: OR < AND (explicit or implicit) < NOT < atom."""
+
+    def __init__(self, query: str, index: SearchIndex):
+        self.tokens = _QUERY_RE.findall(query)
+        self.pos = 0
+        self.index = index
+
+    def parse(self) -> Set[int]:
+        if not self.tokens:
+            raise QueryError("Empty query")
+        result = self._or()
+        if self.pos != len(self.tokens):
+            raise QueryError(f"Unexpected token: {self.tokens[self.pos]}")
+        return set(result)
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _or(self) -> Set[int]:
+        result = self._and()
+        while self._peek() == "OR":
+            self.pos += 1
+            result = result | self._and()
+        return result
+
+    def _and(self) -> Set[int]:
+        result = self._not()
+        while self._peek() not in (None, "OR", ")"):
+            if self._peek() == "AND":
+                self.pos += 1
+            result = result & self._not()
+        return result
+
+    def _not(self) -> Set[int]:
+        if self._peek() == "NOT":
+            self.pos += 1
+            return self.index.all_docs() - self._not()
+        return self._atom()
+
+    def _atom(self) -> Set[int]:
+        tok = self._peek()
+        if tok is None:
+            raise QueryError("Unexpected end of query")
+        self.pos += 1
+        if tok == "(":
+            result = self._or()
+            if self._peek() != ")":
+                raise QueryError("Missing closing parenthesis")
+            self.pos += 1
+            return result
+        return self._term(tok)
+
+    def _term(self, tok: str) -> Set[int]:
+        prefix, sep, rest = tok.partition(":")
+        if sep and not tok.startswith('"'):
+            if prefix == "field":
+                path, eq, value = rest.partition("=")
+                if not eq:
+                    return set(self.index.term(f"p:{path}"))
+                value = value.strip('"').lower()
+                return set(self.index.term(f"f:{path}={value}"))
+            if prefix in ALIASES:
+                value = rest.strip('"').lower()
+                return set(self.index.term(f"f:{ALIASES[prefix]}={value}"))
+        # Free text: every word must appear somewhere in the scan
+        words = _TOKEN_RE.findall(tok.strip('"').lower())
+        if not words:
+            return set()
+        result = set(self.index.term(f"t:{words[0]}"))
+        for w in words[1:]:
+            result &= self.index.term(f"t:{w}")
+        return result
+
+
+_index = SearchIndex()
+
+
+def index_scan(path: Path, data: Dict):
+    """Add a saved scan to the index."""
+    index_scans([path], [data])
+
+
+def index_scans(paths: List[Path], batch: List[Dict]):
+    """Add saved scans to the index. Called by `history.save_scans`."""
+    with _index._lock:
+        _index.add_many((p.name, data) for p, data in zip(paths, batch))
+
+
+def forget(names: Iterable[str]):
+    """Drop deleted scans from the index. Called by `history.delete_scans`."""
+    with _index._lock:
+        _index.forget(names)
+
+
+def search(query: str, limit: Optional[int] = None) -> List[Dict]:
+    return _index.search(query, limit)
+
+
+def is_query(text: str) -> bool:
+    """Whether `text` uses field syntax (`field:...` or an alias such as `user:`).
+
+    Filter boxes send only these to `search`; other text, such as a time
+    like "10:30" or an IPv6 address, is matched as a plain substring.
+    """
+    for tok in _QUERY_RE.findall(text):
+        prefix, sep, _ = tok.lstrip("(").partition(":")
+        if sep and (prefix == "field" or prefix in ALIASES):
+            return True
+    return False
+
+
+def rebuild() -> int:
+    """Regenerate the index log from the scan files. Returns scans indexed."""
+    from . import history
+
+    tmp = INDEX_LOG.with_suffix(".tmp")
+    count = 0
+    with open(tmp, "wb") as f:
+        for p in sorted(history.list_scans()):
+            try:
+                data = history.load_scan(p)
+            except Exception:
+                continue
+            rec = {"file": p.name, "time": str(data.get("timestamp", "")), "terms": sorted(extract_terms(data))}
+            f.write(serializer.dumps(rec) + b"\n")
+            count += 1
+    with _index._lock:
+        tmp.replace(INDEX_LOG)
+        _index._reset()
+    return count
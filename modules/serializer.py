@@ -0,0 +1,109 @@
+"""Serialization layer shared by exports, history, audit logs and config.
+
+Uses the fastest installed backend and falls back to the standard library:
+
+- text JSON: `orjson` if installed, else stdlib `json`
+- binary storage: `msgpack` if installed, else zlib-compressed compact JSON
+- canonical form: key-sorted compact JSON from stdlib `json` (always), so
+  `content_hash` is identical on every host regardless of installed backends
+
+All text JSON functions work in bytes (UTF-8).
+"""
+from pathlib import Path
+from typing import Any, List, Optional, Union
+import hashlib
+import json
+import zlib
+
+try:
+    import orjson
+    HAVE_ORJSON = True
+except ImportError:
+    HAVE_ORJSON = False
+
+try:
+    import msgpack
+    HAVE_MSGPACK = True
+except ImportError:
+    HAVE_MSGPACK = False
+
+
+BACKEND = "orjson" if HAVE_ORJSON else "json"
+BINARY_BACKEND = "msgpack" if HAVE_MSGPACK else "zlib-json"
+
+# One-byte tags so binary blobs say how they were encoded.
+_TAG_MSGPACK = b"M"
+_TAG_ZJSON = b"Z"
+
+
+def available_backends() -> List[str]:
+    """Return the text JSON backends usable in this process."""
+    return ["orjson", "json"] if HAVE_ORJSON else ["json"]
+
+
+def _stdlib_dumps(obj: Any, pretty: bool) -> bytes:
+    if pretty:
+        return json.dumps(obj, indent=2, default=str, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), default=str, ensure_ascii=False).encode("utf-8")
+
+
+def dumps(obj: Any, pretty: bool = False, backend: Optional[str] = None) -> bytes:
+    """Serialize to JSON bytes. `pretty` indents by two spaces."""
+    backend = backend or BACKEND
+    if backend == "orjson":
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        try:
+            return orjson.dumps(obj, default=str, option=option)
+        except TypeError:
+            # e.g. integers wider than 64 bits; stdlib handles them
+            pass
+    return _stdlib_dumps(obj, pretty)
+
+
+def loads(data: Union[bytes, str], backend: Optional[str] = None) -> Any:
+    backend = backend or BACKEND
+    if backend == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump(obj: Any, path: Path, pretty: bool = False):
+    """Write `obj` as JSON to `path`."""
+    with open(path, "wb") as f:
+        f.write(dumps(obj, pretty=pretty))
+
+
+def load(path: Path) -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dumps_binary(obj: Any, backend: Optional[str] = None) -> bytes:
+    """Serialize to a compact tagged binary blob for storage."""
+    backend = backend or BINARY_BACKEND
+    if backend == "msgpack":
+        return _TAG_MSGPACK + msgpack.packb(obj, default=str, use_bin_type=True)
+    return _TAG_ZJSON + zlib.compress(dumps(obj), 6)
+
+
+def loads_binary(blob: bytes) -> Any:
+    tag, body = blob[:1], blob[1:]
+    if tag == _TAG_MSGPACK:
+        if not HAVE_MSGPACK:
+            raise RuntimeError("This blob was written with msgpack, which is not installed")
+        return msgpack.unpackb(body, raw=False)
+    if tag == _TAG_ZJSON:
+        return loads(zlib.decompress(body))
+    raise ValueError("Unknown binary serialization tag")
+
+
+def canonical(obj: Any) -> bytes:
+    """Key-sorted, whitespace-free JSON used for hashing and deduplication."""
+    return json.dumps(
+        obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    ).encode("utf-8")
+
+
+def content_hash(obj: Any) -> str:
+    """Stable SHA-256 hex digest of an object's canonical form."""
+    return hashlib.sha256(canonical(obj)).hexdigest()
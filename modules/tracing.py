@@ -0,0 +1,266 @@
+"""Timing spans for scans, checks and the commands they run, plus profiling.
+
+While a `Tracer` is current (`use`), `span` records one timed region: its
+wall time, the CPU time of the thread it ran on, and, for commands, the CPU
+time of the child process and the bytes it wrote. Spans nest. A span's
+child-process count, bytes and child CPU time add up into its parent, so a
+check's span totals everything its commands did. The scanner traces every
+scan, and `runner.run`, `read_file` and `probe` open a span per call:
+
+    scan                          wall 9.12  cpu 0.31
+      network                     wall 8.40  cpu 0.05  1 process
+        probe socket.getfqdn      wall 8.02               <- slow DNS
+        ip addr                   wall 0.01  child cpu 0.004  5 KB
+
+`Tracer.to_list` is what the scan stores under `scan.trace`; each span has
+an `id` unique within the scan and its parent's `parent_id`. The same spans
+can be written as a Chrome trace-event file (`write_chrome_trace`; open it
+in chrome://tracing or Perfetto). `Profiler` gathers cProfile stats from
+every thread that runs scan code.
+
+Child CPU time comes from `getrusage(RUSAGE_CHILDREN)` and is only
+available on POSIX. It covers every child the process reaped while the
+command ran, which is exact unless a timed-out check is still starting
+commands in the background.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import cProfile
+import itertools
+import os
+import pstats
+import threading
+import time
+
+from . import serializer
+
+try:
+    import resource
+    HAVE_RESOURCE = True
+except ImportError:  # Windows
+    HAVE_RESOURCE = False
+
+
+def child_cpu() -> float:
+    """CPU seconds (user + system) used so far by reaped child processes."""
+    if not HAVE_RESOURCE:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    cat: str                          # "scan", "check", "command", "file" or "probe"
+    start: float                      # time.perf_counter()
+    parent: Optional["Span"] = None
+    tid: int = 0
+    thread: str = ""
+    wall: float = 0.0
+    cpu: float = 0.0                  # CPU time of the thread the span ran on
+    child_cpu: float = 0.0
+    children: int = 0                 # processes started
+    bytes: int = 0                    # bytes read from commands and files
+    args: Dict[str, Any] = field(default_factory=dict)
+    id: int = 0                       # unique within its tracer
+    _cpu0: float = 0.0
+    _reset: Any = None
+
+    def to_dict(self, t0: float) -> Dict:
+        return {
+            "id": self.id, "name": self.name, "cat": self.cat,
+            "parent_id": self.parent.id if self.parent is not None else None,
+            "parent": self.parent.name if self.parent is not None else None,
+            "start": round(self.start - t0, 4), "wall": round(self.wall, 4),
+            "cpu": round(self.cpu, 4), "child_cpu": round(self.child_cpu, 4),
+            "children": self.children, "bytes": self.bytes, **self.args,
+        }
+
+
+class Tracer:
+    """Finished spans of one scan, in the order they ended."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)   # next() is atomic under the GIL
+
+    def _finish(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+            parent = span.parent
+            if parent is not None:
+                parent.children += span.children
+                parent.bytes += span.bytes
+                parent.child_cpu += span.child_cpu
+
+    def to_list(self) -> List[Dict]:
+        """Span dicts ordered by start time."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        return [s.to_dict(self.t0) for s in spans]
+
+    def chrome_trace(self) -> Dict:
+        """The spans as Chrome trace-event JSON ("X" complete events, microseconds)."""
+        with self._lock:
+            spans = list(self.spans)
+        pid = os.getpid()
+        events: List[Dict] = []
+        threads = {}
+        for s in spans:
+            threads.setdefault(s.tid, s.thread)
+            args = s.to_dict(self.t0)
+            for key in ("name", "cat", "start", "wall"):
+                del args[key]
+            events.append({"name": s.name, "cat": s.cat, "ph": "X", "pid": pid, "tid": s.tid,
+                           "ts": round((s.start - self.t0) * 1e6, 1), "dur": round(s.wall * 1e6, 1), "args": args})
+        for tid, name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+_tracer: ContextVar[Optional[Tracer]] = ContextVar("nexum_tracer", default=None)
+_parent: ContextVar[Optional[Span]] = ContextVar("nexum_span", default=None)
+
+
+@contextmanager
+def use(tracer: Tracer):
+    """Record spans opened in this context (thread) into `tracer`."""
+    reset = _tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _tracer.reset(reset)
+
+
+def begin(name: str, cat: str, **args) -> Optional[Span]:
+    """Open a span under the current one; None (and no cost) when nothing is tracing."""
+    tracer = _tracer.get()
+    if tracer is None:
+        return None
+    thread = threading.current_thread()
+    span = Span(name, cat, time.perf_counter(), _parent.get(), thread.ident, thread.name, args=args,
+                id=next(tracer._ids), _cpu0=time.thread_time())
+    span._reset = _parent.set(span)
+    return span
+
+
+def end(span: Optional[Span]):
+    """Close `span` (from the thread that opened it) and add it to the tracer."""
+    if span is None:
+        return
+    span.wall = time.perf_counter() - span.start
+    span.cpu = time.thread_time() - span._cpu0
+    _parent.reset(span._reset)
+    span._reset = None
+    tracer = _tracer.get()
+    if tracer is not None:
+        tracer._finish(span)
+
+
+@contextmanager
+def span(name: str, cat: str, **args) -> Iterator[Optional[Span]]:
+    s = begin(name, cat, **args)
+    try:
+        yield s
+    finally:
+        end(s)
+
+
+def write_chrome_trace(tracer: Tracer, path: Path) -> Path:
+    path = Path(path)
+    path.write_bytes(serializer.dumps(tracer.chrome_trace()))
+    return path
+
+
+def breakdown(trace: List[Dict]) -> List[Tuple[int, Dict]]:
+    """(depth, span) rows of a stored `scan.trace`, each span under its parent (by `parent_id`)."""
+    ids = {s["id"] for s in trace}
+    by_parent: Dict[Any, List[Dict]] = {}
+    for s in trace:
+        # A span whose parent had not ended when the trace was taken is shown at the top.
+        parent = s.get("parent_id") if s.get("parent_id") in ids else None
+        by_parent.setdefault(parent, []).append(s)
+    rows: List[Tuple[int, Dict]] = []
+    stack = [(0, s) for s in reversed(by_parent.get(None, []))]
+    while stack:
+        depth, s = stack.pop()
+        rows.append((depth, s))
+        stack.extend((depth + 1, c) for c in reversed(by_parent.get(s["id"], [])))
+    return rows
+
+
+BREAKDOWN_COLUMNS = ("Span", "Wall s", "CPU s", "Child CPU s", "Processes", "Bytes")
+
+
+def breakdown_row(depth: int, span: Dict) -> Tuple:
+    """Display values for one span, in `BREAKDOWN_COLUMNS` order."""
+    name = span["name"]
+    if span.get("cached"):
+        name += " (cached)"
+    elif span.get("status") or span.get("outcome") not in (None, "ok"):
+        name += f" ({span.get('status') or span.get('outcome')})"
+    return ("  " * depth + name, f"{span['wall']:.3f}", f"{span['cpu']:.3f}", f"{span['child_cpu']:.3f}",
+            span["children"], span["bytes"])
+
+
+def format_breakdown(trace: List[Dict]) -> List[str]:
+    """A stored `scan.trace` as a plain-text table, one line per span."""
+    rows = [BREAKDOWN_COLUMNS] + [breakdown_row(depth, s) for depth, s in breakdown(trace)]
+    width = max(len(str(r[0])) for r in rows)
+    return [f"{r[0]:<{width}} {r[1]:>8} {r[2]:>8} {r[3]:>12} {r[4]:>10} {r[5]:>10}\n" for r in rows]
+
+
+class Profiler:
+    """cProfile stats merged from every thread that runs under `thread()`.
+
+    Up to Python 3.11 a `cProfile.Profile` follows one thread's call stack,
+    so each thread gets its own and `stats()` adds them up. From 3.12 only
+    one profiler can be active, and it sees every thread; later threads then
+    run unprofiled under the first one.
+    """
+
+    def __init__(self):
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def thread(self):
+        """Profile the calling thread; yields None where another profiler already covers it."""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # "Another profiling tool is already active" (3.12+)
+            profile = None
+        if profile is None:
+            yield None
+            return
+        with self._lock:
+            self.profiles.append(profile)
+        try:
+            yield profile
+        finally:
+            profile.disable()
+
+    def stats(self, stream=None) -> Optional[pstats.Stats]:
+        with self._lock:
+            profiles = list(self.profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0], stream=stream)
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def dump(self, path: Path) -> Optional[Path]:
+        """Write the merged stats in pstats format (`python -m pstats FILE`)."""
+        stats = self.stats()
+        if stats is None:
+            return None
+        stats.dump_stats(str(path))
+        return Path(path)
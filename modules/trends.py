@@ -0,0 +1,254 @@
+"""Trend aggregates over scan history.
+
+Every `history.save_scan` folds the new scan into a small rollup file
+(`history/rollups.json`) instead of leaving trend queries to re-read every
+scan:
+
+- hourly and daily buckets of the risk score (min, max, sum, count),
+- per-finding status transitions (only changes are stored),
+- timestamps of score regressions.
+
+Everything is kept per host (`history.scan_host`): scans the collector
+receives from many agents share one history, and a drop from one host's
+score to another's is not a regression. Queries default to this machine
+(`history.LOCAL_HOST`); `hosts()` lists the others.
+
+Queries read the rollups (kept in memory between calls) so charts over a year
+of frequent scans stay interactive. `rebuild()` regenerates the rollups from
+the raw scan files. `invalidate()` drops them after a failed update, and the
+next read or save rebuilds them from history.
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import threading
+
+from . import serializer
+from .history import HISTORY_DIR, LOCAL_HOST, scan_host
+
+ROLLUP_FILE = HISTORY_DIR / "rollups.json"
+# Version 1 mixed every host into one set of rollups.
+ROLLUP_VERSION = 2
+
+# Finding sections tracked for status timelines.
+TRACKED_FINDINGS = ("firewall", "antivirus", "disk_encryption", "user_accounts")
+
+RESOLUTIONS = {"hourly": "%Y%m%d%H", "daily": "%Y%m%d"}
+
+# Held for every read and every read-modify-write of the rollups, so folding
+# a scan into the cached dict is never seen half done.
+_lock = threading.RLock()
+_cache: Dict = {"mtime": None, "data": None}
+
+
+def _empty() -> Dict:
+    return {"version": ROLLUP_VERSION, "hosts": {}}
+
+
+def _empty_host() -> Dict:
+    return {
+        "hourly": {},
+        "daily": {},
+        "findings": {},
+        "regressions": [],
+        "last": {},
+    }
+
+
+def _load() -> Dict:
+    try:
+        mtime = ROLLUP_FILE.stat().st_mtime
+    except FileNotFoundError:
+        from . import history
+        # Missing after invalidate() (or never built): recover from the scans themselves.
+        return rebuild() if history.list_scans() else _empty()
+    if _cache["mtime"] == mtime and _cache["data"] is not None:
+        return _cache["data"]
+    try:
+        data = serializer.load(ROLLUP_FILE)
+    except Exception:
+        data = _empty()
+    if data.get("version") != ROLLUP_VERSION:
+        return rebuild()
+    _cache.update(mtime=mtime, data=data)
+    return data
+
+
+def _save(data: Dict):
+    tmp = ROLLUP_FILE.with_suffix(".tmp")
+    serializer.dump(data, tmp)
+    tmp.replace(ROLLUP_FILE)
+    _cache.update(mtime=ROLLUP_FILE.stat().st_mtime, data=data)
+
+
+def _scan_time(data: Dict) -> datetime:
+    ts = data.get("timestamp")
+    if ts:
+        try:
+            return datetime.fromisoformat(str(ts))
+        except ValueError:
+            pass
+    return datetime.now()
+
+
+def _finding_status(data: Dict, name: str) -> Optional[str]:
+    findings = data.get("findings") if isinstance(data.get("findings"), dict) else data
+    section = findings.get(name)
+    if not isinstance(section, dict):
+        return None
+    if name == "user_accounts" and "guest_enabled" in section:
+        return "guest_enabled" if section["guest_enabled"] else section.get("status")
+    return section.get("status")
+
+
+def _fold(rollups: Dict, data: Dict, host: str = LOCAL_HOST):
+    """Fold one scan payload of `host` into the rollups in place."""
+    rollups = rollups["hosts"].setdefault(host, _empty_host())
+    when = _scan_time(data)
+    iso = when.isoformat(timespec="seconds")
+    score = data.get("risk_score")
+
+    if isinstance(score, (int, float)):
+        for resolution, fmt in RESOLUTIONS.items():
+            key = when.strftime(fmt)
+            bucket = rollups[resolution].get(key)
+            if bucket is None:
+                rollups[resolution][key] = [score, score, score, 1]
+            else:
+                bucket[0] = min(bucket[0], score)
+                bucket[1] = max(bucket[1], score)
+                bucket[2] += score
+                bucket[3] += 1
+
+        # Compare against the previous scan of the same type: a quick scan
+        # checks fewer things than a full audit and would look like a jump.
+        scores = rollups["last"].setdefault("score", {})
+        kind = data.get("type", "full")
+        if kind in scores and score < scores[kind]:
+            rollups["regressions"].append(iso)
+        scores[kind] = score
+
+    for name in TRACKED_FINDINGS:
+        status = _finding_status(data, name)
+        if status is None:
+            continue
+        timeline = rollups["findings"].setdefault(name, [])
+        if not timeline or timeline[-1][1] != status:
+            timeline.append([iso, status])
+    rollups["last"]["timestamp"] = iso
+
+
+def record_scan(data: Dict):
+    """Update the rollups with a freshly saved scan."""
+    record_scans([data])
+
+
+def record_scans(batch: List[Dict], hosts: Optional[List[str]] = None):
+    """Fold several scans into the rollups with one read and one write.
+
+    Called by `history.save_scans`; `hosts` names each scan's host
+    (this machine when omitted).
+    """
+    with _lock:
+        if not ROLLUP_FILE.exists():
+            # The rebuild reads the scan files, which already include `batch`.
+            _load()
+            return
+        rollups = _load()
+        for i, data in enumerate(batch):
+            _fold(rollups, data, hosts[i] if hosts else LOCAL_HOST)
+        _save(rollups)
+
+
+def invalidate():
+    """Forget the rollups; they are rebuilt from history on next use."""
+    with _lock:
+        _cache.update(mtime=None, data=None)
+        try:
+            ROLLUP_FILE.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def rebuild(paths: List[Path] = None) -> Dict:
+    """Recompute the rollups from raw scan files (oldest first)."""
+    from . import history
+
+    payloads = []
+    # Save order (file names) breaks ties between scans with the same timestamp.
+    for p in sorted(paths if paths is not None else history.list_scans()):
+        try:
+            payloads.append((history.load_scan(p), scan_host(p.name)))
+        except Exception:
+            continue
+    payloads.sort(key=lambda item: _scan_time(item[0]))
+
+    rollups = _empty()
+    for data, host in payloads:
+        _fold(rollups, data, host)
+    with _lock:
+        _save(rollups)
+    return rollups
+
+
+def _bucket_start(key: str) -> datetime:
+    # Slicing is much cheaper than strptime for thousands of buckets.
+    hour = int(key[8:10]) if len(key) > 8 else 0
+    return datetime(int(key[0:4]), int(key[4:6]), int(key[6:8]), hour)
+
+
+def _host(host: str) -> Dict:
+    return _load()["hosts"].get(host) or _empty_host()
+
+
+def hosts() -> List[str]:
+    """Hosts with rollups; `history.LOCAL_HOST` ("") is this machine."""
+    with _lock:
+        return sorted(_load()["hosts"])
+
+
+def score_series(resolution: str = "hourly", start: datetime = None,
+                 end: datetime = None, host: str = LOCAL_HOST) -> List[Dict]:
+    """Return [{time, min, max, mean, count}] for each bucket of `host` in range."""
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    fmt = RESOLUTIONS[resolution]
+    lo = start.strftime(fmt) if start else None
+    hi = end.strftime(fmt) if end else None
+    series = []
+    with _lock:
+        buckets = _host(host)[resolution]
+        # Bucket keys are zero-padded timestamps, so string order is time order.
+        for key in sorted(buckets):
+            if (lo and key < lo) or (hi and key > hi):
+                continue
+            mn, mx, total, count = buckets[key]
+            series.append({
+                "time": _bucket_start(key),
+                "min": mn,
+                "max": mx,
+                "mean": total / count,
+                "count": count,
+            })
+    return series
+
+
+def finding_timeline(name: str, host: str = LOCAL_HOST) -> List[Tuple[datetime, str]]:
+    """Return the status transitions of one finding as (time, status) pairs."""
+    with _lock:
+        return [(datetime.fromisoformat(ts), status)
+                for ts, status in _host(host)["findings"].get(name, [])]
+
+
+def regressions(host: str = LOCAL_HOST) -> List[datetime]:
+    with _lock:
+        return [datetime.fromisoformat(ts) for ts in _host(host)["regressions"]]
+
+
+def mean_time_between_regressions(host: str = LOCAL_HOST) -> Optional[float]:
+    """Mean number of seconds between score regressions, or None if fewer than two."""
+    times = regressions(host)
+    if len(times) < 2:
+        return None
+    gaps = [(b - a).total_seconds() for a, b in zip(times, times[1:])]
+    return sum(gaps) / len(gaps)
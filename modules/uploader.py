@@ -0,0 +1,255 @@
+"""Upload saved scans to a collector (see `modules/collector.py`).
+
+Scans are first written to a spool directory, so nothing is lost while the
+collector is unreachable. A background thread sends the spool in batches:
+several scans go out as one gzip-compressed JSON list over a kept-alive
+connection. When the collector is down, or answers 503, the uploader waits
+with jittered exponential backoff (honouring `Retry-After`) before trying
+again, so a fleet of agents does not retry in lock-step.
+
+Other refusals are handled by status. A batch answered 413 (too large) or
+400/422 (bad payload) is split in half and resent, so only the scans the
+collector refuses on their own are moved to `spool/rejected/`. Any other
+answer (401, 403, 404, ...) means the uploader is misconfigured, not that
+the data is bad: uploads stop and the spool is kept for when it is fixed.
+
+Configured under the "upload" key of config.json; uploads are off until a
+`url` is set, and `offline_mode` suppresses them entirely:
+
+    {"upload": {"url": "http://collector.local:8765/v1/scans"}}
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+import gzip
+import http.client
+import itertools
+import logging
+import random
+import threading
+
+from . import audit_log, config as config_mod
+from . import serializer
+
+BASE_DIR = Path(__file__).parent.parent
+SPOOL_DIR = BASE_DIR / "spool"
+REJECTED_DIR = SPOOL_DIR / "rejected"
+
+DEFAULT_SETTINGS = {
+    "url": "",
+    "batch_size": 20,
+    "linger_seconds": 2.0,   # wait this long for more scans before sending
+    "backoff_base": 1.0,
+    "backoff_cap": 300.0,
+    "timeout": 10.0,
+    "spool_limit": 10000,    # oldest spooled scans are dropped beyond this
+}
+
+# Statuses that blame the payload; everything else that is not retried
+# blames the configuration.
+REJECTED_STATUSES = (400, 422)
+TOO_LARGE = 413
+
+_seq = itertools.count()
+
+
+def load_settings() -> Dict:
+    """Return the upload settings from config.json merged over the defaults."""
+    cfg = config_mod.load_config()
+    return {**DEFAULT_SETTINGS, **(cfg.get("upload") or {})}
+
+
+def is_offline() -> bool:
+    return bool(config_mod.load_config().get("offline_mode"))
+
+
+def backoff_delay(attempt: int, base: float, cap: float, rng=random) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return rng.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class UploadError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Uploader(threading.Thread):
+    """Background thread draining the spool to the collector."""
+
+    def __init__(self, settings: Dict = None, spool_dir: Path = SPOOL_DIR):
+        super().__init__(name="nexum-uploader", daemon=True)
+        self.settings = settings or load_settings()
+        self.spool_dir = Path(spool_dir)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        url = urlsplit(self.settings["url"])
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise ValueError(f"Unsupported collector URL: {self.settings['url']}")
+        self._url = url
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self.attempt = 0
+        self.disabled: Optional[str] = None   # why uploads stopped, if they did
+        self.stats = {"sent": 0, "batches": 0, "failures": 0, "rejected": 0, "dropped": 0}
+
+    # -- spool -------------------------------------------------------------
+
+    def submit(self, data: Dict) -> Optional[Path]:
+        """Spool a scan for upload. Returns None when offline mode is on."""
+        if is_offline():
+            return None
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = self.spool_dir / f"scan_{ts}_{next(_seq):04d}.json"
+        tmp = path.with_suffix(".tmp")
+        serializer.dump(data, tmp)
+        tmp.replace(path)
+        self._enforce_limit()
+        self._wake.set()
+        return path
+
+    def pending(self) -> List[Path]:
+        return sorted(self.spool_dir.glob("scan_*.json"))
+
+    def _enforce_limit(self):
+        files = self.pending()
+        excess = len(files) - self.settings["spool_limit"]
+        for p in files[:max(0, excess)]:
+            p.unlink(missing_ok=True)
+            self.stats["dropped"] += 1
+
+    # -- transport ---------------------------------------------------------
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self._url.scheme == "https" else http.client.HTTPConnection
+            self._conn = cls(self._url.hostname, self._url.port, timeout=self.settings["timeout"])
+        return self._conn
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _post(self, body: bytes) -> int:
+        headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        for retry in (True, False):
+            reused = self._conn is not None
+            try:
+                conn = self._connection()
+                conn.request("POST", self._url.path or "/", body, headers)
+                resp = conn.getresponse()
+                resp.read()
+                break
+            except (OSError, http.client.HTTPException) as e:
+                self._close()
+                # A kept-alive connection may have been closed by the server
+                # while idle; that is not an outage, so reconnect once.
+                if not (reused and retry):
+                    raise UploadError(f"collector unreachable: {e}")
+        if resp.will_close:
+            self._close()
+        if resp.status in (408, 429) or resp.status >= 500:
+            retry_after = resp.getheader("Retry-After")
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            raise UploadError(f"collector answered {resp.status}", retry_after)
+        return resp.status
+
+    def send_batch(self, paths: List[Path]) -> int:
+        """Upload spooled scans as one request. Returns the last HTTP status.
+
+        Raises UploadError when the batch should be retried later.
+        """
+        parts = [p.read_bytes() for p in paths]
+        body = gzip.compress(b"[" + b",".join(parts) + b"]", 6)
+        status = self._post(body)
+        if status < 300:
+            for p in paths:
+                p.unlink(missing_ok=True)
+            self.stats["sent"] += len(paths)
+            self.stats["batches"] += 1
+        elif status in REJECTED_STATUSES or status == TOO_LARGE:
+            if len(paths) > 1:
+                # Find the scans that are refused on their own; send the rest.
+                mid = len(paths) // 2
+                status = self.send_batch(paths[:mid])
+                if not self.disabled:
+                    status = self.send_batch(paths[mid:])
+                return status
+            # Resending this scan would be refused again.
+            REJECTED_DIR.mkdir(parents=True, exist_ok=True)
+            for p in paths:
+                p.replace(REJECTED_DIR / p.name)
+            self.stats["rejected"] += len(paths)
+        else:
+            self.disabled = f"collector answered {status}"
+            audit_log.event("uploader", "disabled", logging.ERROR, url=self.settings["url"], status=status,
+                            pending=len(self.pending()))
+        return status
+
+    def flush(self):
+        """Send everything spooled, batch by batch. Raises UploadError on failure."""
+        while not self._stop_event.is_set() and not self.disabled and not is_offline():
+            batch = self.pending()[:self.settings["batch_size"]]
+            if not batch:
+                return
+            self.send_batch(batch)
+
+    # -- thread ------------------------------------------------------------
+
+    def run(self):
+        while not self._stop_event.is_set():
+            delay = None
+            try:
+                self.flush()
+                self.attempt = 0
+            except UploadError as e:
+                self.stats["failures"] += 1
+                delay = backoff_delay(self.attempt, self.settings["backoff_base"], self.settings["backoff_cap"])
+                if e.retry_after is not None:
+                    delay = max(delay, e.retry_after)
+                self.attempt += 1
+            except Exception:
+                self.stats["failures"] += 1
+                delay = self.settings["backoff_cap"]
+            if self.disabled:
+                # Keep spooling; uploads resume after a restart with fixed settings.
+                self._stop_event.wait()
+                continue
+            if delay is not None:
+                self._stop_event.wait(delay)
+                continue
+            self._wake.wait()
+            self._wake.clear()
+            # Give other scans a moment to join the batch.
+            self._stop_event.wait(self.settings["linger_seconds"])
+        self._close()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+
+
+def start_background(settings: Dict = None,
+                     on_error: Callable[[str], None] = None) -> Optional[Uploader]:
+    """Start the uploader if a collector URL is configured.
+
+    A URL that cannot be used is logged and passed to `on_error`; uploads
+    then stay off instead of the caller failing to start.
+    """
+    settings = settings or load_settings()
+    if not settings.get("url"):
+        return None
+    try:
+        worker = Uploader(settings)
+    except ValueError as e:
+        audit_log.event("uploader", "invalid_url", logging.ERROR, url=settings["url"], error=str(e))
+        if on_error is not None:
+            on_error(str(e))
+        return None
+    worker.start()
+    return worker
@@ -1,6 +1,6 @@
-import platform
-import subprocess
-import os
+from typing import Dict, Iterable, List, Sequence
+
+from . import runner
 
 # Import pwd only on Unix-like systems
 try:
@@ -9,63 +9,73 @@ try:
 except ImportError:
     HAVE_PWD = False
 
+LOCAL_USERS_CMD = ["powershell", "-Command", "Get-LocalUser | Select-Object Name,Enabled,LastLogon,PasswordRequired"]
+
+
+def parse_local_users(text: str) -> List[Dict]:
+    """Parse the `Get-LocalUser` table into user dicts."""
+    users = []
+    for line in text.split('\n'):
+        if line.strip() and not line.startswith("Name"):
+            parts = line.split()
+            if parts:
+                users.append({
+                    "username": parts[0],
+                    "enabled": "True" in line,
+                    "requires_password": "True" in line
+                })
+    return users
+
+
+def parse_passwd(text: str) -> List[List]:
+    """Parse /etc/passwd into [name, uid, home, shell] entries, skipping malformed lines."""
+    entries = []
+    for line in text.split('\n'):
+        parts = line.split(':')
+        if len(parts) >= 7:
+            try:
+                entries.append([parts[0], int(parts[2]), parts[5], parts[6]])
+            except ValueError:
+                continue
+    return entries
+
+
+def select_users(entries: Iterable[Sequence]) -> List[Dict]:
+    """Regular users (uid >= 1000) and root, from [name, uid, home, shell] entries."""
+    return [
+        {"username": name, "uid": uid, "home": home, "shell": shell, "enabled": True}  # Assuming enabled if listed
+        for name, uid, home, shell in entries
+        if uid >= 1000 or name == 'root'
+    ]
+
+
+def _pwd_entries() -> List[List]:
+    return [[u.pw_name, u.pw_uid, u.pw_dir, u.pw_shell] for u in pwd.getpwall()]
+
+
 def get_user_accounts():
     """Get list of user accounts and their properties."""
-    system = platform.system().lower()
-    users = []
-    
+    system = runner.system()
+
     if system == "windows":
         try:
             # Using PowerShell to get user account information
-            cmd = ["powershell", "-Command", "Get-LocalUser | Select-Object Name,Enabled,LastLogon,PasswordRequired"]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            for line in result.stdout.split('\n'):
-                if line.strip() and not line.startswith("Name"):
-                    parts = line.split()
-                    if parts:
-                        users.append({
-                            "username": parts[0],
-                            "enabled": "True" in line,
-                            "requires_password": "True" in line
-                        })
-            return {"status": "success", "users": users}
+            result = runner.run(LOCAL_USERS_CMD)
+            return {"status": "success", "users": parse_local_users(result.stdout)}
         except Exception as e:
             return {"status": "error", "message": str(e)}
-            
+
     elif system in ["linux", "darwin"] and HAVE_PWD:
         try:
-            # Get users from /etc/passwd
-            for user in pwd.getpwall():
-                if user.pw_uid >= 1000 or user.pw_name in ['root']:  # Regular users and root
-                    users.append({
-                        "username": user.pw_name,
-                        "uid": user.pw_uid,
-                        "home": user.pw_dir,
-                        "shell": user.pw_shell,
-                        "enabled": True  # Assuming enabled if listed
-                    })
-            return {"status": "success", "users": users}
+            # Get users from the passwd database (includes directory services)
+            return {"status": "success", "users": select_users(runner.probe("pwd.getpwall", _pwd_entries))}
         except Exception as e:
             return {"status": "error", "message": str(e)}
     elif system in ["linux", "darwin"]:
         try:
             # Alternative method for systems without pwd module
-            result = subprocess.run(["cat", "/etc/passwd"], capture_output=True, text=True)
-            for line in result.stdout.split('\n'):
-                if line:
-                    parts = line.split(':')
-                    if len(parts) >= 7:
-                        if int(parts[2]) >= 1000 or parts[0] == 'root':
-                            users.append({
-                                "username": parts[0],
-                                "uid": int(parts[2]),
-                                "home": parts[5],
-                                "shell": parts[6],
-                                "enabled": True
-                            })
-            return {"status": "success", "users": users}
+            return {"status": "success", "users": select_users(parse_passwd(runner.read_file("/etc/passwd")))}
         except Exception as e:
             return {"status": "error", "message": str(e)}
-    
-    return {"status": "unknown", "error": "Unsupported operating system"}
\ No newline at end of file
+
+    return {"status": "unknown", "error": "Unsupported operating system"}
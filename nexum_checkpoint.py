@@ -0,0 +1,293 @@
+"""Command-line entry point for NEXUM-CHECKPOINT.
+
+The GUIs live in `gui/`; this script hosts the headless commands.
+
+Usage:
+    python nexum_checkpoint.py report EXPORTS_DIR [--out DIR] [--format markdown,html] [--workers N]
+    python nexum_checkpoint.py fleet EXPORTS_DIR [--where COL=VALUE ...] [--count COL] [--no-cache]
+    python nexum_checkpoint.py collect [--host 127.0.0.1] [--port 8765] [--queue 1024] [--batch 256]
+    python nexum_checkpoint.py scan [--quick] [--deadline SECONDS] [--save] [--json] [--record BUNDLE]
+                                    [--trace TRACE.json] [--profile STATS.prof] [--metrics-file FILE.prom]
+    python nexum_checkpoint.py monitor [--interval SECONDS] [--quick] [--port 9464] [--textfile FILE.prom] [--save]
+    python nexum_checkpoint.py fix [FIX ...] [--all] [--dry-run] [--verify] [--workers N] [--json]
+    python nexum_checkpoint.py replay BUNDLE [BUNDLE ...] [--verify] [--repeat N] [--json]
+    python nexum_checkpoint.py rebuild
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+from modules import (collector, fleet, formatter, history, metrics, remediation, replay, report, runner, scanner,
+                     search, serializer, tracing, trends)
+
+
+def cmd_report(args) -> int:
+    start = time.perf_counter()
+    summary = report.build_reports(
+        Path(args.source),
+        out_dir=Path(args.out) if args.out else None,
+        formats=[f.strip() for f in args.format.split(",") if f.strip()],
+        workers=args.workers,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Rendered {summary['count']} hosts ({summary['errors']} unreadable) in {elapsed:.2f}s")
+    print(f"Mean score: {summary['mean']}")
+    return 0
+
+
+def cmd_fleet(args) -> int:
+    start = time.perf_counter()
+    table = fleet.load(Path(args.source), workers=args.workers, use_cache=not args.no_cache)
+    exports = len(table)
+    if not args.all_exports:
+        table = table.latest_per_host()
+    print(f"Loaded {exports} exports ({len(table.hosts(range(len(table))))} hosts) "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    conditions = dict(fleet.parse_condition(w) for w in args.where)
+    rows = table.select(**conditions)
+    if args.deduction:
+        wanted = set(table.with_deduction(args.deduction))
+        rows = [i for i in rows if i in wanted]
+    if conditions or args.deduction:
+        hosts = table.hosts(rows)
+        print(f"{len(hosts)} matching hosts")
+        for host in hosts[:args.limit]:
+            print(f"  {host}")
+    if args.count:
+        print(f"\n{args.count} distribution:")
+        for value, n in table.value_counts(args.count, rows):
+            print(f"  {value or '(none)'}: {n}")
+    return 0
+
+
+def cmd_collect(args) -> int:
+    server = collector.Collector(args.host, args.port, queue_size=args.queue, batch_size=args.batch)
+    host, port = server.address[:2]
+    print(f"Collecting scans on http://{host}:{port}{collector.SUBMIT_PATH} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    stats = server.stats()
+    print(f"Stored {stats['stored']} scans; rejected {stats['rejected']} requests, {stats['invalid']} invalid")
+    return 0
+
+
+def cmd_scan(args) -> int:
+    profiler = tracing.Profiler() if args.profile else None
+    scan = scanner.Scan(scanner.QUICK_SCAN if args.quick else scanner.FULL_AUDIT, deadline=args.deadline,
+                        profiler=profiler)
+    progress = None if args.json else (lambda check: print(f"{check.label}...", file=sys.stderr))
+    recorder = replay.Recorder() if args.record else None
+    try:
+        with runner.use_source(recorder):
+            results = scan.run(progress)
+    except KeyboardInterrupt:
+        scan.cancel()
+        print("Scan cancelled", file=sys.stderr)
+        return 130
+    data = scanner.build_payload(scan, results, quick=args.quick)
+    if recorder is not None:
+        path = recorder.bundle(scan, results).save(Path(args.record))
+        print(f"Recorded {len(recorder.entries)} probes to {path}", file=sys.stderr)
+    if args.trace:
+        path = tracing.write_chrome_trace(scan.tracer, Path(args.trace))
+        print(f"Trace written to {path} (open in chrome://tracing or Perfetto)", file=sys.stderr)
+    if profiler is not None and profiler.dump(Path(args.profile)):
+        profiler.stats(stream=sys.stderr).sort_stats("cumulative").print_stats(20)
+        print(f"Profile written to {args.profile} (python -m pstats {args.profile})", file=sys.stderr)
+    if args.save:
+        history.save_scan(data)
+    if args.metrics_file:
+        metrics.observe_scan(data)
+        metrics.write_textfile(Path(args.metrics_file))
+    if args.json:
+        sys.stdout.buffer.write(serializer.dumps(data, pretty=True) + b"\n")
+    else:
+        sys.stdout.writelines(formatter.iter_lines(data))
+        if scan.timed_out:
+            print(f"Timed out: {', '.join(scan.timed_out)}", file=sys.stderr)
+        if scan.insufficient_privilege:
+            print(f"Skipped (insufficient privilege): {', '.join(scan.insufficient_privilege)}", file=sys.stderr)
+        print(f"Scan took {scan.elapsed:.2f}s (deadline {scan.deadline:g}s)", file=sys.stderr)
+        sys.stderr.writelines(tracing.format_breakdown(data["scan"]["trace"]))
+    return 2 if scan.timed_out else 0
+
+
+def cmd_monitor(args) -> int:
+    if args.port is None and not args.textfile:
+        args.port = metrics.DEFAULT_PORT
+    server = metrics.MetricsServer(args.host, args.port).start() if args.port is not None else None
+    if server is not None:
+        host, port = server.server_address[:2]
+        print(f"Serving metrics on http://{host}:{port}{metrics.METRICS_PATH} (Ctrl+C to stop)", file=sys.stderr)
+    checks = scanner.QUICK_SCAN if args.quick else scanner.FULL_AUDIT
+    scan = None
+    try:
+        while True:
+            started = time.monotonic()
+            scan = scanner.Scan(checks, deadline=args.deadline)
+            data = scanner.build_payload(scan, scan.run(), quick=args.quick)
+            metrics.observe_scan(data)
+            if args.textfile:
+                metrics.write_textfile(Path(args.textfile))
+            if args.save:
+                history.save_scan(data)
+            print(f"Scan finished: score {data['risk_score']}, {scan.elapsed:.2f}s", file=sys.stderr)
+            time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        if scan is not None:
+            scan.cancel()
+        return 0
+    finally:
+        if server is not None:
+            server.stop()
+
+
+def cmd_fix(args) -> int:
+    fix_ids = list(remediation.FIXES) if args.all else args.fixes
+    if not fix_ids:
+        for fid, desc in remediation.available_fixes().items():
+            print(f"{fid:<22} {desc}")
+        return 0
+    progress = None if args.json or args.dry_run else (
+        lambda step: print(f"{step.fix.id}: {step.status}", file=sys.stderr))
+    try:
+        fix_plan = remediation.remediate(fix_ids, dry_run=args.dry_run, progress=progress, workers=args.workers)
+    except (KeyError, ValueError) as e:
+        print(e.args[0] if e.args else e, file=sys.stderr)
+        return 1
+    verification = None
+    if args.verify and not args.dry_run:
+        latest = history.latest_scan()
+        verification = remediation.verify(fix_plan, history.load_scan(latest) if latest else None)
+    if args.json:
+        out = fix_plan.to_dict()
+        if verification is not None:
+            out["verification"] = {k: v for k, v in verification.items() if k != "payload"}
+        sys.stdout.buffer.write(serializer.dumps(out, pretty=True) + b"\n")
+    else:
+        sys.stdout.writelines(fix_plan.describe())
+        if verification is not None:
+            sys.stdout.writelines(remediation.format_verification(verification))
+    return 1 if any(step.status == "failed" for step in fix_plan.steps) else 0
+
+
+def cmd_replay(args) -> int:
+    failed = 0
+    for name in args.bundles:
+        bundle = replay.Bundle.load(Path(name))
+        if args.verify:
+            changes = replay.verify(bundle)
+            failed += bool(changes)
+            print(f"{name}: {'ok' if not changes else f'{len(changes)} differences'}")
+            for change in changes:
+                print(f"  {change.op} {change.path}: {change.old!r} -> {change.new!r}")
+        elif args.json:
+            sys.stdout.buffer.write(serializer.dumps(replay.replay(bundle), pretty=True) + b"\n")
+        else:
+            print(f"# {name} ({bundle.meta.get('system', '?')}, {bundle.meta.get('host', '?')})")
+            sys.stdout.writelines(formatter.iter_lines(replay.replay(bundle)))
+        if args.repeat:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                replay.replay(bundle)
+            elapsed = time.perf_counter() - start
+            print(f"{name}: {args.repeat} replays in {elapsed:.2f}s ({args.repeat / elapsed:.0f}/s)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def cmd_rebuild(args) -> int:
+    records = history.rebuild_index()
+    trends.rebuild()
+    search.rebuild()
+    print(f"Rebuilt the history index, trend rollups and search index from {len(records)} scans")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="nexum_checkpoint", description="NEXUM-CHECKPOINT command line")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("report", help="Render per-host and fleet reports from a directory of exports")
+    p.add_argument("source", help="Directory containing audit_*.json exports")
+    p.add_argument("--out", help=f"Output directory (default: {report.REPORTS_DIR})")
+    p.add_argument("--format", default="markdown,html", help="Comma-separated: markdown, html")
+    p.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("fleet", help="Query a directory of exports as one table")
+    p.add_argument("source", help="Directory containing audit_*.json exports")
+    p.add_argument("--where", action="append", default=[], help="Condition such as firewall=inactive or score<50 (repeatable)")
+    p.add_argument("--deduction", help="Only rows with this deduction reason")
+    p.add_argument("--count", help="Show the value distribution of a column, e.g. antivirus_product")
+    p.add_argument("--limit", type=int, default=50, help="Maximum hosts to list")
+    p.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p.add_argument("--no-cache", action="store_true", help="Ignore and do not write the parsed-table cache")
+    p.add_argument("--all-exports", action="store_true",
+                   help="Query every export rather than the newest one per host")
+    p.set_defaults(func=cmd_fleet)
+
+    p = sub.add_parser("collect", help="Receive scans from agents over HTTP into the history store")
+    p.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    p.add_argument("--port", type=int, default=collector.DEFAULT_PORT)
+    p.add_argument("--queue", type=int, default=1024, help="Ingest queue size before answering 503")
+    p.add_argument("--batch", type=int, default=256, help="Maximum submissions written per batch")
+    p.set_defaults(func=cmd_collect)
+
+    p = sub.add_parser("scan", help="Scan this host under a deadline (Ctrl+C cancels)")
+    p.add_argument("--quick", action="store_true", help="Firewall and antivirus only")
+    p.add_argument("--deadline", type=float, default=None,
+                   help=f"Seconds for the whole scan (default: scan_deadline in config.json, else {scanner.DEFAULT_DEADLINE:g})")
+    p.add_argument("--save", action="store_true", help="Store the scan in history")
+    p.add_argument("--json", action="store_true", help="Print the scan as JSON")
+    p.add_argument("--record", metavar="BUNDLE", help="Capture every command, file read and probe into BUNDLE (.json or .json.gz)")
+    p.add_argument("--trace", metavar="FILE", help="Write the scan's timing spans as a Chrome trace-event file")
+    p.add_argument("--profile", metavar="FILE", help="Profile the scan with cProfile and write the stats to FILE")
+    p.add_argument("--metrics-file", metavar="FILE", help="Write Prometheus metrics for node_exporter's textfile collector")
+    p.set_defaults(func=cmd_scan)
+
+    p = sub.add_parser("monitor", help="Scan on an interval and expose Prometheus metrics")
+    p.add_argument("--interval", type=float, default=300.0, help="Seconds between scan starts (default: 300)")
+    p.add_argument("--quick", action="store_true", help="Firewall and antivirus only")
+    p.add_argument("--deadline", type=float, default=None, help="Seconds for each scan")
+    p.add_argument("--host", default="127.0.0.1", help="Address to serve metrics on")
+    p.add_argument("--port", type=int, default=None,
+                   help=f"Port to serve {metrics.METRICS_PATH} on (default: {metrics.DEFAULT_PORT} unless --textfile is given)")
+    p.add_argument("--textfile", metavar="FILE", help="Also rewrite FILE (.prom) after every scan")
+    p.add_argument("--save", action="store_true", help="Store every scan in history")
+    p.set_defaults(func=cmd_monitor)
+
+    p = sub.add_parser("fix", help="Apply remediation fixes that are still needed (lists fixes when none are given)")
+    p.add_argument("fixes", nargs="*", help=f"Fix ids: {', '.join(remediation.FIXES)}")
+    p.add_argument("--all", action="store_true", help="Every available fix")
+    p.add_argument("--dry-run", action="store_true", help="Check current state and print the plan without applying it")
+    p.add_argument("--verify", action="store_true",
+                   help="Re-run the checks the fixes affect and rescore the latest scan in history")
+    p.add_argument("--workers", type=int, default=remediation.DEFAULT_WORKERS, help="Fixes applied in parallel")
+    p.add_argument("--json", action="store_true", help="Print the plan and results as JSON")
+    p.set_defaults(func=cmd_fix)
+
+    p = sub.add_parser("replay", help="Run the check parsers against recorded bundles")
+    p.add_argument("bundles", nargs="+", help="Bundles written by scan --record")
+    p.add_argument("--verify", action="store_true", help="Compare with the results stored at recording time")
+    p.add_argument("--repeat", type=int, default=0, help="Also time N replays of each bundle")
+    p.add_argument("--json", action="store_true", help="Print the replayed results as JSON")
+    p.set_defaults(func=cmd_replay)
+
+    p = sub.add_parser("rebuild", help="Recreate the history index, trend rollups and search index from the scan files")
+    p.set_defaults(func=cmd_rebuild)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
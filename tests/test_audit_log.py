@@ -0,0 +1,50 @@
+"""Audit log writer start-up and shutdown."""
+import logging
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules import audit_log  # noqa: E402
+
+
+class SlowHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.records = []
+
+    def emit(self, record):
+        self.started.set()
+        threading.Event().wait(0.2)
+        self.records.append(record.getMessage())
+
+
+class AuditLogTest(unittest.TestCase):
+    def test_stop_with_a_full_queue_writes_everything(self):
+        q = queue.Queue(maxsize=1)
+        handler = SlowHandler()
+        listener = audit_log.AuditQueueListener(q, handler)
+        listener.start()
+        q.put(logging.makeLogRecord({"msg": "first"}))
+        handler.started.wait(1)
+        q.put(logging.makeLogRecord({"msg": "second"}))
+        listener.stop()
+        self.assertEqual(handler.records, ["first", "second"])
+
+    def test_import_does_not_create_the_log_dir(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_dir = Path(tmp) / "logs"
+            subprocess.run([sys.executable, "-c", "from modules import audit_log"], check=True,
+                           cwd=Path(__file__).parent.parent, env={**os.environ, "NEXUM_LOG_DIR": str(log_dir)})
+            self.assertFalse(log_dir.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
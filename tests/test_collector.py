@@ -0,0 +1,43 @@
+"""The collector rejects bad scans without losing its writer."""
+import http.client
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+# Scans are saved; keep them out of the real history. Must be set before importing.
+os.environ.setdefault("NEXUM_HISTORY_DIR", tempfile.mkdtemp(prefix="nexum-test-history-"))
+
+from modules import collector, serializer  # noqa: E402
+
+
+class CollectorTest(unittest.TestCase):
+    def setUp(self):
+        self.collector = collector.Collector(port=0, ack_timeout=5).start()
+
+    def tearDown(self):
+        self.collector.stop()
+
+    def post(self, payload):
+        conn = http.client.HTTPConnection(*self.collector.address, timeout=10)
+        conn.request("POST", collector.SUBMIT_PATH, serializer.dumps(payload), {"X-Nexum-Host": "agent-1"})
+        response = conn.getresponse()
+        body = serializer.loads(response.read())
+        conn.close()
+        return response.status, body
+
+    def test_unscorable_scan_is_rejected_and_later_scans_are_stored(self):
+        status, body = self.post({"firewall": "off"})
+        self.assertEqual(status, 400)
+        self.assertIn("invalid scan", body["error"])
+        status, body = self.post({"type": "quick", "firewall": {"status": "active"}})
+        self.assertEqual(status, 200)
+        self.assertEqual(body["accepted"], 1)
+        self.assertTrue(self.collector._writer.is_alive())
+        self.assertEqual(self.collector.stats()["invalid"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Atomic export publishing: name collisions and failed writes."""
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules import exporter  # noqa: E402
+
+
+class AtomicWriterTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self._dir.name)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def write(self, name: str, text: str = "x", compression=None) -> Path:
+        target = exporter.AtomicWriter(self.dir / name, compression)
+        with target as out:
+            out.write(text)
+        return target.path
+
+    def test_taken_name_is_numbered_before_all_suffixes(self):
+        self.write("audit.json.gz", compression="gzip")
+        self.assertEqual(self.write("audit.json.gz", compression="gzip").name, "audit_001.json.gz")
+
+    def test_name_without_suffix_is_numbered(self):
+        self.write("audit")
+        self.assertEqual(self.write("audit").name, "audit_001")
+
+    def test_dots_in_a_name_are_not_suffixes(self):
+        self.write("audit_web1.example.com.json")
+        self.assertEqual(self.write("audit_web1.example.com.json").name, "audit_web1.example.com_001.json")
+        self.write("audit_web1.example.com")
+        self.assertEqual(self.write("audit_web1.example.com").name, "audit_web1.example.com_001")
+
+    def test_failed_write_leaves_nothing_behind(self):
+        with self.assertRaises(RuntimeError):
+            with exporter.AtomicWriter(self.dir / "audit.json"):
+                raise RuntimeError("writer failed")
+        self.assertEqual(list(self.dir.iterdir()), [])
+
+
+
+class ExportTest(unittest.TestCase):
+    def test_unknown_compression_is_a_value_error(self):
+        with tempfile.TemporaryDirectory() as d, self.assertRaisesRegex(ValueError, "Unknown compression"):
+            exporter.export({}, compression="brotli", directory=Path(d))
+
+    def test_csv_record_keys_do_not_replace_fixed_columns(self):
+        data = {"user_accounts": {"users": [{"username": "alice", "kind": "admin", "name": "Alice A."}]}}
+        with tempfile.TemporaryDirectory() as d:
+            text = exporter.export(data, "csv", directory=Path(d)).read_text()
+        self.assertIn("account,alice,", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
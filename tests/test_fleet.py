@@ -0,0 +1,47 @@
+"""Fleet figures count each host once, by its newest export."""
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules import fleet, report, serializer  # noqa: E402
+
+
+def export(host: str, timestamp: str, firewall: str) -> dict:
+    return {"timestamp": timestamp, "network": {"hostname": host, "interfaces": []},
+            "firewall": {"status": firewall}, "antivirus": {"status": "active"}}
+
+
+class LatestPerHostTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self._dir.name)
+        for name, data in {
+            "audit_20260101_100000.json": export("web1", "2026-01-01T10:00:00", "inactive"),
+            "audit_20260102_100000.json": export("web1", "2026-01-02T10:00:00", "active"),
+            "audit_20260101_110000.json": export("db1", "2026-01-01T11:00:00", "inactive"),
+        }.items():
+            serializer.dump(data, self.dir / name)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_fleet_table(self):
+        table = fleet.load(self.dir, workers=1, use_cache=False)
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.hosts(range(len(table))), ["web1", "db1"])
+        latest = table.latest_per_host()
+        self.assertEqual(latest.hosts(latest.select(firewall="inactive")), ["db1"])
+
+    def test_report_summary(self):
+        with tempfile.TemporaryDirectory() as out:
+            summary = report.build_reports(self.dir, out, formats=("markdown",), workers=1)
+        self.assertEqual(summary["count"], 2)
+        self.assertEqual(sorted(s["source"] for s in summary["worst"]),
+                         ["audit_20260101_110000.json", "audit_20260102_100000.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+"""Scan file names and the metadata index."""
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.append(str(Path(__file__).parent.parent))
+# Scans are saved; keep them out of the real history. Must be set before importing.
+os.environ.setdefault("NEXUM_HISTORY_DIR", tempfile.mkdtemp(prefix="nexum-test-history-"))
+
+from modules import history, trends  # noqa: E402
+
+
+class ScanHostTest(unittest.TestCase):
+    def test_hosts_round_trip_through_file_names(self):
+        hosts = ["db_server", "123", "web1.example.com", "db_server", "ünïcode host"]
+        paths = history.save_scans([{"type": "quick", "risk_score": 90} for _ in hosts], hosts)
+        self.assertEqual([history.scan_host(p.name) for p in paths],
+                         ["db-server", "123", "web1.example.com", "db-server", "-n-code-host"])
+        self.assertEqual(len(set(paths)), len(paths))
+        local = history.save_scan({"type": "quick", "risk_score": 80})
+        self.assertEqual(history.scan_host(local.name), history.LOCAL_HOST)
+        self.assertLessEqual({"", "db-server", "123", "web1.example.com"}, set(trends.hosts()))
+
+
+class DeleteScansTest(unittest.TestCase):
+    def test_delete_updates_the_index_without_a_rebuild(self):
+        paths = history.save_scans([{"type": "quick", "risk_score": 70} for _ in range(3)], ["del-host"] * 3)
+        history.list_metadata()
+        with mock.patch.object(history, "rebuild_index", wraps=history.rebuild_index) as rebuild:
+            history.delete_scans(paths[:2])
+            names = [r["file"] for r in history.list_metadata()]
+        self.assertEqual(rebuild.call_count, 0)
+        self.assertNotIn(paths[0].name, names)
+        self.assertIn(paths[2].name, names)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+"""Host names in replayed network checks follow the recorded host's settings."""
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules import network_info, replay, runner  # noqa: E402
+
+
+def network_bundle(*probes) -> replay.Bundle:
+    return replay.Bundle.from_dict({"version": replay.BUNDLE_VERSION, "meta": {"checks": ["network"]}, "entries": [
+        {"kind": "probe", "name": "socket.gethostname", "value": "web1"},
+        *({"kind": "probe", "name": name, "value": value} for name, value in probes),
+        {"kind": "probe", "name": "platform.system", "value": "Linux"},
+        {"kind": "cmd", "args": ["ip", "addr"], "returncode": 0, "stdout": "", "stderr": ""},
+    ], "results": {}})
+
+
+def replay_names(bundle: replay.Bundle):
+    with runner.use_source(replay.Replayer(bundle)):
+        info = network_info.get_network_info()
+    return info["fqdn"], info["fqdn_source"]
+
+
+class ReplayedNamesTest(unittest.TestCase):
+    def test_recorded_offline_mode_skips_the_lookup(self):
+        self.assertEqual(replay_names(network_bundle(("config.offline_mode", True))), ("web1", "offline"))
+
+    def test_recorded_lookup_is_used(self):
+        bundle = network_bundle(("config.offline_mode", False), ("socket.getfqdn", "web1.example.com"),
+                                ("resolver.fqdn_source", "dns"))
+        self.assertEqual(replay_names(bundle), ("web1.example.com", "dns"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+"""sudo_mode runs through the runner, so a replay answers it."""
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules import permissions, replay, runner  # noqa: E402
+
+
+def sudo_bundle(returncode: int) -> replay.Bundle:
+    return replay.Bundle.from_dict({"version": replay.BUNDLE_VERSION, "meta": {}, "entries": [
+        {"kind": "probe", "name": "platform.system", "value": "Linux"},
+        {"kind": "probe", "name": "shutil.which sudo", "value": "/usr/bin/sudo"},
+        {"kind": "cmd", "args": ["sudo", "-n", "-l"], "returncode": returncode, "stdout": "", "stderr": ""},
+    ], "results": {}})
+
+
+class SudoModeTest(unittest.TestCase):
+    def replayed_mode(self, returncode: int) -> str:
+        permissions.sudo_mode.cache_clear()
+        self.addCleanup(permissions.sudo_mode.cache_clear)
+        with mock.patch.object(permissions, "capabilities", return_value=permissions.Capabilities(False)), \
+                runner.use_source(replay.Replayer(sudo_bundle(returncode))):
+            return permissions.sudo_mode()
+
+    def test_replayed_sudo_answers(self):
+        self.assertEqual(self.replayed_mode(0), "passwordless")
+        self.assertEqual(self.replayed_mode(1), "password")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""Remediation planning against replayed hosts (nothing is executed)."""
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules import remediation, replay, runner  # noqa: E402
+
+
+def ufw_bundle(stdout: str, returncode: int = 0) -> replay.Bundle:
+    return replay.Bundle.from_dict({"version": replay.BUNDLE_VERSION, "meta": {"checks": ["firewall"]}, "entries": [
+        {"kind": "probe", "name": "platform.system", "value": "Linux"},
+        {"kind": "cmd", "args": ["ufw", "status"], "returncode": returncode, "stdout": stdout, "stderr": ""},
+    ], "results": {}})
+
+
+def plan_firewall(bundle: replay.Bundle) -> remediation.PlanStep:
+    with runner.use_source(replay.Replayer(bundle)):
+        return remediation.plan(["enable_firewall"]).steps[0]
+
+
+class FirewallPrecheckTest(unittest.TestCase):
+    def test_active_firewall_is_skipped(self):
+        step = plan_firewall(ufw_bundle("Status: active\n\nTo    Action  From\n"))
+        self.assertEqual((step.action, step.reason), (remediation.SKIP, "already satisfied"))
+
+    def test_inactive_firewall_is_applied(self):
+        step = plan_firewall(ufw_bundle("Status: inactive\n"))
+        self.assertEqual((step.action, step.reason), (remediation.APPLY, "needed"))
+
+    def test_unreadable_status_is_applied_as_unknown(self):
+        step = plan_firewall(ufw_bundle("ERROR: You need to be root to run this script\n", returncode=1))
+        self.assertEqual((step.action, step.reason), (remediation.APPLY, "state unknown"))
+
+
+class PlatformTest(unittest.TestCase):
+    def test_windows_only_fix_is_skipped_on_linux(self):
+        with runner.use_source(replay.Replayer(ufw_bundle("Status: active\n"))):
+            step = remediation.plan(["set_uac_secure"]).steps[0]
+        self.assertEqual((step.action, step.reason), (remediation.SKIP, "not applicable on linux"))
+
+    def test_skipped_fix_does_not_fail_the_run(self):
+        with runner.use_source(replay.Replayer(ufw_bundle("Status: active\n"))):
+            fix_plan = remediation.execute(remediation.plan(["set_uac_secure", "enable_firewall"]))
+        self.assertEqual([s.status for s in fix_plan.steps], ["skipped", "skipped"])
+
+
+if __name__ == "__main__":
+    unittest.main()
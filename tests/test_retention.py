@@ -0,0 +1,37 @@
+"""The retention worker logs a failed pass and keeps running."""
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.append(str(Path(__file__).parent.parent))
+# Keep the worker away from the real history. Must be set before importing.
+os.environ.setdefault("NEXUM_HISTORY_DIR", tempfile.mkdtemp(prefix="nexum-test-history-"))
+
+from modules import retention  # noqa: E402
+
+
+class RetentionWorkerTest(unittest.TestCase):
+    def test_failed_passes_are_logged_and_retried(self):
+        passes = threading.Semaphore(0)
+
+        def fail(policy):
+            passes.release()
+            raise OSError("disk gone")
+
+        worker = retention.RetentionWorker({**retention.DEFAULT_POLICY, "interval_seconds": 0.01})
+        with mock.patch.object(retention, "plan_retention", fail), \
+                mock.patch.object(retention.audit_log, "event") as event:
+            worker.start()
+            self.assertTrue(passes.acquire(timeout=5) and passes.acquire(timeout=5))
+            worker.stop()
+            worker.join(5)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(event.call_args.args[:2], ("retention", "pass_failed"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Typed and dict scoring agree, and records round-trip their dicts."""
+import itertools
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules.models import HostResult  # noqa: E402
+from modules.risk_score import RiskScorer  # noqa: E402
+
+PROTECTION = ["active", "inactive", "Off", "disabled", "stopped", "not detected", "error", "weird"]
+DISK = ["encrypted", "not encrypted", "off", "unencrypted", "false", "true", "error"]
+
+
+class ScoringPathsTest(unittest.TestCase):
+    def test_typed_and_dict_scores_match(self):
+        scorer = RiskScorer()
+        for fw, av, disk, updates in itertools.product(PROTECTION, PROTECTION[:3], DISK, (True, False, None)):
+            findings = {
+                "firewall": {"status": fw},
+                "antivirus": {"status": av},
+                "disk_encryption": {"status": disk},
+                "user_accounts": {"status": "success", "users": [], "guest_enabled": fw == "active"},
+            }
+            if updates is not None:
+                findings["updates"] = updates
+            with self.subTest(firewall=fw, antivirus=av, disk=disk, updates=updates):
+                score, deductions = scorer.score_result(HostResult.from_dict(findings))
+                self.assertEqual((score, [d.to_dict() for d in deductions]), scorer.calculate_score(findings))
+
+    def test_sections_round_trip(self):
+        data = {
+            "timestamp": "2026-01-01T10:00:00", "type": "full",
+            "os": {"name": "Linux", "version": "6.1"},
+            "firewall": {"status": "Off", "backend": "ufw"},
+            "antivirus": {"name": "ClamAV", "status": "installed", "realtime_protection": False},
+            "disk_encryption": {"status": "error", "error": "lsblk failed", "devices": ["sda"]},
+            "user_accounts": {"status": "error", "message": "permission denied"},
+            "network": {"interfaces": [], "hostname": "web1", "fqdn": "web1.example.com", "zone": "dmz"},
+        }
+        self.assertEqual(HostResult.from_dict(data).to_dict(), {"schema_version": 1, **data})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""Span nesting in stored traces and profiling across threads."""
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules import tracing  # noqa: E402
+
+
+def names(trace):
+    return [(depth, s["name"]) for depth, s in tracing.breakdown(trace)]
+
+
+class BreakdownTest(unittest.TestCase):
+    def test_spans_with_the_same_name_keep_their_own_parents(self):
+        tracer = tracing.Tracer()
+        with tracing.use(tracer):
+            with tracing.span("scan", "scan"):
+                for check in ("firewall", "network"):
+                    with tracing.span(check, "check"):
+                        with tracing.span("probe platform.system", "probe"):
+                            with tracing.span("read /etc/os-release", "file"):
+                                pass
+        self.assertEqual(names(tracer.to_list()), [
+            (0, "scan"),
+            (1, "firewall"), (2, "probe platform.system"), (3, "read /etc/os-release"),
+            (1, "network"), (2, "probe platform.system"), (3, "read /etc/os-release"),
+        ])
+
+
+class ProfilerTest(unittest.TestCase):
+    def test_threads_profiled_together_give_merged_stats(self):
+        profiler = tracing.Profiler()
+
+        def work():
+            with profiler.thread():
+                sorted(range(1000), reverse=True)
+
+        with profiler.thread():
+            worker = threading.Thread(target=work)
+            worker.start()
+            worker.join()
+        self.assertIsNotNone(profiler.stats())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Refused uploads: split, reject only bad scans, or keep the spool."""
+import gzip
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules import serializer, uploader  # noqa: E402
+
+
+class RefusedBatchTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        spool = Path(self._dir.name)
+        self.uploader = uploader.Uploader({**uploader.DEFAULT_SETTINGS, "url": "http://collector.invalid/v1/scans"},
+                                          spool_dir=spool)
+        self.posted = []
+        patches = [
+            mock.patch.object(uploader, "REJECTED_DIR", spool / "rejected"),
+            mock.patch.object(uploader, "is_offline", return_value=False),
+            mock.patch.object(uploader.audit_log, "event"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        for i in range(5):
+            self.uploader.submit({"type": "quick", "n": i})
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def answer(self, respond):
+        def post(body):
+            scans = serializer.loads(gzip.decompress(body))
+            self.posted.append([s["n"] for s in scans])
+            return respond(scans)
+        self.uploader._post = post
+
+    def test_too_large_batches_are_split(self):
+        self.answer(lambda scans: 413 if len(scans) > 2 else 200)
+        self.uploader.flush()
+        self.assertEqual(self.uploader.stats["sent"], 5)
+        self.assertEqual(self.uploader.stats["rejected"], 0)
+        self.assertEqual(self.uploader.pending(), [])
+
+    def test_only_the_bad_scan_is_rejected(self):
+        self.answer(lambda scans: 422 if any(s["n"] == 3 for s in scans) else 200)
+        self.uploader.flush()
+        self.assertEqual(self.uploader.stats["sent"], 4)
+        self.assertEqual(len(list((Path(self._dir.name) / "rejected").iterdir())), 1)
+
+    def test_unauthorized_keeps_the_spool_and_stops(self):
+        self.answer(lambda scans: 401)
+        self.uploader.flush()
+        self.assertEqual(self.posted, [[0, 1, 2, 3, 4]])
+        self.assertEqual(len(self.uploader.pending()), 5)
+        self.assertEqual(self.uploader.disabled, "collector answered 401")
+
+
+if __name__ == "__main__":
+    unittest.main()